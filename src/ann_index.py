@@ -0,0 +1,260 @@
+import os
+import numpy as np
+
+
+def _top_k(scores, k):
+    """Indices of the k highest scores, ordered best first"""
+    k = min(k, scores.shape[0])
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    if k < scores.shape[0]:
+        top = np.argpartition(-scores, k - 1)[:k]
+    else:
+        top = np.arange(scores.shape[0])
+    return top[np.argsort(-scores[top], kind='stable')]
+
+
+class ExactIndex:
+    """Brute-force inner product search over L2-normalized embeddings"""
+    kind = 'exact'
+
+    def __init__(self):
+        self.embeddings = None
+
+    def build(self, embeddings):
+        self.embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+        return self
+
+    def __len__(self):
+        return 0 if self.embeddings is None else self.embeddings.shape[0]
+
+    def search(self, query, k):
+        """Return (indices, similarities) of the top k rows for a normalized query"""
+        scores = self.embeddings @ np.asarray(query, dtype=np.float32)
+        top = _top_k(scores, k)
+        return top, scores[top]
+
+    def add(self, ids, vectors, embeddings):
+        """Index rows appended to the store; `embeddings` is the whole store after the append"""
+        self.embeddings = embeddings
+        return self
+
+    def to_arrays(self, include_vectors=False):
+        return {'kind': np.array(self.kind)}
+
+    def save(self, path):
+        np.savez(path, **self.to_arrays())
+        return path
+
+    @classmethod
+    def from_arrays(cls, arrays, embeddings):
+        return cls().build(embeddings)
+
+    @classmethod
+    def load(cls, path, embeddings):
+        return cls.from_arrays(np.load(path), embeddings)
+
+
+class IVFIndex:
+    """Inverted file index: spherical k-means coarse quantizer plus exact re-scoring
+
+    Vectors are grouped by their nearest centroid and stored contiguously per
+    list. A query scores the centroids, scans the `n_probe` closest lists and
+    ranks only those candidates, so n_probe trades recall for latency.
+    """
+    kind = 'ivf'
+
+    def __init__(self, n_lists=None, n_probe=8, n_iter=10, seed=42):
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self.n_iter = n_iter
+        self.seed = seed
+        self.centroids = None
+        self.list_offsets = None
+        self.list_ids = None
+        self.list_vectors = None
+        # Rows added after the build, per list: list -> (ids, vectors)
+        self.extra = {}
+
+    def __len__(self):
+        n_extra = sum(ids.shape[0] for ids, _ in self.extra.values())
+        return n_extra if self.list_ids is None else self.list_ids.shape[0] + n_extra
+
+    def _assign(self, vectors, chunk_size=65536):
+        """Nearest centroid for each vector, computed in chunks to bound memory"""
+        assignments = np.empty(vectors.shape[0], dtype=np.int32)
+        for start in range(0, vectors.shape[0], chunk_size):
+            chunk = vectors[start:start + chunk_size]
+            assignments[start:start + chunk_size] = np.argmax(chunk @ self.centroids.T, axis=1)
+        return assignments
+
+    def _train_centroids(self, vectors):
+        rng = np.random.default_rng(self.seed)
+        n_rows = vectors.shape[0]
+
+        # Train on a sample; k-means quality saturates well before the full catalog
+        sample_size = min(n_rows, self.n_lists * 256)
+        sample = vectors[rng.choice(n_rows, sample_size, replace=False)]
+        self.centroids = sample[rng.choice(sample_size, self.n_lists, replace=False)].copy()
+
+        for _ in range(self.n_iter):
+            assignments = self._assign(sample)
+            sums = np.zeros_like(self.centroids)
+            np.add.at(sums, assignments, sample)
+            counts = np.bincount(assignments, minlength=self.n_lists)
+
+            # Re-seed empty lists with random sample points
+            empty = counts == 0
+            if empty.any():
+                sums[empty] = sample[rng.choice(sample_size, int(empty.sum()))]
+
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            self.centroids = (sums / np.maximum(norms, 1e-12)).astype(np.float32)
+
+    def build(self, embeddings):
+        vectors = np.ascontiguousarray(embeddings, dtype=np.float32)
+        n_rows = vectors.shape[0]
+        if self.n_lists is None:
+            self.n_lists = max(1, int(np.sqrt(n_rows)))
+        self.n_lists = min(self.n_lists, n_rows)
+
+        self._train_centroids(vectors)
+
+        # Lay the vectors out contiguously per list (CSR-style offsets)
+        assignments = self._assign(vectors)
+        order = np.argsort(assignments, kind='stable')
+        counts = np.bincount(assignments, minlength=self.n_lists)
+        self.list_offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+        self.list_ids = order.astype(np.int64)
+        self.list_vectors = np.ascontiguousarray(vectors[order])
+        return self
+
+    def search(self, query, k, n_probe=None):
+        """Return (indices, similarities) of the approximate top k rows"""
+        query = np.asarray(query, dtype=np.float32)
+        n_probe = min(n_probe or self.n_probe, self.n_lists)
+
+        probed = _top_k(self.centroids @ query, n_probe)
+        slices = [slice(self.list_offsets[i], self.list_offsets[i + 1]) for i in probed]
+        extras = [self.extra[i] for i in probed if i in self.extra]
+        candidate_ids = np.concatenate([self.list_ids[s] for s in slices] + [ids for ids, _ in extras])
+        candidate_vectors = np.concatenate([self.list_vectors[s] for s in slices] + [vectors for _, vectors in extras])
+
+        scores = candidate_vectors @ query
+        top = _top_k(scores, k)
+        return candidate_ids[top], scores[top]
+
+    def add(self, ids, vectors, embeddings):
+        """Assign appended rows to their nearest lists without retraining the centroids
+
+        Only the touched lists grow; the contiguous layout is restored when the
+        index is serialized.
+        """
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        ids = np.asarray(ids, dtype=np.int64)
+        assignments = self._assign(vectors)
+        for list_id in np.unique(assignments).tolist():
+            members = assignments == list_id
+            old_ids, old_vectors = self.extra.get(list_id, (ids[:0], vectors[:0]))
+            self.extra[list_id] = (
+                np.concatenate([old_ids, ids[members]]),
+                np.concatenate([old_vectors, vectors[members]]),
+            )
+        return self
+
+    def _merge_extra(self):
+        """Fold rows added since the build back into the contiguous per-list layout"""
+        if not self.extra:
+            return
+        counts = np.diff(self.list_offsets)
+        ids, vectors = [], []
+        for list_id in range(self.n_lists):
+            ids.append(self.list_ids[self.list_offsets[list_id]:self.list_offsets[list_id + 1]])
+            vectors.append(self.list_vectors[self.list_offsets[list_id]:self.list_offsets[list_id + 1]])
+            if list_id in self.extra:
+                extra_ids, extra_vectors = self.extra[list_id]
+                ids.append(extra_ids)
+                vectors.append(extra_vectors)
+                counts[list_id] += extra_ids.shape[0]
+        self.list_offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+        self.list_ids = np.concatenate(ids).astype(np.int64)
+        self.list_vectors = np.ascontiguousarray(np.concatenate(vectors), dtype=np.float32)
+        self.extra = {}
+
+    def to_arrays(self, include_vectors=False):
+        """Index state as named arrays; list vectors only when the store can memory-map them"""
+        self._merge_extra()
+        arrays = {
+            'kind': np.array(self.kind),
+            'n_lists': np.array(self.n_lists),
+            'n_probe': np.array(self.n_probe),
+            'centroids': self.centroids,
+            'list_offsets': self.list_offsets,
+            'list_ids': self.list_ids,
+        }
+        if include_vectors:
+            arrays['list_vectors'] = self.list_vectors
+        return arrays
+
+    def save(self, path):
+        np.savez(path, **self.to_arrays())
+        return path
+
+    @classmethod
+    def from_arrays(cls, arrays, embeddings):
+        index = cls(n_lists=int(arrays['n_lists']), n_probe=int(arrays['n_probe']))
+        index.centroids = arrays['centroids']
+        index.list_offsets = arrays['list_offsets']
+        index.list_ids = arrays['list_ids']
+        if 'list_vectors' in arrays:
+            index.list_vectors = arrays['list_vectors']
+        else:
+            # Vectors are not duplicated on disk; rebuild the list layout from the store
+            index.list_vectors = np.ascontiguousarray(embeddings[index.list_ids], dtype=np.float32)
+        return index
+
+    @classmethod
+    def load(cls, path, embeddings):
+        return cls.from_arrays(np.load(path), embeddings)
+
+
+INDEX_TYPES = {
+    ExactIndex.kind: ExactIndex,
+    IVFIndex.kind: IVFIndex,
+}
+
+# Below this many rows an exact scan is already fast enough
+EXACT_SEARCH_MAX_ROWS = 20000
+
+
+def build_index(embeddings, n_neighbors=10, kind='auto'):
+    """Build a similarity index over normalized embeddings
+
+    `n_neighbors` is the number of inverted lists probed per query for IVF:
+    higher values give better recall at the cost of latency.
+    """
+    if kind == 'auto':
+        kind = 'exact' if embeddings.shape[0] <= EXACT_SEARCH_MAX_ROWS else 'ivf'
+    if kind == 'ivf':
+        return IVFIndex(n_probe=max(1, int(n_neighbors))).build(embeddings)
+    if kind not in INDEX_TYPES:
+        raise ValueError(f"Unknown index type: {kind}")
+    return INDEX_TYPES[kind]().build(embeddings)
+
+
+def index_from_arrays(arrays, embeddings):
+    """Rebuild an index from the arrays of `index.to_arrays`"""
+    kind = str(arrays['kind'])
+    if kind not in INDEX_TYPES:
+        raise ValueError(f"Unknown index type: {kind}")
+    return INDEX_TYPES[kind].from_arrays(arrays, embeddings)
+
+
+def load_index(path, embeddings):
+    """Load an index saved with `index.save` over the given embedding store"""
+    if not os.path.exists(path):
+        return None
+    kind = str(np.load(path)['kind'])
+    if kind not in INDEX_TYPES:
+        raise ValueError(f"Unknown index type in {path}: {kind}")
+    return INDEX_TYPES[kind].load(path, embeddings)
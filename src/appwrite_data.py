@@ -0,0 +1,63 @@
+import asyncio
+import httpx
+from typing import List, Dict, Any, Optional
+
+
+class AsyncAppwriteDatabase:
+    """Async access to Appwrite database documents over a pooled keep-alive HTTP session
+
+    Talks to the Appwrite REST API directly so queries never block the event
+    loop. The underlying `httpx.AsyncClient` is created lazily inside the
+    running loop and reused for every call; `timeout` is a hard deadline per
+    call, covering connect, send and read.
+    """
+
+    def __init__(self, endpoint, project_id, api_key, database_id,
+                 timeout=5.0, max_connections=20, max_keepalive_connections=10, transport=None):
+        self.endpoint = (endpoint or "").rstrip("/")
+        self.project_id = project_id
+        self.api_key = api_key
+        self.database_id = database_id
+        self.timeout = timeout
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+        )
+        # Optional httpx transport, e.g. an ASGITransport serving the stub in-process
+        self.transport = transport
+        self._client = None
+
+    def _get_client(self):
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=self.endpoint,
+                headers={
+                    "X-Appwrite-Project": self.project_id or "",
+                    "X-Appwrite-Key": self.api_key or "",
+                    "Content-Type": "application/json",
+                },
+                limits=self.limits,
+                timeout=self.timeout,
+                transport=self.transport,
+            )
+        return self._client
+
+    async def list_documents(self, collection_id: str, queries: List[str],
+                             timeout: Optional[float] = None) -> Dict[str, Any]:
+        """List documents of a collection matching Appwrite query strings"""
+        timeout = self.timeout if timeout is None else timeout
+        response = await asyncio.wait_for(
+            self._get_client().get(
+                f"/databases/{self.database_id}/collections/{collection_id}/documents",
+                params=[("queries[]", query) for query in queries],
+                timeout=timeout,
+            ),
+            timeout=timeout,
+        )
+        response.raise_for_status()
+        return response.json()
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
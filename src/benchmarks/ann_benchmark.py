@@ -0,0 +1,63 @@
+import os
+import sys
+import time
+import argparse
+import numpy as np
+
+# Add project root to path so `src` resolves when run as a script
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from src.ann_index import ExactIndex, IVFIndex
+
+
+def make_embeddings(n_rows, dim, n_clusters=200, seed=0):
+    """Clustered, L2-normalized synthetic embeddings resembling catalog groups"""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(n_clusters, dim)).astype(np.float32)
+    labels = rng.integers(0, n_clusters, n_rows)
+    vectors = centers[labels] + 0.3 * rng.normal(size=(n_rows, dim)).astype(np.float32)
+    vectors = np.maximum(vectors, 0)  # the encoder ends in a ReLU
+    vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+    return vectors.astype(np.float32)
+
+
+def time_queries(index, queries, k, **kwargs):
+    results = []
+    start = time.perf_counter()
+    for query in queries:
+        results.append(index.search(query, k, **kwargs)[0])
+    elapsed = time.perf_counter() - start
+    return results, elapsed / len(queries) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recall vs latency of IVF against exact scan")
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--dim", type=int, default=64)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    embeddings = make_embeddings(args.rows, args.dim)
+    queries = make_embeddings(args.queries, args.dim, seed=1)
+
+    exact = ExactIndex().build(embeddings)
+    truth, exact_ms = time_queries(exact, queries, args.k)
+    print(f"{args.rows} rows, dim {args.dim}, top-{args.k}")
+    print(f"exact scan: {exact_ms:.3f} ms/query, recall 1.000")
+
+    start = time.perf_counter()
+    ivf = IVFIndex().build(embeddings)
+    print(f"IVF build: {time.perf_counter() - start:.2f} s ({ivf.n_lists} lists)")
+
+    for n_probe in (1, 2, 5, 10, 20, 50):
+        found, ivf_ms = time_queries(ivf, queries, args.k, n_probe=n_probe)
+        recall = np.mean([
+            len(np.intersect1d(f, t)) / len(t) for f, t in zip(found, truth)
+        ])
+        print(f"IVF n_probe={n_probe:>3}: {ivf_ms:.3f} ms/query, recall {recall:.3f}, "
+              f"speedup {exact_ms / ivf_ms:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
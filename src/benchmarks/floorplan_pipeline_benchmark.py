@@ -0,0 +1,77 @@
+import io
+import os
+import sys
+import time
+import argparse
+import numpy as np
+from PIL import Image
+
+# Add project root to path so `src` resolves when run as a script
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from src.floorplan_classifier import FloorplanClassifier, measure_floorplan
+from src.benchmarks.preprocess_benchmark import load_images
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def run_stages(classifier, images):
+    """Per-stage seconds of the single-decode pipeline: decode, model input, outline measurement"""
+    totals = {"decode": 0.0, "preprocess": 0.0, "measure": 0.0}
+    inputs = np.empty((len(images), classifier.img_size[0], classifier.img_size[1], 3), dtype=np.float32)
+    for image_data, out in zip(images, inputs):
+        (img, original_size), seconds = timed(classifier._open_image, image_data)
+        _, load_seconds = timed(img.load)
+        totals["decode"] += seconds + load_seconds
+        totals["preprocess"] += timed(classifier.preprocess_image, img, out=out)[1]
+        totals["measure"] += timed(measure_floorplan, img, original_size)[1]
+    return inputs, totals
+
+
+def run_two_decodes(classifier, images):
+    """The previous layout: the model input and the area each decode the upload separately"""
+    start = time.perf_counter()
+    for image_data in images:
+        classifier.decode_image(image_data)
+        measure_floorplan(Image.open(io.BytesIO(image_data)))
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Single-decode floorplan pipeline: shape prediction plus outline measurement")
+    parser.add_argument("--images", type=int, default=10)
+    parser.add_argument("--width", type=int, default=6000)
+    parser.add_argument("--height", type=int, default=4500)
+    parser.add_argument("--image-dir", help="Use real floorplans from this directory instead of synthetic ones")
+    parser.add_argument("--fast", action="store_true", help="Use reduced-resolution decoding")
+    parser.add_argument("--with-model", action="store_true", help="Also time the model on the decoded batch")
+    args = parser.parse_args()
+
+    images = load_images(args.image_dir, args.images, (args.width, args.height))
+    classifier = FloorplanClassifier(fast_preprocess=args.fast)
+
+    inputs, totals = run_stages(classifier, images)
+    single_seconds = sum(totals.values())
+    two_decode_seconds = run_two_decodes(classifier, images)
+
+    print(f"{len(images)} images, {'fast' if args.fast else 'standard'} decoding")
+    for stage, seconds in totals.items():
+        print(f"  {stage:10s} {seconds / len(images) * 1000:8.1f} ms/image")
+    print(f"single decode: {len(images) / single_seconds:.1f} images/s")
+    print(f"two decodes:   {len(images) / two_decode_seconds:.1f} images/s "
+          f"({two_decode_seconds / single_seconds:.1f}x slower)")
+
+    if args.with_model:
+        if classifier.load_model() is None:
+            return
+        classifier.warm_up()
+        _, seconds = timed(classifier.predict_probabilities, inputs)
+        print(f"  model      {seconds / len(images) * 1000:8.1f} ms/image (batch of {len(images)})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+import os
+import sys
+import time
+import argparse
+import numpy as np
+import pandas as pd
+
+# Add project root to path so `src` resolves when run as a script
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from src.catalog_index import CatalogIndex
+
+CATEGORIES = ['Living Room', 'Bedroom', 'Kitchen', 'Bathroom', 'Dining Room', 'Flooring']
+STYLES = ['Minimalist', 'Modern', 'Traditional', 'Industrial', 'Scandinavian', 'Bohemian']
+
+
+def make_catalog(n_rows, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'PRODUCT_NAME': [f"Product {i % (n_rows // 2 or 1)}" for i in range(n_rows)],
+        'CATEGORY': rng.choice(CATEGORIES, n_rows),
+        'STYLE': rng.choice(STYLES, n_rows),
+        'IMAGE_URL': '',
+    })
+
+
+def mask_lookup(df, category, style, flooring):
+    """The original per-request DataFrame filtering"""
+    flooring_items = df[df['PRODUCT_NAME'] == flooring]
+    filtered_df = df.copy()
+    filtered_df = filtered_df[
+        (filtered_df['CATEGORY'] != 'Flooring') |
+        (filtered_df['PRODUCT_NAME'] == flooring)
+    ]
+    category_style_df = filtered_df[
+        (filtered_df['CATEGORY'] == category) &
+        (filtered_df['STYLE'] == style)
+    ]
+    category_df = filtered_df[filtered_df['CATEGORY'] == category]
+    return flooring_items, category_style_df, category_df
+
+
+def index_lookup(df, lookup, category, style, flooring):
+    return (
+        df.iloc[lookup.product_rows(flooring)],
+        df.iloc[lookup.category_style_rows(category, style, flooring)],
+        df.iloc[lookup.category_rows(category, flooring)],
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="DataFrame masks vs CatalogIndex lookups")
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    for n_rows in (1000, 10000, 100000):
+        df = make_catalog(n_rows)
+        start = time.perf_counter()
+        lookup = CatalogIndex(df)
+        build_ms = (time.perf_counter() - start) * 1000
+
+        rng = np.random.default_rng(1)
+        flooring_names = list(df.loc[df['CATEGORY'] == 'Flooring', 'PRODUCT_NAME'].unique()[:20])
+        queries = [
+            (rng.choice(CATEGORIES), rng.choice(STYLES), rng.choice(flooring_names))
+            for _ in range(args.requests)
+        ]
+
+        # Outputs must match the mask-based logic exactly
+        for query in queries[:20]:
+            for expected, actual in zip(mask_lookup(df, *query), index_lookup(df, lookup, *query)):
+                pd.testing.assert_frame_equal(expected, actual)
+
+        start = time.perf_counter()
+        for query in queries:
+            mask_lookup(df, *query)
+        mask_ms = (time.perf_counter() - start) / len(queries) * 1000
+
+        start = time.perf_counter()
+        for query in queries:
+            index_lookup(df, lookup, *query)
+        index_ms = (time.perf_counter() - start) / len(queries) * 1000
+
+        print(f"{n_rows:>7} rows: masks {mask_ms:.3f} ms/request, index {index_ms:.3f} ms/request "
+              f"({mask_ms / index_ms:.1f}x), index build {build_ms:.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
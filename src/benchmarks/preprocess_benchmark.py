@@ -0,0 +1,83 @@
+import os
+import io
+import sys
+import time
+import argparse
+import numpy as np
+from PIL import Image, ImageDraw
+
+# Add project root to path so `src` resolves when run as a script
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from src.floorplan_classifier import FloorplanClassifier
+
+
+def make_floorplan(width, height, seed, image_format):
+    """Synthetic scanned floorplan: paper-coloured background with wall outlines"""
+    rng = np.random.default_rng(seed)
+    image = Image.new("RGB", (width, height), (245, 243, 236))
+    draw = ImageDraw.Draw(image)
+    wall = max(4, width // 300)
+    for _ in range(rng.integers(3, 8)):
+        x0, y0 = rng.integers(0, width // 2), rng.integers(0, height // 2)
+        x1, y1 = rng.integers(x0 + width // 8, width), rng.integers(y0 + height // 8, height)
+        draw.rectangle([x0, y0, x1, y1], outline=(30, 30, 30), width=wall)
+    buffer = io.BytesIO()
+    image.save(buffer, image_format, **({"quality": 90} if image_format == "JPEG" else {}))
+    return buffer.getvalue()
+
+
+def load_images(image_dir, count, size):
+    if image_dir:
+        paths = sorted(os.listdir(image_dir))[:count]
+        images = []
+        for name in paths:
+            with open(os.path.join(image_dir, name), "rb") as f:
+                images.append(f.read())
+        return images
+    width, height = size
+    return [make_floorplan(width, height, i, "JPEG" if i % 2 == 0 else "PNG") for i in range(count)]
+
+
+def run(classifier, images):
+    inputs = np.empty((len(images), classifier.img_size[0], classifier.img_size[1], 3), dtype=np.float32)
+    start = time.perf_counter()
+    for image_data, out in zip(images, inputs):
+        classifier.preprocess_image(classifier.open_image(image_data), out=out)
+    return inputs, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Standard vs fast floorplan preprocessing")
+    parser.add_argument("--images", type=int, default=20)
+    parser.add_argument("--width", type=int, default=4000)
+    parser.add_argument("--height", type=int, default=3000)
+    parser.add_argument("--image-dir", help="Use real floorplans from this directory instead of synthetic ones")
+    parser.add_argument("--with-model", action="store_true", help="Also compare predictions of the Keras model")
+    args = parser.parse_args()
+
+    images = load_images(args.image_dir, args.images, (args.width, args.height))
+    standard = FloorplanClassifier()
+    fast = FloorplanClassifier(fast_preprocess=True)
+
+    standard_inputs, standard_time = run(standard, images)
+    fast_inputs, fast_time = run(fast, images)
+
+    print(f"{len(images)} images")
+    print(f"standard: {len(images) / standard_time:.1f} images/s")
+    print(f"fast:     {len(images) / fast_time:.1f} images/s ({standard_time / fast_time:.1f}x)")
+    print(f"mean abs input difference: {np.abs(standard_inputs - fast_inputs).mean():.4f} "
+          f"(inputs range [-1, 1])")
+
+    if args.with_model:
+        if standard.load_model() is None:
+            return
+        standard_probs = standard.predict_probabilities(standard_inputs)
+        fast_probs = standard.predict_probabilities(fast_inputs)
+        agreement = np.mean(standard_probs.argmax(axis=1) == fast_probs.argmax(axis=1))
+        print(f"top-1 agreement with standard path: {agreement:.3f}")
+        print(f"max confidence difference: {np.abs(standard_probs - fast_probs).max():.4f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+import os
+import sys
+import json
+import argparse
+import subprocess
+
+# Add project root to path so `src` resolves when run as a script
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(PROJECT_ROOT)
+
+HEAVY_MODULES = ["tensorflow", "sklearn", "appwrite.client", "src.products_recommender", "src.floorplan_classifier"]
+
+# Runs in a fresh interpreter so every import is cold
+IMPORT_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+try:
+    __import__(sys.argv[1])
+    error = None
+except Exception as e:
+    error = str(e)
+print(json.dumps({"seconds": time.perf_counter() - start, "error": error}))
+"""
+
+STARTUP_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import src.main as main
+from fastapi.testclient import TestClient
+from src.benchmarks.preprocess_benchmark import make_floorplan
+
+timings = {"import_app": time.perf_counter() - start}
+image = make_floorplan(1600, 1200, 0, "JPEG")
+timeout = float(sys.argv[1])
+
+with TestClient(main.app) as client:
+    # Cheap endpoints must answer while the models are still loading
+    response = client.get("/api/categories")
+    timings["first_metadata_response"] = time.perf_counter() - start
+    timings["first_metadata_status"] = response.status_code
+
+    while time.perf_counter() - start < timeout:
+        response = client.get("/readyz")
+        if response.json()["status"] != "starting":
+            break
+        time.sleep(0.05)
+    timings["ready"] = time.perf_counter() - start
+    timings["readiness"] = response.json()
+
+    response = client.post("/api/classify-floorplan", files={"file": ("plan.jpg", image, "image/jpeg")})
+    timings["first_prediction"] = time.perf_counter() - start
+    timings["first_prediction_status"] = response.status_code
+
+print(json.dumps(timings))
+"""
+
+
+def run_script(script, *args):
+    result = subprocess.run(
+        [sys.executable, "-c", script, *args],
+        cwd=PROJECT_ROOT, capture_output=True, text=True,
+    )
+    lines = result.stdout.strip().splitlines()
+    if result.returncode != 0 or not lines:
+        raise RuntimeError(result.stderr.strip() or "benchmark subprocess produced no output")
+    return json.loads(lines[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold import time and time to readiness / first prediction")
+    parser.add_argument("--timeout", type=float, default=300.0, help="Seconds to wait for /readyz")
+    args = parser.parse_args()
+
+    print("Cold import times:")
+    for module in HEAVY_MODULES:
+        result = run_script(IMPORT_SCRIPT, module)
+        suffix = f"  (failed: {result['error']})" if result["error"] else ""
+        print(f"  {module:28s} {result['seconds'] * 1000:8.1f} ms{suffix}")
+
+    timings = run_script(STARTUP_SCRIPT, str(args.timeout))
+    print("\nServer startup:")
+    print(f"  import src.main              {timings['import_app'] * 1000:8.1f} ms")
+    print(f"  first /api/categories        {timings['first_metadata_response'] * 1000:8.1f} ms"
+          f"  (HTTP {timings['first_metadata_status']})")
+    print(f"  models settled (/readyz)     {timings['ready'] * 1000:8.1f} ms"
+          f"  ({timings['readiness']['status']})")
+    print(f"  first floorplan prediction   {timings['first_prediction'] * 1000:8.1f} ms"
+          f"  (HTTP {timings['first_prediction_status']})")
+    for name, status in timings["readiness"]["models"].items():
+        print(f"    {name}: {status['state']}, load {status['load_seconds']}, warm-up {status['warm_up_seconds']}")
+
+
+if __name__ == "__main__":
+    main()
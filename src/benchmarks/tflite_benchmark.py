@@ -0,0 +1,97 @@
+import os
+import sys
+import time
+import argparse
+import multiprocessing
+import numpy as np
+
+# Add project root to path so `src` resolves when run as a script
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from src.floorplan_classifier import FloorplanClassifier
+from src.benchmarks.preprocess_benchmark import load_images
+
+
+def rss_mb():
+    """Resident set size of this process in MB (Linux)"""
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+
+
+def load(backend, tflite_path):
+    classifier = FloorplanClassifier(backend=backend, tflite_path=tflite_path)
+    if classifier.load_model() is None:
+        raise SystemExit(f"Could not load the {backend} model")
+    return classifier
+
+
+def load_rss_mb(backend, tflite_path):
+    """(MB added by importing TensorFlow, MB added by loading the model), measured in this process"""
+    before = rss_mb()
+    import tensorflow  # noqa: F401  (both backends import it; counted separately from the model)
+    imported = rss_mb()
+    load(backend, tflite_path)
+    return imported - before, rss_mb() - imported
+
+
+def fresh_process_rss_mb(backend, tflite_path):
+    """load_rss_mb in a new process, so the other backend and the conversion do not skew it"""
+    with multiprocessing.get_context("spawn").Pool(1) as pool:
+        return pool.apply(load_rss_mb, (backend, tflite_path))
+
+
+def single_image_latency_ms(classifier, inputs, repeats):
+    classifier.predict_probabilities(inputs[:1])  # warm-up
+    start = time.perf_counter()
+    for i in range(repeats):
+        classifier.predict_probabilities(inputs[i % len(inputs)][np.newaxis])
+    return (time.perf_counter() - start) / repeats * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert the floorplan model to TFLite and compare it with Keras")
+    parser.add_argument("--quantization", choices=["dynamic", "int8"], default="dynamic")
+    parser.add_argument("--output", default="src/models/keras_model.tflite")
+    parser.add_argument("--image-dir", help="Sample floorplans for calibration and parity (synthetic if omitted)")
+    parser.add_argument("--images", type=int, default=50)
+    parser.add_argument("--calibration-images", type=int,
+                        help="Images used for int8 calibration (default: half); the rest are held out for parity")
+    parser.add_argument("--repeats", type=int, default=100)
+    parser.add_argument("--skip-convert", action="store_true", help="Reuse an existing .tflite file")
+    args = parser.parse_args()
+
+    images = load_images(args.image_dir, args.images, (1600, 1200))
+    n_calibration = args.images // 2 if args.calibration_images is None else args.calibration_images
+    calibration_images, parity_images = images[:n_calibration], images[n_calibration:]
+    if not parity_images:
+        raise SystemExit("No images left for the parity check; lower --calibration-images")
+
+    if not args.skip_convert:
+        FloorplanClassifier().convert_to_tflite(args.output, args.quantization, sample_images=calibration_images)
+
+    rss = {backend: fresh_process_rss_mb(backend, args.output) for backend in ("keras", "tflite")}
+
+    keras_classifier = load("keras", args.output)
+    tflite_classifier = load("tflite", args.output)
+
+    # Parity on images the int8 calibration never saw
+    inputs = np.stack([keras_classifier.decode_image(image_data) for image_data in parity_images])
+    keras_probs = keras_classifier.predict_probabilities(inputs)
+    tflite_probs = tflite_classifier.predict_probabilities(inputs)
+
+    agreement = np.mean(keras_probs.argmax(axis=1) == tflite_probs.argmax(axis=1))
+    print(f"parity on {len(parity_images)} held-out images ({len(calibration_images)} for calibration): "
+          f"top-1 agreement {agreement:.3f}, max |p_keras - p_tflite| {np.abs(keras_probs - tflite_probs).max():.4f}")
+
+    for name, classifier, size in (
+        ("keras", keras_classifier, os.path.getsize(keras_classifier.model_path)),
+        ("tflite", tflite_classifier, os.path.getsize(args.output)),
+    ):
+        latency = single_image_latency_ms(classifier, inputs, args.repeats)
+        import_rss, load_rss = rss[name]
+        print(f"{name:>6}: {latency:.2f} ms/image, model file {size / 2**20:.1f} MB, "
+              f"RSS (fresh process) TensorFlow import +{import_rss:.0f} MB, model load +{load_rss:.0f} MB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,243 @@
+import time
+import hashlib
+import numpy as np
+import pandas as pd
+
+from src.http_cache import CachedJSON
+
+FLOORING_CATEGORY = 'Flooring'
+
+_NO_ROWS = np.empty(0, dtype=np.intp)
+
+
+def normalize_name(name):
+    """Case- and surrounding-whitespace-insensitive form of a category, style or product name"""
+    return name.strip().casefold()
+
+
+def _canonical_names(facets):
+    """Normalized name -> catalog spelling"""
+    return {normalize_name(facet['name']): facet['name'] for facet in facets if isinstance(facet['name'], str)}
+
+
+def _group_rows(df, keys):
+    """Map each group key to the ascending row positions of its members"""
+    return {
+        key: np.asarray(rows, dtype=np.intp)
+        for key, rows in df.groupby(keys, sort=False).indices.items()
+    }
+
+
+class CatalogIndex:
+    """Inverted index from category, (category, style) and product name to row positions
+
+    Built once per catalog DataFrame so recommendation lookups are dictionary
+    hits plus an `iloc` take instead of boolean masks over the whole catalog.
+    Positions are kept in catalog order, so takes return rows exactly as the
+    equivalent mask would.
+    """
+
+    def __init__(self, df):
+        self.df = df
+        # Content fingerprint: equal catalogs get equal versions, in any process
+        self.version = hashlib.sha1(
+            pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes()
+        ).hexdigest()[:16]
+        self.category_index = _group_rows(df, 'CATEGORY')
+        self.category_style_index = _group_rows(df, ['CATEGORY', 'STYLE'])
+        self.name_index = _group_rows(df, 'PRODUCT_NAME')
+
+        # Per-row code into the closed set of catalog styles (-1 for missing)
+        style_codes, styles = pd.factorize(df['STYLE'])
+        self.style_codes = np.asarray(style_codes, dtype=np.intp)
+        self.styles = list(styles)
+
+        self._update_flooring_options()
+        self._facets = None
+
+    def _update_flooring_options(self):
+        flooring_rows = self.category_index.get(FLOORING_CATEGORY, _NO_ROWS)
+        self.flooring_options = sorted(self.df['PRODUCT_NAME'].iloc[flooring_rows].unique())
+
+    def apply_changes(self, df, added_rows, removed_rows):
+        """Update the index in place for rows appended to the catalog and rows retired from it
+
+        `df` is the catalog after the append; removed rows stay in it (as
+        tombstones) but are dropped from every lookup and facet. Group updates
+        are proportional to the changed rows and the groups they touch; the
+        per-row style codes are copied once (O(catalog)). `df` is published
+        first, so a concurrent lookup never sees a position past the end of it.
+        """
+        added_rows = np.asarray(added_rows, dtype=np.intp)
+        removed_rows = np.asarray(removed_rows, dtype=np.intp)
+        self.df = df
+        added = df.iloc[added_rows]
+        removed = df.iloc[removed_rows]
+
+        # Style codes first, so no lookup can return a row without one. New
+        # styles get new codes (a new list lets style scorers notice the
+        # change); retired rows get -1 so they drop out of the style facets.
+        style_positions = {style: code for code, style in enumerate(self.styles)}
+        new_styles = [style for style in pd.unique(added['STYLE'].dropna()) if style not in style_positions]
+        if new_styles:
+            self.styles = self.styles + new_styles
+            style_positions.update({style: len(style_positions) + i for i, style in enumerate(new_styles)})
+        added_codes = np.asarray([style_positions.get(style, -1) for style in added['STYLE']], dtype=np.intp)
+        style_codes = np.concatenate([self.style_codes, added_codes])
+        style_codes[removed_rows] = -1
+        self.style_codes = style_codes
+
+        for groups, keys in ((self.category_index, 'CATEGORY'),
+                             (self.category_style_index, ['CATEGORY', 'STYLE']),
+                             (self.name_index, 'PRODUCT_NAME')):
+            for key, rows in _group_rows(added, keys).items():
+                # Appended positions are larger than every existing one: order is kept
+                groups[key] = np.concatenate([groups.get(key, _NO_ROWS), added_rows[rows]])
+            for key, rows in _group_rows(removed, keys).items():
+                remaining = np.setdiff1d(groups.get(key, _NO_ROWS), removed_rows[rows], assume_unique=True)
+                if remaining.size:
+                    groups[key] = remaining
+                else:
+                    groups.pop(key, None)
+
+        self._update_flooring_options()
+        self._facets = None
+        self.version = hashlib.sha1(
+            self.version.encode()
+            + pd.util.hash_pandas_object(added, index=False).to_numpy().tobytes()
+            + removed_rows.tobytes()
+        ).hexdigest()[:16]
+
+    @property
+    def facets(self):
+        """Facets of this catalog version, built on first use"""
+        if self._facets is None:
+            self._facets = CatalogFacets(self)
+        return self._facets
+
+    def canonical_request(self, category, style, flooring=None):
+        """Catalog spelling of a requested category, style and flooring
+        
+        Names are matched with `normalize_name`, so "living room " and
+        "Living Room" are one request; names the catalog does not know are
+        only stripped.
+        """
+        facets = self.facets
+        
+        def canonical(name, names):
+            return names.get(normalize_name(name), name.strip()) if isinstance(name, str) else name
+        
+        return (canonical(category, facets.category_names), canonical(style, facets.style_names),
+                canonical(flooring, facets.flooring_names) or None)
+    
+    def _exclude_other_flooring(self, rows, category, flooring):
+        """Drop flooring rows other than the requested one, as the recommender filter does"""
+        if flooring and category == FLOORING_CATEGORY:
+            return np.intersect1d(rows, self.product_rows(flooring), assume_unique=True)
+        return rows
+
+    def product_rows(self, name):
+        return self.name_index.get(name, _NO_ROWS)
+
+    def category_rows(self, category, flooring=None):
+        rows = self.category_index.get(category, _NO_ROWS)
+        return self._exclude_other_flooring(rows, category, flooring)
+
+    def category_style_rows(self, category, style, flooring=None):
+        rows = self.category_style_index.get((category, style), _NO_ROWS)
+        return self._exclude_other_flooring(rows, category, flooring)
+
+
+class CatalogFacets:
+    """Categories, styles and flooring with product counts, plus valid category/style pairs
+
+    Computed once per catalog version from the CatalogIndex groups, and kept
+    as pre-serialized CachedJSON responses for the metadata endpoints.
+    """
+
+    def __init__(self, catalog_index, built_at=None):
+        self.built_at = built_at if built_at is not None else time.time()
+
+        self.categories = [
+            {'name': category, 'count': len(rows)}
+            for category, rows in sorted(catalog_index.category_index.items(), key=lambda item: str(item[0]))
+        ]
+        style_counts = np.bincount(
+            catalog_index.style_codes[catalog_index.style_codes >= 0], minlength=len(catalog_index.styles)
+        )
+        # Styles whose every product was retired are no longer listed
+        self.styles = sorted(
+            ({'name': style, 'count': int(count)}
+             for style, count in zip(catalog_index.styles, style_counts) if count > 0),
+            key=lambda facet: str(facet['name'])
+        )
+        self.flooring = [
+            {'name': name, 'count': len(catalog_index.category_rows(FLOORING_CATEGORY, name))}
+            for name in catalog_index.flooring_options
+        ]
+        self.combinations = [
+            {'category': category, 'style': style, 'count': len(rows)}
+            for (category, style), rows in sorted(
+                catalog_index.category_style_index.items(), key=lambda item: (str(item[0][0]), str(item[0][1]))
+            )
+        ]
+        self.category_names = _canonical_names(self.categories)
+        self.style_names = _canonical_names(self.styles)
+        self.flooring_names = _canonical_names(self.flooring)
+
+        # Responses of the individual endpoints keep their original shape
+        self.categories_response = CachedJSON(
+            {'categories': [facet['name'] for facet in self.categories]}, self.built_at
+        )
+        self.styles_response = CachedJSON(
+            {'styles': [facet['name'] for facet in self.styles]}, self.built_at
+        )
+        self.flooring_response = CachedJSON(
+            {'flooring': [facet['name'] for facet in self.flooring]}, self.built_at
+        )
+        self.facets_response = CachedJSON({
+            'categories': self.categories,
+            'styles': self.styles,
+            'flooring': self.flooring,
+            'combinations': self.combinations,
+        }, self.built_at)
+
+
+class StyleSimilarity:
+    """Cosine similarity of a query style against every known catalog style
+
+    The TF-IDF rows of the (small, closed) set of styles are computed once, so
+    scoring a category is one sparse matrix product plus a gather by each
+    row's style code. Query strings are transformed once and cached.
+    """
+
+    def __init__(self, vectorizer, styles, max_cached_queries=1024):
+        self.vectorizer = vectorizer
+        self.styles = styles
+        self.style_matrix = vectorizer.transform(styles).tocsr()
+        self.style_norms = np.sqrt(
+            np.asarray(self.style_matrix.multiply(self.style_matrix).sum(axis=1)).ravel()
+        )
+        self.max_cached_queries = max_cached_queries
+        self._query_cache = {}
+
+    def _query_vector(self, query_style):
+        cached = self._query_cache.get(query_style)
+        if cached is None:
+            vector = self.vectorizer.transform([query_style]).tocsr()
+            cached = (vector, np.sqrt(vector.multiply(vector).sum()))
+            if len(self._query_cache) >= self.max_cached_queries:
+                self._query_cache.clear()
+            self._query_cache[query_style] = cached
+        return cached
+
+    def style_scores(self, query_style):
+        """Similarity per known style, with a trailing 0 for missing styles (code -1)"""
+        vector, norm = self._query_vector(query_style)
+        dots = np.asarray((self.style_matrix @ vector.T).todense()).ravel()
+        scores = dots / (norm * self.style_norms + 1e-8)
+        return np.append(scores, 0.0)
+
+    def similarities(self, query_style, style_codes):
+        """Similarity of each row, given the rows' style codes"""
+        return self.style_scores(query_style)[style_codes]
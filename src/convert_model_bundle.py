@@ -0,0 +1,37 @@
+import os
+import sys
+import time
+import argparse
+
+# Add project root to path so `src` resolves when run as a script
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.products_recommender import FurnitureRecommender, convert_legacy_model
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Convert the h5 + joblib recommender artifacts into a memory-mappable model bundle"
+    )
+    parser.add_argument("--model", default="src/models/furniture_recommender.h5",
+                        help="Legacy h5 model whose attrs point at the joblib files")
+    parser.add_argument("--output", default=None,
+                        help="Bundle directory (default: recommender_bundle next to the model)")
+    args = parser.parse_args()
+
+    bundle_path = convert_legacy_model(args.model, args.output)
+
+    # Compare load times of both formats
+    start = time.perf_counter()
+    FurnitureRecommender.load_model(args.model)
+    legacy_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    FurnitureRecommender.load_bundle(bundle_path)
+    bundle_seconds = time.perf_counter() - start
+
+    print(f"Legacy load: {legacy_seconds * 1000:.1f} ms, bundle load: {bundle_seconds * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+import time
+import asyncio
+import threading
+from concurrent.futures import Future, CancelledError, ThreadPoolExecutor, ProcessPoolExecutor
+
+
+class PoolOverloaded(Exception):
+    """Raised when a pool already has its maximum of running plus queued tasks"""
+
+
+def _timed_call(fn, args, kwargs):
+    """Run fn in the worker and report when it started and finished (wall clock, works across processes)"""
+    started = time.time()
+    result = fn(*args, **kwargs)
+    return result, started, time.time()
+
+
+class BoundedExecutor:
+    """Thread or process pool with a hard cap on queued work and utilization stats
+
+    At most `max_workers + max_pending` tasks may be submitted and unfinished
+    at once; beyond that `submit` raises PoolOverloaded immediately instead of
+    letting the queue (and latency) grow without bound. With kind="process",
+    `fn` and its arguments must be picklable, and `initializer` can load
+    per-process state such as models.
+    """
+
+    def __init__(self, name, max_workers, max_pending, kind="thread", initializer=None, initargs=()):
+        self.name = name
+        self.kind = kind
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        if kind == "thread":
+            self._executor = ThreadPoolExecutor(
+                max_workers=max_workers, thread_name_prefix=f"{name}-pool",
+                initializer=initializer, initargs=initargs,
+            )
+        elif kind == "process":
+            self._executor = ProcessPoolExecutor(
+                max_workers=max_workers, initializer=initializer, initargs=initargs,
+            )
+        else:
+            raise ValueError(f"Unknown pool kind: {kind}")
+
+        self._lock = threading.Lock()
+        self._created = time.time()
+        self.in_flight = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.total_queue_wait = 0.0
+        self.total_run_time = 0.0
+
+    def _finish(self, inner, outer, submitted):
+        with self._lock:
+            self.in_flight -= 1
+            if inner.cancelled() or inner.exception() is not None:
+                self.failed += 1
+            else:
+                _, started, finished = inner.result()
+                self.completed += 1
+                self.total_queue_wait += max(0.0, started - submitted)
+                self.total_run_time += finished - started
+
+        if inner.cancelled():
+            outer.set_exception(CancelledError())
+        elif inner.exception() is not None:
+            outer.set_exception(inner.exception())
+        else:
+            outer.set_result(inner.result()[0])
+
+    def submit(self, fn, *args, **kwargs):
+        """Schedule fn(*args, **kwargs); returns a concurrent Future of its result"""
+        with self._lock:
+            if self.in_flight >= self.max_workers + self.max_pending:
+                self.rejected += 1
+                raise PoolOverloaded(
+                    f"{self.name} pool is full ({self.max_workers} running, {self.max_pending} queued)"
+                )
+            self.in_flight += 1
+
+        submitted = time.time()
+        try:
+            inner = self._executor.submit(_timed_call, fn, args, kwargs)
+        except Exception:
+            with self._lock:
+                self.in_flight -= 1
+            raise
+
+        # Mark the result future running so a cancelled awaiter cannot cancel it
+        # underneath the pool's bookkeeping; the task itself still completes
+        outer = Future()
+        outer.set_running_or_notify_cancel()
+        inner.add_done_callback(lambda f: self._finish(f, outer, submitted))
+        return outer
+
+    async def run(self, fn, *args, **kwargs):
+        """Run fn in the pool and await its result from the event loop"""
+        return await asyncio.wrap_future(self.submit(fn, *args, **kwargs))
+
+    def stats(self):
+        with self._lock:
+            elapsed = max(time.time() - self._created, 1e-9)
+            return {
+                "kind": self.kind,
+                "max_workers": self.max_workers,
+                "max_pending": self.max_pending,
+                "running": min(self.in_flight, self.max_workers),
+                "queued": max(0, self.in_flight - self.max_workers),
+                "completed": self.completed,
+                "failed": self.failed,
+                "rejected": self.rejected,
+                "utilization": self.total_run_time / (self.max_workers * elapsed),
+                "mean_queue_wait_ms": self.total_queue_wait / self.completed * 1000 if self.completed else 0.0,
+                "mean_run_ms": self.total_run_time / self.completed * 1000 if self.completed else 0.0,
+            }
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
@@ -1,15 +1,119 @@
 import os
 import numpy as np
-import tensorflow as tf
-from tensorflow.keras.models import load_model
 from PIL import Image, ImageOps
 import io
 import cv2
 import glob
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Upload limits that protect memory from huge or decompression-bomb images
+MAX_UPLOAD_BYTES = 20 * 1024 * 1024
+MAX_IMAGE_PIXELS = 40_000_000
+
+TFLITE_MODEL_PATH = "src/models/keras_model.tflite"
+
+# Outline measurement runs on a copy reduced to about this many pixels on the long side
+MEASURE_MAX_SIDE = 1024
+
+def measure_floorplan(image, original_size=None, pixels_per_meter=None, max_side=MEASURE_MAX_SIDE):
+    """Measure the outer outline of a floorplan with OpenCV contours
+    
+    `image` is the decoded PIL image; `original_size` is the upload's full
+    (width, height) when it was decoded at reduced resolution. The walls are
+    separated from the paper with Otsu's threshold, closed so door gaps do not
+    split the outline, and the largest external contour is measured.
+    Returns the bounding box and contour area in original pixels, or in metres
+    and square metres when `pixels_per_meter` is known, plus how much of the
+    bounding box the outline fills (low for irregular plans). None if no
+    outline is found.
+    """
+    original_width, original_height = original_size or image.size
+    # Grayscale first: reduce() rejects palette, 1-bit and 16/32-bit integer modes
+    gray = image.convert("L")
+    factor = max(1, max(gray.size) // max_side)
+    gray = np.asarray(gray.reduce(factor) if factor > 1 else gray)
+    
+    _, mask = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+    kernel_size = max(3, max(mask.shape) // 100) | 1
+    mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, cv2.getStructuringElement(cv2.MORPH_RECT, (kernel_size, kernel_size)))
+    contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    if not contours:
+        return None
+    outline = max(contours, key=cv2.contourArea)
+    x, y, width, height = cv2.boundingRect(outline)
+    area = cv2.contourArea(outline)
+    
+    # Back to the pixel grid of the original upload
+    scale_x, scale_y = original_width / mask.shape[1], original_height / mask.shape[0]
+    bounding_box = [round(x * scale_x), round(y * scale_y), round(width * scale_x), round(height * scale_y)]
+    measurement = {
+        "bounding_box": bounding_box,
+        "fill_ratio": round(area / max(width * height, 1), 3),
+    }
+    if pixels_per_meter:
+        measurement.update({
+            "width": round(bounding_box[2] / pixels_per_meter, 2),
+            "height": round(bounding_box[3] / pixels_per_meter, 2),
+            "area": round(area * scale_x * scale_y / pixels_per_meter ** 2, 2),
+            "unit": "m",
+        })
+    else:
+        measurement.update({
+            "width": bounding_box[2],
+            "height": bounding_box[3],
+            "area": round(area * scale_x * scale_y),
+            "unit": "px",
+        })
+    return measurement
+
+class TFLitePredictor:
+    """Runs a converted .tflite model behind the same `predict` call as a Keras model
+
+    The interpreter is not thread-safe, so invocations are serialized; the
+    input tensor is resized only when the batch size changes.
+    """
+    def __init__(self, model_path, num_threads=None):
+        import tensorflow as tf
+        
+        self.interpreter = tf.lite.Interpreter(model_path=model_path, num_threads=num_threads)
+        self.interpreter.allocate_tensors()
+        self.input_index = self.interpreter.get_input_details()[0]["index"]
+        self.output_index = self.interpreter.get_output_details()[0]["index"]
+        self._batch_size = self.interpreter.get_input_details()[0]["shape"][0]
+        self._lock = threading.Lock()
+    
+    def predict(self, batch, batch_size=None, verbose=0):
+        batch = np.ascontiguousarray(batch, dtype=np.float32)
+        with self._lock:
+            if batch.shape[0] != self._batch_size:
+                self.interpreter.resize_tensor_input(self.input_index, batch.shape)
+                self.interpreter.allocate_tensors()
+                self._batch_size = batch.shape[0]
+            self.interpreter.set_tensor(self.input_index, batch)
+            self.interpreter.invoke()
+            return self.interpreter.get_tensor(self.output_index).copy()
 
 class FloorplanClassifier:
-    def __init__(self, img_size=(224, 224)):
+    def __init__(self, img_size=(224, 224), decode_workers=None, fast_preprocess=False,
+                 resample=None, max_upload_bytes=MAX_UPLOAD_BYTES, max_pixels=MAX_IMAGE_PIXELS,
+                 backend="keras", tflite_path=TFLITE_MODEL_PATH, tflite_threads=None):
         self.img_size = img_size
+        # "keras" runs the .h5 model; "tflite" runs the converted, quantized model
+        self.backend = backend
+        self.tflite_path = tflite_path
+        self.tflite_threads = tflite_threads
+        self.decode_workers = decode_workers or min(8, os.cpu_count() or 1)
+        self._decode_pool = None
+        # Fast mode decodes at reduced resolution (JPEG draft / reduce) and
+        # defaults to a cheaper resampling filter
+        self.fast_preprocess = fast_preprocess
+        if resample is None:
+            resample = Image.Resampling.BILINEAR if fast_preprocess else Image.Resampling.LANCZOS
+        self.resample = resample
+        self.max_upload_bytes = max_upload_bytes
+        self.max_pixels = max_pixels
+        self._local = threading.local()
         self.model = None
         self.model_path = "src/models/keras_model.h5"  # Path to your Teachable Machine model
         self.labels_path = "src/models/labels.txt"     # Path to your labels file
@@ -35,17 +139,62 @@ class FloorplanClassifier:
     
     def load_model(self):
         """Load the trained Teachable Machine model from disk"""
-        print(f"Loading model from {self.model_path}...")
+        model_path = self.tflite_path if self.backend == "tflite" else self.model_path
+        print(f"Loading {self.backend} model from {model_path}...")
         try:
-            self.model = load_model(self.model_path, compile=False)
+            if self.backend == "tflite":
+                self.model = TFLitePredictor(model_path, num_threads=self.tflite_threads)
+            else:
+                # Imported here so importing this module does not pull in TensorFlow
+                from tensorflow.keras.models import load_model
+                
+                self.model = load_model(model_path, compile=False)
             print("Model loaded successfully")
             return self.model
         except Exception as e:
             print(f"Error loading model: {str(e)}")
             return None
     
-    def preprocess_image(self, image):
-        """Preprocess the image according to Teachable Machine requirements"""
+    def convert_to_tflite(self, output_path=None, quantization="dynamic", sample_images=None):
+        """Convert the Keras model to TFLite with post-training quantization
+        
+        quantization is "dynamic" (int8 weights, float activations) or "int8"
+        (int8 weights and activations, calibrated on `sample_images`, a list of
+        raw image bytes). Inputs and outputs stay float32 so preprocessing is
+        unchanged.
+        """
+        import tensorflow as tf
+        from tensorflow.keras.models import load_model
+        
+        output_path = output_path or self.tflite_path
+        keras_model = load_model(self.model_path, compile=False)
+        
+        converter = tf.lite.TFLiteConverter.from_keras_model(keras_model)
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        if quantization == "int8":
+            if not sample_images:
+                raise ValueError("int8 quantization needs sample images for calibration")
+            
+            def representative_dataset():
+                for image_data in sample_images:
+                    yield [self.decode_image(image_data)[np.newaxis]]
+            
+            converter.representative_dataset = representative_dataset
+            converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+        elif quantization != "dynamic":
+            raise ValueError(f"Unknown quantization: {quantization}")
+        
+        with open(output_path, "wb") as f:
+            f.write(converter.convert())
+        print(f"TFLite model ({quantization}) saved to {output_path}")
+        return output_path
+    
+    def preprocess_image(self, image, out=None):
+        """Preprocess the image according to Teachable Machine requirements
+        
+        Writes into `out` (an (h, w, 3) float32 slot of a batch) when given,
+        otherwise returns a new batch of one.
+        """
         # Convert to RGB if needed
         if isinstance(image, np.ndarray):
             if len(image.shape) == 2 or (len(image.shape) == 3 and image.shape[2] == 1):
@@ -57,22 +206,89 @@ class FloorplanClassifier:
             pil_image = image.convert("RGB")
         
         # Resize and crop from center
-        resized_image = ImageOps.fit(pil_image, self.img_size, Image.Resampling.LANCZOS)
+        resized_image = ImageOps.fit(pil_image, self.img_size, self.resample)
         
         # Convert to numpy array
         image_array = np.asarray(resized_image)
         
-        # Normalize the image as required by Teachable Machine
-        normalized_image = (image_array.astype(np.float32) / 127.5) - 1
-        
         # Create the array of the right shape
-        data = np.ndarray(shape=(1, self.img_size[0], self.img_size[1], 3), dtype=np.float32)
-        data[0] = normalized_image
+        data = None
+        if out is None:
+            data = np.ndarray(shape=(1, self.img_size[0], self.img_size[1], 3), dtype=np.float32)
+            out = data[0]
+        
+        # Normalize the image as required by Teachable Machine, in place
+        np.divide(image_array, np.float32(127.5), out=out, dtype=np.float32)
+        np.subtract(out, np.float32(1), out=out)
+        
+        return out if data is None else data
+    
+    def open_image(self, image_data):
+        """Open an upload, enforcing size limits and applying reduced-resolution decoding in fast mode"""
+        return self._open_image(image_data)[0]
+    
+    def _open_image(self, image_data):
+        """`open_image`, also returning the upload's full (width, height)"""
+        if len(image_data) > self.max_upload_bytes:
+            raise ValueError(f"Image upload exceeds {self.max_upload_bytes} bytes")
+        
+        # Opening only reads the header, so the pixel check happens before decoding
+        img = Image.open(io.BytesIO(image_data))
+        if img.width * img.height > self.max_pixels:
+            raise ValueError(f"Image has {img.width * img.height} pixels, limit is {self.max_pixels}")
+        
+        original_size = img.size
+        if self.fast_preprocess:
+            # Keep about twice the target resolution for the final resample
+            target_w, target_h = self.img_size[1] * 2, self.img_size[0] * 2
+            if img.format == "JPEG":
+                # Let the JPEG decoder downscale by 1/2, 1/4 or 1/8 while decoding
+                img.draft("RGB", (target_w, target_h))
+            else:
+                factor = min(img.width // target_w, img.height // target_h)
+                if factor >= 2:
+                    if img.mode not in ("L", "RGB", "RGBA"):
+                        img = img.convert("RGB")
+                    img = img.reduce(factor)
+        return img, original_size
+    
+    def _input_buffer(self):
+        """Per-thread (1, h, w, 3) buffer reused across single-image predictions"""
+        buffer = getattr(self._local, "buffer", None)
+        if buffer is None:
+            buffer = np.empty((1, self.img_size[0], self.img_size[1], 3), dtype=np.float32)
+            self._local.buffer = buffer
+        return buffer
+    
+    def format_prediction(self, probabilities):
+        """Build the response for one image from its class probabilities"""
+        # Get the predicted class index and confidence
+        predicted_class_idx = np.argmax(probabilities)
+        confidence = float(probabilities[predicted_class_idx])
+        
+        # Get the class name
+        if predicted_class_idx < len(self.classes):
+            predicted_class = self.classes[predicted_class_idx]
+        else:
+            predicted_class = f"unknown_class_{predicted_class_idx}"
+        
+        # Get confidences for all classes
+        class_confidences = {cls: float(probabilities[i]) 
+                            for i, cls in enumerate(self.classes) 
+                            if i < len(probabilities)}
+        
+        # Consider low confidence if less than 0.6
+        low_confidence = confidence < 0.6
         
-        return data
+        return {
+            "shape": predicted_class,
+            "confidence": confidence,
+            "all_confidences": class_confidences,
+            "low_confidence": low_confidence
+        }
     
-    def predict(self, image_data):
-        """Predict the floorplan shape from image data"""
+    def predict(self, image_data, pixels_per_meter=None):
+        """Predict the floorplan shape from image data, and measure its outline from the same decode"""
         if self.model is None:
             self.load_model()
             
@@ -80,39 +296,15 @@ class FloorplanClassifier:
             return {"shape": "unknown", "confidence": 0.0}
         
         try:
-            # Convert image data to PIL Image
-            img = Image.open(io.BytesIO(image_data))
-            
-            # Preprocess the image
-            preprocessed_img = self.preprocess_image(img)
+            # Decode once into this thread's reusable input buffer, measuring the same pixels
+            preprocessed_img = self._input_buffer()
+            measurement = self.decode_and_measure(image_data, out=preprocessed_img[0],
+                                                  pixels_per_meter=pixels_per_meter)[1]
             
             # Make prediction
             prediction = self.model.predict(preprocessed_img)
             
-            # Get the predicted class index and confidence
-            predicted_class_idx = np.argmax(prediction[0])
-            confidence = float(prediction[0][predicted_class_idx])
-            
-            # Get the class name
-            if predicted_class_idx < len(self.classes):
-                predicted_class = self.classes[predicted_class_idx]
-            else:
-                predicted_class = f"unknown_class_{predicted_class_idx}"
-            
-            # Get confidences for all classes
-            class_confidences = {cls: float(prediction[0][i]) 
-                                for i, cls in enumerate(self.classes) 
-                                if i < len(prediction[0])}
-            
-            # Consider low confidence if less than 0.6
-            low_confidence = confidence < 0.6
-            
-            return {
-                "shape": predicted_class,
-                "confidence": confidence,
-                "all_confidences": class_confidences,
-                "low_confidence": low_confidence
-            }
+            return {**self.format_prediction(prediction[0]), "measurement": measurement}
             
         except Exception as e:
             print(f"Error in prediction: {str(e)}")
@@ -121,6 +313,91 @@ class FloorplanClassifier:
                 "confidence": 0.0,
                 "error": str(e)
             }
+    
+    def decode_image(self, image_data):
+        """Decode and preprocess one upload into a single (h, w, 3) float32 model input"""
+        out = np.empty((self.img_size[0], self.img_size[1], 3), dtype=np.float32)
+        return self.preprocess_image(self.open_image(image_data), out=out)
+    
+    def decode_and_measure(self, image_data, out=None, pixels_per_meter=None):
+        """Decode one upload once and use its pixels twice: model input and outline measurement
+        
+        Returns (model input, measurement); the input is written into `out` when given.
+        """
+        img, original_size = self._open_image(image_data)
+        img.load()
+        if out is None:
+            out = np.empty((self.img_size[0], self.img_size[1], 3), dtype=np.float32)
+        self.preprocess_image(img, out=out)
+        try:
+            measurement = measure_floorplan(img, original_size, pixels_per_meter)
+        except Exception as e:
+            # The shape prediction does not depend on the measurement
+            print(f"Error measuring floorplan: {str(e)}")
+            measurement = None
+        return out, measurement
+    
+    def warm_up(self):
+        """Run one inference on a blank image so the first request skips graph setup"""
+        self.predict_probabilities(np.zeros((1, self.img_size[0], self.img_size[1], 3), dtype=np.float32))
+    
+    def predict_probabilities(self, batch):
+        """Run the model on a preprocessed batch and return class probabilities per row"""
+        return self.model.predict(batch, batch_size=len(batch), verbose=0)
+    
+    def _decode_into(self, image_data, out, pixels_per_meter=None):
+        """Decode and measure one upload into its batch slot; returns (error message, measurement)"""
+        try:
+            return None, self.decode_and_measure(image_data, out=out, pixels_per_meter=pixels_per_meter)[1]
+        except Exception as e:
+            return str(e), None
+    
+    def predict_batch(self, images_data, pixels_per_meter=None):
+        """Predict floorplan shapes for several images with a single forward pass
+        
+        Images are decoded (and measured) in parallel straight into one
+        preallocated batch tensor. Returns one result per input, in order,
+        shaped like `predict`.
+        """
+        if self.model is None:
+            self.load_model()
+            
+        if self.model is None:
+            return [{"shape": "unknown", "confidence": 0.0} for _ in images_data]
+        
+        if not images_data:
+            return []
+        
+        batch = np.empty((len(images_data), self.img_size[0], self.img_size[1], 3), dtype=np.float32)
+        
+        if self._decode_pool is None:
+            self._decode_pool = ThreadPoolExecutor(
+                max_workers=self.decode_workers, thread_name_prefix="floorplan-decode"
+            )
+        decoded = list(self._decode_pool.map(
+            lambda image_data, out: self._decode_into(image_data, out, pixels_per_meter), images_data, batch
+        ))
+        errors = [error for error, _ in decoded]
+        
+        results = [None] * len(images_data)
+        valid = [i for i, error in enumerate(errors) if error is None]
+        for i, error in enumerate(errors):
+            if error is not None:
+                print(f"Error in prediction: {error}")
+                results[i] = {"shape": "error", "confidence": 0.0, "error": error}
+        
+        if valid:
+            try:
+                inputs = batch if len(valid) == len(images_data) else batch[valid]
+                predictions = self.predict_probabilities(inputs)
+                for i, probabilities in zip(valid, predictions):
+                    results[i] = {**self.format_prediction(probabilities), "measurement": decoded[i][1]}
+            except Exception as e:
+                print(f"Error in prediction: {str(e)}")
+                for i in valid:
+                    results[i] = {"shape": "error", "confidence": 0.0, "error": str(e)}
+        
+        return results
 
     # Include stubs for compatibility with existing code
     def build_model(self, model_type="teachable"):
@@ -153,6 +430,33 @@ class FloorplanClassifier:
         print("Using pre-trained Teachable Machine model, no training history to plot")
         return None
 
+# Classifier used by the module-level worker functions below. In a process
+# pool each worker loads its own via init_worker_classifier; in a thread pool
+# the server shares its instance through set_worker_classifier.
+_worker_classifier = None
+
+def set_worker_classifier(classifier):
+    global _worker_classifier
+    _worker_classifier = classifier
+
+def init_worker_classifier(options=None):
+    """Process pool initializer: load a classifier once per worker process"""
+    classifier = FloorplanClassifier(**(options or {}))
+    classifier.load_model()
+    set_worker_classifier(classifier)
+
+def decode_image_in_worker(image_data):
+    return _worker_classifier.decode_image(image_data)
+
+def decode_and_measure_in_worker(image_data, pixels_per_meter=None):
+    return _worker_classifier.decode_and_measure(image_data, pixels_per_meter=pixels_per_meter)
+
+def predict_probabilities_in_worker(batch):
+    return _worker_classifier.predict_probabilities(batch)
+
+def predict_batch_in_worker(images_data, pixels_per_meter=None):
+    return _worker_classifier.predict_batch(images_data, pixels_per_meter)
+
 # Test the model if this script is run directly
 if __name__ == "__main__":
     # Create model directory if it doesn't exist
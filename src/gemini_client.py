@@ -0,0 +1,151 @@
+import time
+import asyncio
+import threading
+import httpx
+from typing import Optional
+
+
+GEMINI_API_URL = "https://generativelanguage.googleapis.com/v1"
+GEMINI_MODEL = "gemini-2.0-flash"
+
+
+class CircuitOpen(Exception):
+    """Raised instead of calling a dependency that has been failing"""
+
+
+class GeminiError(Exception):
+    """Raised when Gemini answers with an error status or an unusable body"""
+
+
+class CircuitBreaker:
+    """Stop calling a failing dependency for a while so callers can fall back immediately
+
+    After `failure_threshold` consecutive failures the breaker opens and
+    `check` raises CircuitOpen for `reset_timeout` seconds. Then a single
+    trial call is let through (half-open): success closes the breaker, failure
+    opens it again.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = None
+        self.rejected = 0
+        self._lock = threading.Lock()
+
+    def check(self):
+        """Raise CircuitOpen unless a call may go through now"""
+        with self._lock:
+            if self.state == "closed":
+                return
+            if self.state == "open" and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = "half_open"
+                return
+            self.rejected += 1
+            raise CircuitOpen(f"circuit open after {self.failures} consecutive failures")
+
+    def record_success(self):
+        with self._lock:
+            self.state = "closed"
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == "half_open" or self.failures >= self.failure_threshold:
+                self.state = "open"
+                self.opened_at = time.monotonic()
+
+    def status(self):
+        with self._lock:
+            return {
+                "state": self.state,
+                "failures": self.failures,
+                "rejected": self.rejected,
+                "reset_timeout": self.reset_timeout,
+            }
+
+
+class AsyncGeminiClient:
+    """Gemini `generateContent` calls over a pooled keep-alive HTTP session
+
+    Like AsyncAppwriteDatabase, the `httpx.AsyncClient` is created lazily
+    inside the running loop and reused; `timeout` is a hard deadline for the
+    whole call. Every call goes through a CircuitBreaker, so while Gemini is
+    down callers get CircuitOpen at once instead of waiting for the deadline.
+    Point `base_url` at `src/stubs/gemini_stub.py` to run without Gemini.
+    """
+
+    def __init__(self, api_key, base_url=GEMINI_API_URL, model=GEMINI_MODEL, timeout=4.0,
+                 max_connections=20, max_keepalive_connections=10, breaker=None, transport=None):
+        self.api_key = api_key
+        self.base_url = (base_url or GEMINI_API_URL).rstrip("/")
+        self.model = model
+        self.timeout = timeout
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+        )
+        self.breaker = breaker or CircuitBreaker()
+        # Optional httpx transport, e.g. an ASGITransport serving the stub in-process
+        self.transport = transport
+        self._client = None
+
+    def _get_client(self):
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers={
+                    "Content-Type": "application/json",
+                    "x-goog-api-key": self.api_key or "",
+                },
+                limits=self.limits,
+                timeout=self.timeout,
+                transport=self.transport,
+            )
+        return self._client
+
+    async def generate(self, prompt: str, timeout: Optional[float] = None) -> str:
+        """Return the text of the first candidate for `prompt`"""
+        if not self.api_key:
+            raise GeminiError("Gemini API key not found in environment variables")
+        self.breaker.check()
+        timeout = self.timeout if timeout is None else timeout
+        try:
+            response = await asyncio.wait_for(
+                self._get_client().post(
+                    f"/models/{self.model}:generateContent",
+                    json={"contents": [{"parts": [{"text": prompt}]}]},
+                    timeout=timeout,
+                ),
+                timeout=timeout,
+            )
+            if response.status_code != 200:
+                raise GeminiError(f"Gemini API error: {response.status_code} - {response.text[:200]}")
+            text = _candidate_text(response.json())
+        except BaseException:
+            # Any unfinished call counts, including a cancelled one: a half-open
+            # trial must always end in success or failure, or the breaker never closes
+            self.breaker.record_failure()
+            raise
+        self.breaker.record_success()
+        return text
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+def _candidate_text(result):
+    """Text of the first candidate; GeminiError for any other response shape"""
+    candidates = result.get("candidates") if isinstance(result, dict) else None
+    if isinstance(candidates, list) and candidates and isinstance(candidates[0], dict):
+        content = candidates[0].get("content")
+        parts = content.get("parts") if isinstance(content, dict) else None
+        if isinstance(parts, list) and parts and isinstance(parts[0], dict) and isinstance(parts[0].get("text"), str):
+            return parts[0]["text"].strip()
+    raise GeminiError("Gemini response has no candidate text")
@@ -0,0 +1,33 @@
+import json
+import time
+import hashlib
+from email.utils import formatdate, parsedate_to_datetime
+
+
+class CachedJSON:
+    """A JSON payload serialized once, with validators for HTTP revalidation
+
+    The body is encoded when the payload is built and the ETag is a hash of
+    it, so every worker serving the same data hands out the same ETag and
+    clients revalidating with If-None-Match get 304 without any work here.
+    """
+
+    def __init__(self, payload, last_modified=None):
+        self.body = json.dumps(payload, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+        self.etag = f'"{hashlib.sha1(self.body).hexdigest()}"'
+        # HTTP dates have whole-second resolution
+        self.last_modified = int(last_modified if last_modified is not None else time.time())
+        self.last_modified_header = formatdate(self.last_modified, usegmt=True)
+
+    def is_not_modified(self, if_none_match=None, if_modified_since=None):
+        """Whether a conditional request can be answered with 304 Not Modified"""
+        if if_none_match is not None:
+            # If-None-Match takes precedence; weak comparison per RFC 9110
+            tags = [tag.strip() for tag in if_none_match.split(",")]
+            return "*" in tags or any(tag.removeprefix("W/") == self.etag for tag in tags)
+        if if_modified_since is not None:
+            try:
+                return int(parsedate_to_datetime(if_modified_since).timestamp()) >= self.last_modified
+            except (TypeError, ValueError):
+                return False
+        return False
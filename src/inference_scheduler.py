@@ -0,0 +1,114 @@
+import time
+import queue
+import asyncio
+import threading
+import numpy as np
+from concurrent.futures import Future
+
+
+class SchedulerOverloaded(Exception):
+    """Raised when the inference queue is full"""
+
+
+class MicroBatchScheduler:
+    """Groups concurrent single-item inference requests into batches
+
+    Callers submit one preprocessed input at a time. A dedicated worker thread
+    takes the oldest request, then keeps collecting until `max_batch_size`
+    items are queued or `max_wait_ms` has passed since that request arrived.
+    It stacks them into a reused batch buffer, runs `infer_fn` once and
+    resolves each caller's future with its own row of the output.
+    """
+
+    def __init__(self, infer_fn, max_batch_size=16, max_wait_ms=5.0, max_queue=256, name="inference"):
+        self.infer_fn = infer_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.max_queue = max_queue
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._buffer = None
+        self._stats_lock = threading.Lock()
+        self.submitted = 0
+        self.rejected = 0
+        self.batches = 0
+        self.items = 0
+        self.total_queue_wait = 0.0
+        self.total_inference_time = 0.0
+        self._worker = threading.Thread(target=self._run, name=f"{name}-batcher", daemon=True)
+        self._worker.start()
+
+    def submit(self, item):
+        """Queue one input; returns a concurrent Future for its output"""
+        # Running futures cannot be cancelled, so a disconnected caller never
+        # breaks result delivery for the rest of its batch
+        future = Future()
+        future.set_running_or_notify_cancel()
+        try:
+            self._queue.put_nowait((item, future, time.monotonic()))
+        except queue.Full:
+            with self._stats_lock:
+                self.rejected += 1
+            raise SchedulerOverloaded(f"Inference queue is full ({self.max_queue} pending)")
+        with self._stats_lock:
+            self.submitted += 1
+        return future
+
+    async def infer(self, item):
+        """Queue one input and await its output from the event loop"""
+        return await asyncio.wrap_future(self.submit(item))
+
+    def _collect(self):
+        """Block for the first request, then gather more until the batch is full or its deadline passes"""
+        first = self._queue.get()
+        requests = [first]
+        deadline = first[2] + self.max_wait
+        while len(requests) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                requests.append(self._queue.get(timeout=remaining) if remaining > 0
+                                else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return requests
+
+    def _run(self):
+        while True:
+            requests = self._collect()
+            started = time.monotonic()
+            try:
+                first_item = np.asarray(requests[0][0])
+                if self._buffer is None or self._buffer.shape[1:] != first_item.shape:
+                    self._buffer = np.empty((self.max_batch_size,) + first_item.shape, dtype=first_item.dtype)
+                batch = self._buffer[:len(requests)]
+                for slot, (item, _, _) in zip(batch, requests):
+                    slot[...] = item
+
+                outputs = self.infer_fn(batch)
+                for (_, future, _), output in zip(requests, outputs):
+                    future.set_result(output)
+            except Exception as e:
+                for _, future, _ in requests:
+                    if not future.done():
+                        future.set_exception(e)
+
+            finished = time.monotonic()
+            with self._stats_lock:
+                self.batches += 1
+                self.items += len(requests)
+                self.total_queue_wait += sum(started - enqueued for _, _, enqueued in requests)
+                self.total_inference_time += finished - started
+
+    def stats(self):
+        with self._stats_lock:
+            return {
+                "queue_depth": self._queue.qsize(),
+                "max_queue": self.max_queue,
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait * 1000,
+                "submitted": self.submitted,
+                "rejected": self.rejected,
+                "batches": self.batches,
+                "mean_batch_size": self.items / self.batches if self.batches else 0.0,
+                "mean_queue_wait_ms": self.total_queue_wait / self.items * 1000 if self.items else 0.0,
+                "mean_inference_ms": self.total_inference_time / self.batches * 1000 if self.batches else 0.0,
+            }
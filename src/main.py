@@ -1,18 +1,19 @@
 from datetime import datetime, timedelta
-from fastapi import FastAPI, HTTPException, UploadFile, File
+from fastapi import FastAPI, HTTPException, UploadFile, File, Form, Request, Response, Header
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 from typing import List, Optional, Dict, Any
 import os
 import sys
 import json
 import io
-import requests
+import httpx
 import math
 import re
+import asyncio
+import joblib
 from dotenv import load_dotenv
-from appwrite.client import Client
-from appwrite.services.databases import Databases
 from appwrite.query import Query
 
 # Load environment variables
@@ -21,8 +22,34 @@ load_dotenv()
 # Add src directory to path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from src.products_recommender import FurnitureRecommender
-from src.floorplan_classifier import FloorplanClassifier
+# Only lightweight modules are imported here; the recommender (TensorFlow,
+# scikit-learn, Appwrite SDK) is imported by the background model loader
+from src.model_bundle import is_bundle, read_bundle_frame
+from src.model_loader import ModelSlot, ModelNotReady, ModelRefresher, load_in_background, all_ready
+from src.catalog_index import CatalogIndex, FLOORING_CATEGORY
+from src.floorplan_classifier import (
+    FloorplanClassifier,
+    set_worker_classifier,
+    init_worker_classifier,
+    decode_and_measure_in_worker,
+    predict_probabilities_in_worker,
+    predict_batch_in_worker,
+)
+from src.product_catalog import ProductCatalog
+from src.query_cache import QueryCache
+from src.appwrite_data import AsyncAppwriteDatabase
+from src.inference_scheduler import MicroBatchScheduler, SchedulerOverloaded
+from src.execution_pools import BoundedExecutor, PoolOverloaded
+from src.gemini_client import AsyncGeminiClient, CircuitBreaker, CircuitOpen, GeminiError, GEMINI_API_URL
+from src.quantity_store import QuantityStore, normalize_product_name, room_size_bucket
+from src.quantity_estimator import QuantityEstimator
+from src.quantity_prompts import (
+    QuantityBatch,
+    bulk_quantity_prompt,
+    parse_bulk_answer,
+    parse_quantity_answer,
+    quantity_prompt,
+)
 
 app = FastAPI()
 
@@ -35,20 +62,171 @@ app.add_middleware(
 )
 
 # Load the ML models
-FURNITURE_MODEL_PATH = "src/models/furniture_recommender.h5"
+FURNITURE_MODEL_PATH = "src/models/recommender_bundle"
+# h5 + joblib artifacts from before the bundle format (convert with src/convert_model_bundle.py)
+LEGACY_FURNITURE_MODEL_PATH = "src/models/furniture_recommender.h5"
 FLOORPLAN_MODEL_PATH = "src/models/keras_model.h5"
 
-try:
-    recommender = FurnitureRecommender.load_model(FURNITURE_MODEL_PATH)
-    # Initialize floorplan classifier (will be loaded when needed)
-    floorplan_classifier = FloorplanClassifier()
-    # Check if model exists, load it if available
-    if os.path.exists(FLOORPLAN_MODEL_PATH):
-        floorplan_classifier.load_model()
+LEGACY_CATALOG_PATH = "src/models/attrs/dataframe.joblib"
+
+def _load_startup_catalog():
+    """Catalog for the metadata endpoints, read from the model artifacts without loading a model"""
+    if is_bundle(FURNITURE_MODEL_PATH):
+        df = read_bundle_frame(FURNITURE_MODEL_PATH, "catalog_columns")
     else:
-        print(f"Warning: Teachable Machine model not found at {FLOORPLAN_MODEL_PATH}")
+        df = joblib.load(LEGACY_CATALOG_PATH)
+    return CatalogIndex(df)
+
+def _recommender_model_path():
+    return FURNITURE_MODEL_PATH if is_bundle(FURNITURE_MODEL_PATH) else LEGACY_FURNITURE_MODEL_PATH
+
+def _recommender_model_stamp():
+    """Changes whenever a new bundle (or legacy h5) is written"""
+    path = _recommender_model_path()
+    stat = os.stat(os.path.join(path, "manifest.json") if is_bundle(path) else path)
+    return (path, stat.st_mtime_ns, stat.st_size)
+
+# Stamp of the model files last loaded (a rejected refresh is retried only once they change again)
+_live_recommender_stamp = None
+
+def _load_recommender():
+    global _live_recommender_stamp
+    from src.products_recommender import FurnitureRecommender
+    
+    stamp = _recommender_model_stamp()
+    model = FurnitureRecommender.load_model(stamp[0])
+    _live_recommender_stamp = stamp
+    return model
+
+def _warm_up_recommender(model):
+    """One full recommendation so lookups, similarity caches and the encoder are warm"""
+    row = model.df.iloc[0]
+    model.get_recommendations(row['CATEGORY'], row['STYLE'])
+
+def _build_recommender(mode="reload"):
+    """New recommender for a hot refresh, or None if there is nothing new
+
+    "reload" loads the model files if they changed since the live model was
+    loaded; "retrain" syncs the catalog from Appwrite and trains a new model,
+    which `_publish_recommender` saves once it passed validation.
+    """
+    if not recommender_slot.settled:
+        # The startup load is still running and will pick up the latest files
+        return None
+    if mode == "reload":
+        if _recommender_model_stamp() == _live_recommender_stamp:
+            return None
+        return _load_recommender()
+    if mode == "retrain":
+        from src.products_recommender import FurnitureRecommender
+        
+        live = recommender_slot.value
+        model = (FurnitureRecommender(embedding_dim=live.embedding_dim, n_neighbors=live.n_neighbors)
+                 if live is not None else FurnitureRecommender())
+        model.train(verbose=0)
+        return model
+    raise ValueError(f"Unknown refresh mode: {mode}")
+
+def _publish_recommender(model, mode="reload"):
+    """Save a validated retrained model as the bundle the next start loads (reloads are already on disk)"""
+    global _live_recommender_stamp
+    if mode == "retrain":
+        model.save_model(os.path.dirname(FURNITURE_MODEL_PATH), precompute_top_n=10)
+        _live_recommender_stamp = _recommender_model_stamp()
+
+def _validate_recommender(model):
+    """Reject a refreshed recommender that could not serve; also warms it up before the swap"""
+    if model.df is None or model.df.empty:
+        raise ValueError("refreshed catalog is empty")
+    missing_columns = {'PRODUCT_NAME', 'CATEGORY', 'STYLE'} - set(model.df.columns)
+    if missing_columns:
+        raise ValueError(f"refreshed catalog lacks columns {sorted(missing_columns)}")
+    if model.embeddings is not None and len(model.embeddings) != len(model.df):
+        raise ValueError("embeddings do not match the catalog")
+    _warm_up_recommender(model)
+
+def _load_floorplan_classifier():
+    return floorplan_classifier if floorplan_classifier.load_model() is not None else None
+
+try:
+    startup_catalog = _load_startup_catalog()
+    # Initialize floorplan classifier (its model loads in the background)
+    floorplan_options = {
+        "fast_preprocess": os.getenv('FLOORPLAN_FAST_PREPROCESS', '0') == '1',
+        "backend": os.getenv('FLOORPLAN_BACKEND', 'keras'),
+    }
+    floorplan_classifier = FloorplanClassifier(**floorplan_options)
+    floorplan_model_file = (floorplan_classifier.tflite_path if floorplan_classifier.backend == 'tflite'
+                            else FLOORPLAN_MODEL_PATH)
+    if not os.path.exists(floorplan_model_file):
+        print(f"Warning: Teachable Machine model not found at {floorplan_model_file}")
 except Exception as e:
-    raise RuntimeError(f"Failed to load ML models: {e}")
+    raise RuntimeError(f"Failed to load catalog metadata: {e}")
+
+# Staged startup: metadata endpoints serve `startup_catalog` right away while
+# the models load and warm up on a background thread
+recommender_slot = ModelSlot("recommender", _load_recommender, _warm_up_recommender)
+floorplan_slot = ModelSlot(
+    "floorplan", _load_floorplan_classifier, lambda classifier: classifier.warm_up(),
+    # A missing floorplan model only disables classification
+    required=os.path.exists(floorplan_model_file),
+)
+MODEL_SLOTS = [recommender_slot, floorplan_slot]
+STARTED_AT = datetime.now()
+
+# Hot refresh: a new recommender is built next to the live one, validated and
+# swapped in; requests already holding the old one finish on it
+recommender_refresher = ModelRefresher(
+    recommender_slot, _build_recommender, _validate_recommender,
+    interval=float(os.getenv('MODEL_REFRESH_INTERVAL', '0')) or None,
+    publish_fn=_publish_recommender,
+)
+ADMIN_TOKEN = os.getenv('ADMIN_TOKEN')
+
+@app.on_event("startup")
+async def start_model_loading():
+    load_in_background(MODEL_SLOTS)
+    recommender_refresher.start_schedule()
+
+def _catalog_index():
+    """Catalog lookups of the loaded recommender, or the startup snapshot until it is ready"""
+    if recommender_slot.is_ready:
+        return recommender_slot.value._get_catalog_index()
+    return startup_catalog
+
+# Execution pools: CPU-bound inference and blocking I/O never run on the event loop.
+# A full pool rejects new work with 503 instead of queueing without bound.
+INFERENCE_POOL_KIND = os.getenv('INFERENCE_POOL_KIND', 'thread')  # "thread" or "process"
+set_worker_classifier(floorplan_classifier)
+inference_pool = BoundedExecutor(
+    "inference",
+    max_workers=int(os.getenv('INFERENCE_POOL_WORKERS', str(os.cpu_count() or 1))),
+    max_pending=int(os.getenv('INFERENCE_POOL_QUEUE', '64')),
+    kind=INFERENCE_POOL_KIND,
+    # Process workers each load their own copy of the floorplan model
+    initializer=init_worker_classifier if INFERENCE_POOL_KIND == 'process' else None,
+    initargs=(floorplan_options,) if INFERENCE_POOL_KIND == 'process' else (),
+)
+io_pool = BoundedExecutor(
+    "io",
+    max_workers=int(os.getenv('IO_POOL_WORKERS', '16')),
+    max_pending=int(os.getenv('IO_POOL_QUEUE', '256')),
+)
+
+OVERLOAD_ERRORS = (PoolOverloaded, SchedulerOverloaded)
+
+# Micro-batches concurrent single-image floorplan requests into one forward pass
+floorplan_scheduler = MicroBatchScheduler(
+    lambda batch: inference_pool.submit(predict_probabilities_in_worker, batch).result(),
+    max_batch_size=int(os.getenv('FLOORPLAN_BATCH_SIZE', '16')),
+    max_wait_ms=float(os.getenv('FLOORPLAN_BATCH_WAIT_MS', '5')),
+    max_queue=int(os.getenv('FLOORPLAN_QUEUE_DEPTH', '256')),
+    name="floorplan",
+)
+
+# Product dataset used by the ML recommendations, reloaded when the file changes
+PRODUCTS_DATA_PATH = "data/products.json"
+product_catalog = ProductCatalog(PRODUCTS_DATA_PATH)
 
 # Add these models if you don't have them already
 class RecommendationRequest(BaseModel):
@@ -68,270 +246,637 @@ class Product(BaseModel):
 class RecommendationResponse(BaseModel):
     products: List[Product]
 
-# Initialize Appwrite client
-client = Client()
+# Initialize async Appwrite data access (pooled keep-alive session)
 ENDPOINT = os.getenv('VITE_APPWRITE_ENDPOINT')
 PROJECT_ID = os.getenv('VITE_APPWRITE_PROJECT_ID')
 API_KEY = os.getenv('VITE_APPWRITE_API_KEY')
-
-databases = Databases(client)
 DATABASE_ID = os.getenv('VITE_APPWRITE_DATABASE_ID')
 PRODUCTS_COLLECTION_ID = os.getenv('VITE_APPWRITE_PRODUCTS_COLLECTION_ID')
 
+appwrite_db = AsyncAppwriteDatabase(
+    ENDPOINT,
+    PROJECT_ID,
+    API_KEY,
+    DATABASE_ID,
+    timeout=float(os.getenv('APPWRITE_TIMEOUT', '5')),
+)
+
+@app.on_event("shutdown")
+async def close_appwrite_session():
+    await appwrite_db.aclose()
+
+# Cache of Appwrite product queries; the collection changes rarely
+appwrite_query_cache = QueryCache(
+    ttl=float(os.getenv('APPWRITE_CACHE_TTL', '300')),
+    stale_ttl=float(os.getenv('APPWRITE_CACHE_STALE_TTL', '600')),
+    max_entries=int(os.getenv('APPWRITE_CACHE_MAX_ENTRIES', '512')),
+)
+
+@app.get("/healthz")
+async def healthz():
+    """Liveness: the process is up and serving requests"""
+    return {"status": "ok", "uptime_seconds": (datetime.now() - STARTED_AT).total_seconds()}
+
+@app.get("/readyz")
+async def readyz():
+    """Readiness: every required model is loaded and warmed up"""
+    ready = all_ready(MODEL_SLOTS)
+    if ready:
+        status = "ready"
+    elif any(slot.required and slot.settled for slot in MODEL_SLOTS):
+        status = "failed"
+    else:
+        status = "starting"
+    content = {
+        "status": status,
+        "models": {slot.name: slot.status() for slot in MODEL_SLOTS},
+    }
+    return JSONResponse(content=content, status_code=200 if ready else 503)
+
+# Metadata responses are revalidated by clients; max-age lets them skip even that
+FACETS_CACHE_MAX_AGE = int(os.getenv('FACETS_CACHE_MAX_AGE', '60'))
+
+def _cached_json_response(request: Request, cached) -> Response:
+    """Serve a pre-serialized CachedJSON payload, or 304 when the client's copy is current"""
+    headers = {
+        "ETag": cached.etag,
+        "Last-Modified": cached.last_modified_header,
+        "Cache-Control": f"public, max-age={FACETS_CACHE_MAX_AGE}",
+    }
+    if cached.is_not_modified(request.headers.get("if-none-match"), request.headers.get("if-modified-since")):
+        return Response(status_code=304, headers=headers)
+    return Response(content=cached.body, media_type="application/json", headers=headers)
+
+def _check_admin_token(token: Optional[str]):
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled (ADMIN_TOKEN is not set)")
+    if token != ADMIN_TOKEN:
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+@app.post("/api/admin/refresh", status_code=202)
+async def refresh_recommender(mode: str = "reload", x_admin_token: Optional[str] = Header(None)):
+    """Rebuild ("retrain") or reload ("reload") the recommender in the background and swap it in"""
+    _check_admin_token(x_admin_token)
+    if mode not in ("reload", "retrain"):
+        raise HTTPException(status_code=400, detail=f"Unknown refresh mode: {mode}")
+    started = recommender_refresher.trigger("admin", mode=mode)
+    return {"started": started, **recommender_refresher.status()}
+
+@app.get("/api/admin/refresh")
+async def get_refresh_status(x_admin_token: Optional[str] = Header(None)):
+    """Status of the last recommender refresh and the live generation"""
+    _check_admin_token(x_admin_token)
+    return recommender_refresher.status()
+
+@app.post("/api/admin/catalog-sync")
+async def sync_catalog(x_admin_token: Optional[str] = Header(None)):
+    """Embed products changed in Appwrite since the last sync into the live recommender, without retraining
+    
+    Once too much of the catalog uses vocabulary the model was not trained on,
+    a full retrain is started in the background.
+    """
+    _check_admin_token(x_admin_token)
+    try:
+        model = recommender_slot.get()
+    except ModelNotReady as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+    summary = await io_pool.run(model.sync_incremental)
+    summary["retrain_started"] = (summary["retrain_required"]
+                                  and recommender_refresher.trigger("drift", mode="retrain"))
+    return summary
+
 @app.get("/api/categories")
-async def get_categories():
+async def get_categories(request: Request):
     """Get all available room categories"""
-    categories = sorted(recommender.df['CATEGORY'].unique())
-    return {"categories": categories}
+    return _cached_json_response(request, _catalog_index().facets.categories_response)
 
 @app.get("/api/styles")
-async def get_styles():
+async def get_styles(request: Request):
     """Get all available styles"""
-    styles = sorted(recommender.df['STYLE'].unique())
-    return {"styles": styles}
+    return _cached_json_response(request, _catalog_index().facets.styles_response)
 
 @app.get("/api/flooring")
-async def get_flooring_options():
+async def get_flooring_options(request: Request):
     """Get all available flooring options"""
-    flooring = recommender.get_flooring_options()
-    return {"flooring": flooring}
+    return _cached_json_response(request, _catalog_index().facets.flooring_response)
+
+@app.get("/api/facets")
+async def get_facets(request: Request):
+    """Categories, styles and flooring with product counts, plus valid category/style combinations"""
+    return _cached_json_response(request, _catalog_index().facets.facets_response)
+
+# Merged recommendation responses, keyed by the request and the catalog version.
+# Entries live no longer than the Appwrite results they were merged from.
+recommendation_cache = QueryCache(
+    ttl=float(os.getenv('APPWRITE_CACHE_TTL', '300')),
+    stale_ttl=0,
+    max_entries=int(os.getenv('RECOMMENDATION_CACHE_MAX_ENTRIES', '2048')),
+)
+
+class _DegradedRecommendations(Exception):
+    """Carries a response built without Appwrite data, so it is returned but never cached"""
+    def __init__(self, products):
+        super().__init__("Appwrite products unavailable")
+        self.products = products
+
+def _product_catalog_version():
+    try:
+        return product_catalog.snapshot().stat_key
+    except (OSError, ValueError):
+        return None
 
 # Modify your existing recommendation endpoint
 @app.post("/api/recommendations", response_model=RecommendationResponse)
 async def get_recommendations(request: RecommendationRequest):
     try:
-        # 1. Get ML-based recommendations from your existing model
-        ml_recommendations = get_ml_recommendations(request.room, request.style, request.flooring)
-        
-        # 2. Get newly added products from Appwrite
-        # Define a threshold date (e.g., products added in the last 30 days)
-        threshold_date = datetime.now() - timedelta(days=30)
-        
-        # Get new products that match the user's preferences
-        new_products = get_matching_products(
-            room=request.room,
-            style=request.style,
-            flooring=request.flooring
-        )
-        
-        # 3. Format new products to match ML recommendations format
-        formatted_new_products = []
-        for product in new_products:
-            # Check if this product is already in ML recommendations
-            if not any(ml_product["name"] == product["name"] for ml_product in ml_recommendations):
-                formatted_product = {
-                    "name": product["name"],
-                    "category": product["category"],
-                    "style": product["style"],
-                    "image": product.get("image_url", product.get("imageUrl", "")),
-                    "confidence": 90,  # High confidence for exact matches
-                    "recommendation_source": "rule_based"
-                }
-                formatted_new_products.append(formatted_product)
-        
-        # 4. Add source flag to ML recommendations
-        for product in ml_recommendations:
-            product["recommendation_source"] = "ml_model"
-        
-        # 5. Combine recommendations (prioritize ML recommendations)
-        combined_recommendations = ml_recommendations + formatted_new_products
+        if request.refreshData:
+            # Also pick up a newer model bundle, if one was written (no-op otherwise)
+            recommender_refresher.trigger("refresh_data", mode="reload")
+        # Case and whitespace variants of a name are one request (and one cache entry)
+        lookup = _catalog_index()
+        room, style, flooring = lookup.canonical_request(request.room, request.style, request.flooring)
+        key = ("recommendations", room, style, flooring,
+               _product_catalog_version(), recommender_slot.generation, lookup.version)
+        try:
+            products = await recommendation_cache.get_async(
+                key,
+                lambda: _build_recommendations(room, style, flooring, request.refreshData),
+                force_refresh=request.refreshData
+            )
+        except _DegradedRecommendations as e:
+            products = e.products
         
-        return {"products": combined_recommendations}
+        return {"products": products}
     
+    except OVERLOAD_ERRORS as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         print(f"Error generating recommendations: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to generate recommendations: {str(e)}")
 
-def get_matching_products(room: str, style: str, flooring: str) -> List[Dict[str, Any]]:
-    """Get products from Appwrite that match the user's preferences"""
+async def _build_recommendations(room: str, style: str, flooring: str, refresh: bool = False) -> List[Dict[str, Any]]:
+    """Merge the ML recommendations with matching Appwrite products (shared through the cache, read-only)"""
+    # 1. Get ML-based recommendations from your existing model
+    ml_recommendations = await io_pool.run(get_ml_recommendations, room, style, flooring)
+    
+    # 2. Get newly added products from Appwrite
+    appwrite_failed = False
     try:
-         # Corrected variable names
-        database_id = DATABASE_ID
-        products_collection_id = PRODUCTS_COLLECTION_ID
-        
-        # Query products that match the room and style
-        result = databases.list_documents(
-            database_id=database_id,
-            collection_id=products_collection_id,
-            queries=[
-                Query.equal("category", room),
-                Query.equal("style", style)
-            ]
+        new_products = await get_matching_products(
+            room=room,
+            style=style,
+            flooring=flooring,
+            refresh=refresh,
+            suppress_errors=False
+        )
+    except Exception as e:
+        print(f"Error fetching products from Appwrite: {str(e)}")
+        new_products = []
+        appwrite_failed = True
+    
+    # 3. Format new products to match ML recommendations format
+    formatted_new_products = []
+    for product in new_products:
+        # Check if this product is already in ML recommendations
+        if not any(ml_product["name"] == product["name"] for ml_product in ml_recommendations):
+            formatted_product = {
+                "name": product["name"],
+                "category": product["category"],
+                "style": product["style"],
+                "image": product.get("image_url", product.get("imageUrl", "")),
+                "confidence": 90,  # High confidence for exact matches
+                "recommendation_source": "rule_based"
+            }
+            formatted_new_products.append(formatted_product)
+    
+    # 4. Add source flag to ML recommendations
+    for product in ml_recommendations:
+        product["recommendation_source"] = "ml_model"
+    
+    # 5. Combine recommendations (prioritize ML recommendations)
+    combined_recommendations = ml_recommendations + formatted_new_products
+    
+    if appwrite_failed:
+        raise _DegradedRecommendations(combined_recommendations)
+    return combined_recommendations
+
+async def _fetch_room_style_products(room: str, style: str) -> List[Dict[str, Any]]:
+    """Query Appwrite for products that match the room and style"""
+    result = await appwrite_db.list_documents(
+        PRODUCTS_COLLECTION_ID,
+        [
+            Query.equal("category", room),
+            Query.equal("style", style)
+        ]
+    )
+    return result.get("documents", [])
+
+async def _fetch_flooring_products(flooring: str) -> List[Dict[str, Any]]:
+    """Query Appwrite for the selected flooring product"""
+    result = await appwrite_db.list_documents(
+        PRODUCTS_COLLECTION_ID,
+        [
+            Query.equal("category", "Flooring"),
+            Query.equal("name", flooring)
+        ]
+    )
+    return result.get("documents", [])
+
+async def _no_products() -> List[Dict[str, Any]]:
+    return []
+
+async def get_matching_products(room: str, style: str, flooring: str, refresh: bool = False,
+                                suppress_errors: bool = True) -> List[Dict[str, Any]]:
+    """Get products from Appwrite that match the user's preferences
+
+    The room/style and flooring queries run concurrently and are served from
+    `appwrite_query_cache`; `refresh` bypasses it. Errors yield no products
+    unless `suppress_errors` is False.
+    """
+    try:
+        # Query products that match the room and style, and the selected flooring
+        room_style_products, flooring_products = await asyncio.gather(
+            appwrite_query_cache.get_async(
+                ("room_style", room, style),
+                lambda: _fetch_room_style_products(room, style),
+                force_refresh=refresh
+            ),
+            appwrite_query_cache.get_async(
+                ("flooring", flooring),
+                lambda: _fetch_flooring_products(flooring),
+                force_refresh=refresh
+            ) if flooring else _no_products()
         )
         
-        # Convert Appwrite response to list of products
-        products = result.get("documents", [])
-        
-        # For flooring products, also include the selected flooring
-        if flooring:
-            flooring_result = databases.list_documents(
-                database_id=database_id,
-                collection_id=products_collection_id,
-                queries=[
-                    Query.equal("category", "Flooring"),
-                    Query.equal("name", flooring)
-                ]
-            )
-            flooring_products = flooring_result.get("documents", [])
-            products.extend(flooring_products)
-        
-        return products
+        return [*room_style_products, *flooring_products]
     
     except Exception as e:
+        if not suppress_errors:
+            raise
         print(f"Error fetching products from Appwrite: {str(e)}")
         return []
 
+@app.get("/api/cache-stats")
+async def get_cache_stats():
+    """Get hit/miss counters for the Appwrite query and recommendation caches"""
+    return {
+        "appwrite_queries": appwrite_query_cache.stats(),
+        "recommendations": recommendation_cache.stats(),
+    }
+
 # Keep your existing ML recommendation function
 def get_ml_recommendations(room: str, style: str, flooring: str) -> List[Dict[str, Any]]:
     """Get recommendations from the ML model"""
     # Your existing ML recommendation logic
     # This function should return a list of product dictionaries
     try:
-        # Load product data from your dataset
-        with open("data/products.json", "r") as f:
-            all_products = json.load(f)
-        
-        # Filter products based on room and style
-        matching_products = [
-            product for product in all_products
-            if product["category"] == room and product["style"] == style
-        ]
-        
-        # Add confidence scores
-        for product in matching_products:
-            product["confidence"] = 95  # High confidence for exact matches
-        
-        return matching_products
+        # Look up products by room and style in the cached catalog
+        # (returns copies, with a high confidence for exact matches)
+        return product_catalog.matching_products(room, style, confidence=95)
     except Exception as e:
         print(f"Error in ML recommendations: {str(e)}")
         return []
 
+def _format_floorplan_response(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Shape a classifier result into the classify-floorplan response"""
+    response = {
+        "shape": result["shape"],
+        "confidence": result["confidence"],
+        "size": "Calculated from image"
+    }
+    
+    # Outline measured from the same decoded image
+    measurement = result.get("measurement")
+    if measurement:
+        unit = measurement["unit"]
+        response["size"] = (f"{measurement['area']:g} sqm" if unit == "m"
+                            else f"{measurement['width']} x {measurement['height']} px")
+        response["dimensions"] = {"width": measurement["width"], "height": measurement["height"], "unit": unit}
+        response["area"] = {"value": measurement["area"], "unit": "sqm" if unit == "m" else "px"}
+        response["bounding_box"] = measurement["bounding_box"]
+        response["fill_ratio"] = measurement["fill_ratio"]
+    
+    # Add additional information if available
+    if "all_confidences" in result:
+        response["all_confidences"] = result["all_confidences"]
+    if "low_confidence" in result:
+        response["low_confidence"] = result["low_confidence"]
+    if "error" in result:
+        response["error"] = result["error"]
+    
+    return response
+
+# Batch uploads: at most this many files, and this many bytes in total, per request
+FLOORPLAN_BATCH_MAX_FILES = int(os.getenv('FLOORPLAN_BATCH_MAX_FILES', '16'))
+FLOORPLAN_BATCH_MAX_BYTES = int(os.getenv('FLOORPLAN_BATCH_MAX_BYTES', str(64 * 1024 * 1024)))
+
+async def _read_floorplan_upload(file: UploadFile, batch_budget: Optional[int] = None) -> bytes:
+    """Read an upload without buffering more than the classifier's size limit or the rest of the batch budget"""
+    limit = floorplan_classifier.max_upload_bytes
+    over_batch = batch_budget is not None and batch_budget < limit
+    read_limit = batch_budget if over_batch else limit
+    contents = await file.read(read_limit + 1)
+    if len(contents) > read_limit:
+        detail = (f"Floorplan images exceed {FLOORPLAN_BATCH_MAX_BYTES} bytes in total" if over_batch
+                  else f"Floorplan image exceeds {limit} bytes")
+        raise HTTPException(status_code=413, detail=detail)
+    return contents
+
+def _ensure_floorplan_model():
+    """Make sure the floorplan model is loaded"""
+    if floorplan_slot.state in ("missing", "failed"):
+        raise HTTPException(
+            status_code=500, 
+            detail=f"Floorplan model not found at {floorplan_model_file}. Please ensure the model file exists."
+        )
+    try:
+        floorplan_slot.get()
+    except ModelNotReady as e:
+        # Still loading in the background: ask the client to retry shortly
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+
 # New endpoint for floorplan classification
 @app.post("/api/classify-floorplan")
-async def classify_floorplan(file: UploadFile = File(...)):
-    """Classify a floorplan image using the Teachable Machine model"""
+async def classify_floorplan(file: UploadFile = File(...), pixels_per_meter: Optional[float] = Form(None, gt=0)):
+    """Classify a floorplan image and measure its outline
+    
+    The upload is decoded once; the same pixels feed the Teachable Machine
+    model and the OpenCV outline measurement. Dimensions and area are in
+    metres / square metres when `pixels_per_meter` (the plan's scale) is
+    given, otherwise in pixels.
+    """
     try:
         # Read the uploaded file
-        contents = await file.read()
+        contents = await _read_floorplan_upload(file)
         
         # Ensure the floorplan model is loaded
-        if floorplan_classifier.model is None:
-            # Try to load the model (no need to train as we're using a pre-trained model)
-            if not floorplan_classifier.load_model():
-                raise HTTPException(
-                    status_code=500, 
-                    detail=f"Floorplan model not found at {FLOORPLAN_MODEL_PATH}. Please ensure the model file exists."
-                )
-        
-        # Predict the floorplan shape
-        result = floorplan_classifier.predict(contents)
+        _ensure_floorplan_model()
         
-        # Prepare response
-        response = {
-            "shape": result["shape"],
-            "confidence": result["confidence"],
-            "size": "Calculated from image"  # Size calculation is handled separately
-        }
+        # Decode and measure off the event loop, then predict through the micro-batching scheduler
+        try:
+            image, measurement = await inference_pool.run(decode_and_measure_in_worker, contents, pixels_per_meter)
+            probabilities = await floorplan_scheduler.infer(image)
+            result = {**floorplan_classifier.format_prediction(probabilities), "measurement": measurement}
+        except OVERLOAD_ERRORS:
+            raise
+        except Exception as e:
+            print(f"Error in prediction: {str(e)}")
+            result = {"shape": "error", "confidence": 0.0, "error": str(e)}
         
-        # Add additional information if available
-        if "all_confidences" in result:
-            response["all_confidences"] = result["all_confidences"]
-        if "low_confidence" in result:
-            response["low_confidence"] = result["low_confidence"]
-        if "error" in result:
-            response["error"] = result["error"]
-            
-        return response
+        return _format_floorplan_response(result)
     
+    except OVERLOAD_ERRORS as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error classifying floorplan: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to classify floorplan: {str(e)}")
 
+@app.post("/api/classify-floorplans")
+async def classify_floorplans(files: List[UploadFile] = File(...), pixels_per_meter: Optional[float] = Form(None, gt=0)):
+    """Classify and measure several floorplan images with one batched model call
+    
+    Requests with more than FLOORPLAN_BATCH_MAX_FILES files, or more than
+    FLOORPLAN_BATCH_MAX_BYTES in total, are rejected with 413.
+    """
+    if len(files) > FLOORPLAN_BATCH_MAX_FILES:
+        raise HTTPException(status_code=413, detail=f"At most {FLOORPLAN_BATCH_MAX_FILES} floorplans per request")
+    try:
+        contents, budget = [], FLOORPLAN_BATCH_MAX_BYTES
+        for file in files:
+            contents.append(await _read_floorplan_upload(file, budget))
+            budget -= len(contents[-1])
+        
+        _ensure_floorplan_model()
+        
+        # One result per uploaded file, in upload order
+        results = await inference_pool.run(predict_batch_in_worker, contents, pixels_per_meter)
+        
+        return {"results": [_format_floorplan_response(result) for result in results]}
+    
+    except OVERLOAD_ERRORS as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Error classifying floorplans: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to classify floorplans: {str(e)}")
+
+@app.get("/api/inference-stats")
+async def get_inference_stats():
+    """Get queue and latency stats of the floorplan inference scheduler"""
+    return {"floorplan": floorplan_scheduler.stats()}
+
+@app.get("/api/pool-stats")
+async def get_pool_stats():
+    """Get utilization and queue stats of the execution pools"""
+    return {"inference": inference_pool.stats(), "io": io_pool.stats()}
+
 # New endpoint for generating quantity recommendations using Gemini API
 class QuantityRequest(BaseModel):
     product_name: str
     room_size: str
+    floorplan_shape: Optional[str] = None
 
 class ProductInfoResponse(BaseModel):
     quantity: str
     size: str
 
+# Answered by the model but unparseable, or Gemini unavailable: plausible, never cached
+FALLBACK_QUANTITY = {"quantity": "1 pc", "size": "0.5 sqm"}
+FLOORING_TILE_SQM = 0.093
+# Bulk requests: products per Gemini prompt, and per request
+BULK_QUANTITY_MAX_ITEMS = int(os.getenv("BULK_QUANTITY_MAX_ITEMS", "20"))
+BULK_QUANTITY_MAX_PRODUCTS = 200
+GEMINI_BULK_TIMEOUT = float(os.getenv("GEMINI_BULK_TIMEOUT", "8"))
+GEMINI_ERRORS = (CircuitOpen, GeminiError, httpx.HTTPError, asyncio.TimeoutError, ValueError)
+
+gemini_client = AsyncGeminiClient(
+    os.getenv("GEMINI_API_KEY"),
+    base_url=os.getenv("GEMINI_API_URL", GEMINI_API_URL),
+    timeout=float(os.getenv("GEMINI_TIMEOUT", "4")),
+    breaker=CircuitBreaker(
+        failure_threshold=int(os.getenv("GEMINI_BREAKER_FAILURES", "5")),
+        reset_timeout=float(os.getenv("GEMINI_BREAKER_RESET", "30")),
+    ),
+)
+# Quantity answers: in-memory LRU in front of an on-disk store; concurrent
+# identical questions share one Gemini call
+quantity_store = QuantityStore(os.getenv("QUANTITY_CACHE_PATH", "src/models/attrs/quantity_cache.sqlite"))
+quantity_cache = QueryCache(
+    ttl=quantity_store.ttl,
+    stale_ttl=0,
+    max_entries=int(os.getenv("QUANTITY_CACHE_MAX_ENTRIES", "4096")),
+)
+# Local footprint table; Gemini only answers products it cannot classify, and
+# every Gemini answer (including those stored by earlier runs) is learned
+quantity_estimator = QuantityEstimator()
+for _product, _room_bucket, _answer in quantity_store.answers():
+    quantity_estimator.learn(_product, _room_bucket, _answer)
+
+@app.on_event("shutdown")
+async def close_gemini_session():
+    await gemini_client.aclose()
+
+class _FallbackQuantity(Exception):
+    """Carries the fallback answer out of the cache fetch, so it is returned but never cached"""
+    def __init__(self, reason):
+        super().__init__(reason)
+        self.answer = FALLBACK_QUANTITY
+
+def _is_flooring_product(product_name: str) -> bool:
+    name = product_name.lower()
+    return "flooring" in name or "tile" in name
+
+def _product_category(product_name: str) -> Optional[str]:
+    """Catalog category of a product, if the catalog knows the name"""
+    lookup = _catalog_index()
+    rows = lookup.name_index.get(product_name)
+    return lookup.df['CATEGORY'].iat[rows[0]] if rows is not None and len(rows) else None
+
+def _local_quantity(product_name: str, room_size, floorplan_shape: Optional[str] = None) -> Optional[Dict[str, str]]:
+    """Answer without Gemini: tile math for flooring, else the footprint table (None if unsure)"""
+    if _is_flooring_product(product_name) or _product_category(product_name) == FLOORING_CATEGORY:
+        return _tiles_needed(room_size)
+    return quantity_estimator.estimate(product_name, room_size, floorplan_shape)
+
+def _tiles_needed(room_size) -> Dict[str, str]:
+    """Flooring uses a fixed tile size of 0.093 sqm"""
+    return {"quantity": f"{math.ceil(float(room_size) / FLOORING_TILE_SQM)} pcs", "size": f"{FLOORING_TILE_SQM} sqm"}
+
+async def _ask_gemini(product: str, room_bucket: float) -> Dict[str, str]:
+    try:
+        response_text = await gemini_client.generate(quantity_prompt(product, f"{room_bucket:g}"))
+    except GEMINI_ERRORS as e:
+        print(f"Gemini unavailable, using fallback quantity: {type(e).__name__}: {str(e)}")
+        raise _FallbackQuantity(str(e))
+    answer = parse_quantity_answer(response_text)
+    if answer is None:
+        raise _FallbackQuantity("unparseable Gemini answer")
+    return answer
+
+async def _fetch_quantity(product: str, room_bucket: float, ask=_ask_gemini) -> Dict[str, str]:
+    """Disk store first, then `ask` (one Gemini call, or a slot in a bulk prompt); answers are persisted"""
+    answer = await io_pool.run(quantity_store.get, product, room_bucket)
+    if answer is None:
+        answer = await ask(product, room_bucket)
+        await io_pool.run(quantity_store.put, product, room_bucket, answer)
+    quantity_estimator.learn(product, room_bucket, answer)
+    return answer
+
+async def _cached_quantity(product: str, room_bucket: float, ask=_ask_gemini) -> Dict[str, str]:
+    try:
+        return dict(await quantity_cache.get_async(
+            ("quantity", product, room_bucket), lambda: _fetch_quantity(product, room_bucket, ask)
+        ))
+    except _FallbackQuantity as e:
+        return dict(e.answer)
+
+async def _estimate_quantity(product_name: str, room_size, floorplan_shape: Optional[str] = None) -> Dict[str, str]:
+    room_bucket = room_size_bucket(room_size)
+    answer = _local_quantity(product_name, room_size, floorplan_shape)
+    if answer is not None:
+        return answer
+    return await _cached_quantity(normalize_product_name(product_name), room_bucket)
+
+async def _ask_gemini_bulk(products: List[str], room_bucket: float) -> Dict[str, Dict[str, str]]:
+    """Quantity and size of several products from one Gemini prompt"""
+    try:
+        response_text = await gemini_client.generate(
+            bulk_quantity_prompt(products, f"{room_bucket:g}"), timeout=GEMINI_BULK_TIMEOUT
+        )
+    except GEMINI_ERRORS as e:
+        print(f"Gemini unavailable, using fallback quantities: {type(e).__name__}: {str(e)}")
+        raise
+    answers = parse_bulk_answer(response_text, len(products))
+    return {products[index]: answer for index, answer in answers.items()}
+
+async def _estimate_quantities(product_names: List[str], room_size,
+                               floorplan_shape: Optional[str] = None) -> List[Dict[str, str]]:
+    """Answers for a whole product list: local ones first, cached products from the caches,
+    and every remaining product from one bulk prompt per BULK_QUANTITY_MAX_ITEMS products"""
+    room_bucket = room_size_bucket(room_size)
+    local = {name: _local_quantity(name, room_size, floorplan_shape) for name in dict.fromkeys(product_names)}
+    products = {name: normalize_product_name(name) for name, answer in local.items() if answer is None}
+    batch = QuantityBatch(
+        products.values(),
+        lambda chunk: _ask_gemini_bulk(chunk, room_bucket),
+        max_items=BULK_QUANTITY_MAX_ITEMS,
+        missing_error=_FallbackQuantity,
+    )
+    
+    async def lookup(product):
+        try:
+            return await _cached_quantity(product, room_bucket, lambda product, _: batch.answer(product))
+        finally:
+            batch.settle(product)
+    
+    unique_products = list(dict.fromkeys(products.values()))
+    answers = dict(zip(unique_products, await asyncio.gather(*(lookup(product) for product in unique_products))))
+    return [
+        dict(answers[products[name]]) if name in products else dict(local[name])
+        for name in product_names
+    ]
+
 @app.post("/api/generate-quantity/")
 async def generate_quantity(request: QuantityRequest):
-    """Generate quantity and size recommendation for a product using Gemini API"""
+    """Generate quantity and size recommendation for a product
+    
+    Products the local footprint table classifies confidently are answered
+    locally, scaled by room size and floorplan shape. Only the rest go to
+    Gemini; those answers are cached per normalized product name and room
+    size bucket (in memory and on disk) and learned by the table. Gemini
+    calls have a hard deadline and a circuit breaker; when Gemini is slow or
+    down the fallback answer is returned.
+    """
     try:
-        # Get API key from environment variables
-        api_key = os.getenv("GEMINI_API_KEY")
-        if not api_key:
-            raise HTTPException(status_code=500, detail="Gemini API key not found in environment variables")
-        
-        # For flooring products, use fixed size of 0.093 sqm
-        if request.product_name.lower().find("flooring") >= 0 or request.product_name.lower().find("tile") >= 0:
-            # Calculate quantity based on room size
-            size = float(request.room_size)
-            sqFeet = size / 0.093
-            tilesNeeded = math.ceil(sqFeet)
-            return {"quantity": f"{tilesNeeded} pcs", "size": "0.093 sqm"}
-        
-        # Prepare the prompt for Gemini API for non-flooring products
-        prompt = f"Given a room size of {request.room_size} square meters, and a recommended product named \"{request.product_name}\", I need two pieces of information:\n\n1. Suggest an appropriate quantity of that product to be placed in the room.\n2. Estimate the approximate size of this product in square meters (calculate as length x width).\n\nProvide your response in this exact format:\nQuantity: [number] pcs\nSize: [number] sqm\n\nEnsure the quantity makes sense for a typical room layout and the size is realistic for this type of product. Don't recommend the same values for every product."
-        
-        # Call Gemini API
-        url = "https://generativelanguage.googleapis.com/v1/models/gemini-2.0-flash:generateContent"
-        headers = {
-            "Content-Type": "application/json",
-            "x-goog-api-key": api_key
-        }
-        payload = {
-            "contents": [
-                {
-                    "parts": [
-                        {"text": prompt}
-                    ]
-                }
-            ]
-        }
-        
-        response = requests.post(url, headers=headers, json=payload)
-        
-        # Check if the request was successful
-        if response.status_code != 200:
-            print(f"Gemini API error: {response.status_code} - {response.text}")
-            return {"quantity": "1 pc", "size": "0.5 sqm"}  # Fallback values
-        
-        # Parse the response
-        result = response.json()
-        
-        # Extract the generated text
-        if "candidates" in result and len(result["candidates"]) > 0:
-            candidate = result["candidates"][0]
-            if "content" in candidate and "parts" in candidate["content"] and len(candidate["content"]["parts"]) > 0:
-                response_text = candidate["content"]["parts"][0]["text"].strip()
-                
-                # Parse the response to extract quantity and size
-                quantity = "1 pc"
-                size = "0.5 sqm"
-                
-                # Look for quantity in the response
-                quantity_match = re.search(r"Quantity:\s*([\d.]+)\s*(?:pc|pcs|piece|pieces|unit|units)", response_text, re.IGNORECASE)
-                if quantity_match:
-                    quantity = f"{quantity_match.group(1)} pcs"
-                
-                # Look for size in the response
-                size_match = re.search(r"Size:\s*([\d.]+)\s*(?:sqm|sq m|square meter|square meters)", response_text, re.IGNORECASE)
-                if size_match:
-                    size = f"{size_match.group(1)} sqm"
-                
-                return {"quantity": quantity, "size": size}
-        
-        # If we couldn't extract the information, return fallback values
-        return {"quantity": "1 pc", "size": "0.5 sqm"}
+        return await _estimate_quantity(request.product_name, request.room_size, request.floorplan_shape)
     
+    except OVERLOAD_ERRORS as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         print(f"Error generating product information: {str(e)}")
         # Return fallback values in case of any error
         return {"quantity": "--", "size": "--"}
 
+class BulkQuantityRequest(BaseModel):
+    room_size: str
+    product_names: List[str]
+    floorplan_shape: Optional[str] = None
+
+@app.post("/api/generate-quantity/bulk")
+async def generate_quantities(request: BulkQuantityRequest):
+    """Quantity and size for every product of a recommendation list, in request order
+    
+    Flooring and products the footprint table knows are answered locally and
+    cached products from the caches; the rest share one Gemini prompt (a few
+    concurrent ones for long lists), so a whole room costs at most about one
+    Gemini round-trip.
+    """
+    if len(request.product_names) > BULK_QUANTITY_MAX_PRODUCTS:
+        raise HTTPException(status_code=400, detail=f"At most {BULK_QUANTITY_MAX_PRODUCTS} products per request")
+    try:
+        results = await _estimate_quantities(request.product_names, request.room_size, request.floorplan_shape)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except OVERLOAD_ERRORS as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    return {
+        "room_size": request.room_size,
+        "results": [{"product_name": name, **result} for name, result in zip(request.product_names, results)],
+    }
+
+@app.get("/api/quantity-stats")
+async def get_quantity_stats():
+    """Hit/miss counters of the quantity cache and local estimator, and the state of the Gemini circuit breaker"""
+    return {
+        "cache": quantity_cache.stats(),
+        "stored": await io_pool.run(len, quantity_store),
+        "local_estimator": quantity_estimator.stats(),
+        "gemini_breaker": gemini_client.breaker.status(),
+    }
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="localhost", port=8000)
\ No newline at end of file
@@ -0,0 +1,176 @@
+import os
+import json
+import time
+import shutil
+import numpy as np
+import pandas as pd
+
+
+BUNDLE_FORMAT = "furniture-recommender-bundle"
+BUNDLE_VERSION = 1
+MANIFEST_NAME = "manifest.json"
+
+
+class BundleFormatError(ValueError):
+    """Raised when a directory is not a readable model bundle"""
+
+
+def is_bundle(path):
+    return os.path.isfile(os.path.join(path, MANIFEST_NAME))
+
+
+def write_bundle(path, arrays, metadata):
+    """Write named arrays plus JSON metadata as a model bundle directory
+
+    Each array is a plain `.npy` file so readers can memory-map it; the
+    manifest records the format version, metadata and every array's dtype and
+    shape. The bundle is written next to `path` and swapped in with renames,
+    so a reader never sees a half-written bundle.
+    """
+    path = os.path.normpath(path)
+    staging_path = f"{path}.tmp-{os.getpid()}"
+    shutil.rmtree(staging_path, ignore_errors=True)
+    os.makedirs(staging_path)
+
+    entries = {}
+    for name, array in arrays.items():
+        array = np.asarray(array)
+        if array.dtype.hasobject:
+            raise BundleFormatError(f"Array {name} has object dtype and cannot be memory-mapped")
+        file_name = f"{name}.npy"
+        np.save(os.path.join(staging_path, file_name), array, allow_pickle=False)
+        entries[name] = {"file": file_name, "dtype": array.dtype.str, "shape": list(array.shape)}
+
+    manifest = {
+        "format": BUNDLE_FORMAT,
+        "version": BUNDLE_VERSION,
+        "created_at": time.time(),
+        "metadata": metadata,
+        "arrays": entries,
+    }
+    with open(os.path.join(staging_path, MANIFEST_NAME), "w") as f:
+        json.dump(manifest, f, indent=2)
+
+    # Swap the new bundle in, keeping the old one until the rename succeeded
+    previous_path = f"{path}.old-{os.getpid()}"
+    if os.path.exists(path):
+        os.rename(path, previous_path)
+    os.rename(staging_path, path)
+    shutil.rmtree(previous_path, ignore_errors=True)
+    return path
+
+
+def read_bundle(path, mmap=True):
+    """Read a bundle's metadata and arrays
+
+    With `mmap=True` arrays are read-only memory maps: loading is near-instant
+    and processes serving the same bundle share its pages through the OS page
+    cache. Returns (metadata, arrays).
+    """
+    manifest_path = os.path.join(path, MANIFEST_NAME)
+    if not os.path.isfile(manifest_path):
+        raise BundleFormatError(f"No bundle manifest at {manifest_path}")
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+    if manifest.get("format") != BUNDLE_FORMAT:
+        raise BundleFormatError(f"{path} is not a {BUNDLE_FORMAT}")
+    if manifest.get("version") != BUNDLE_VERSION:
+        raise BundleFormatError(
+            f"Unsupported bundle version {manifest.get('version')} (expected {BUNDLE_VERSION})"
+        )
+
+    arrays = {}
+    for name, entry in manifest["arrays"].items():
+        # Scalars are read outright; memory maps only pay off for real arrays
+        array = np.load(os.path.join(path, entry["file"]),
+                        mmap_mode="r" if mmap and entry["shape"] else None, allow_pickle=False)
+        if array.dtype.str != entry["dtype"] or list(array.shape) != entry["shape"]:
+            raise BundleFormatError(f"Array {name} does not match the bundle manifest")
+        arrays[name] = array
+    return manifest["metadata"], arrays
+
+
+def read_bundle_frame(path, columns_key):
+    """Read only a dataframe from a bundle (e.g. the catalog), without building any model"""
+    metadata, arrays = read_bundle(path)
+    return frame_from_arrays(arrays, metadata[columns_key])
+
+
+def resolve_legacy_path(stored_path, model_path):
+    """Locate a joblib/npy artifact recorded in the attrs of a legacy h5 model
+
+    The attrs hold whatever path the training machine used, often with
+    Windows separators (`src/models\\attrs\\vectorizer.joblib`). Tried in
+    order: the stored path, the stored path with `/` separators, and the file
+    name under the `attrs` directory next to the model. Returns the stored
+    path (with `/` separators) if none exists, so the caller's error names it.
+    """
+    if isinstance(stored_path, bytes):
+        stored_path = stored_path.decode("utf-8")
+    normalized = stored_path.replace("\\", "/")
+    candidates = [
+        stored_path,
+        normalized,
+        os.path.join(os.path.dirname(model_path), "attrs", os.path.basename(normalized)),
+    ]
+    return next((path for path in candidates if os.path.exists(path)), normalized)
+
+
+def encode_strings(values):
+    """Encode strings as one UTF-8 buffer plus character offsets and a null mask"""
+    nulls = np.array([value is None or value is pd.NA or (isinstance(value, float) and np.isnan(value))
+                      for value in values], dtype=bool)
+    strings = ["" if null else str(value) for value, null in zip(values, nulls)]
+    offsets = np.zeros(len(strings) + 1, dtype=np.int64)
+    np.cumsum([len(s) for s in strings], out=offsets[1:])
+    data = np.frombuffer("".join(strings).encode("utf-8"), dtype=np.uint8)
+    return data, offsets, nulls
+
+
+def decode_strings(data, offsets, nulls=None):
+    """Inverse of `encode_strings`: one decode, then slicing by character offsets"""
+    text = bytes(data).decode("utf-8")
+    values = [text[start:end] for start, end in zip(offsets[:-1].tolist(), offsets[1:].tolist())]
+    if nulls is not None:
+        for row in np.flatnonzero(nulls):
+            values[row] = None
+    return values
+
+
+def frame_to_arrays(df, prefix="catalog"):
+    """Columnar layout of a dataframe: numeric columns as-is, text as encoded strings
+
+    Returns (arrays, columns) where `columns` is the JSON-safe column
+    description to keep in the bundle metadata.
+    """
+    arrays = {}
+    columns = []
+    for position, column in enumerate(df.columns):
+        key = f"{prefix}_{position}"
+        series = df[column]
+        if pd.api.types.is_bool_dtype(series) or pd.api.types.is_numeric_dtype(series):
+            if series.isna().any() and not pd.api.types.is_float_dtype(series):
+                series = series.astype(float)
+            arrays[key] = series.to_numpy()
+            columns.append({"name": column, "kind": "numeric", "key": key})
+        else:
+            data, offsets, nulls = encode_strings(series.tolist())
+            arrays[f"{key}_data"] = data
+            arrays[f"{key}_offsets"] = offsets
+            arrays[f"{key}_nulls"] = nulls
+            columns.append({"name": column, "kind": "string", "key": key})
+    return arrays, columns
+
+
+def frame_from_arrays(arrays, columns):
+    """Rebuild the dataframe written by `frame_to_arrays`"""
+    data = {}
+    for column in columns:
+        key = column["key"]
+        if column["kind"] == "numeric":
+            data[column["name"]] = np.array(arrays[key])
+        else:
+            data[column["name"]] = decode_strings(
+                arrays[f"{key}_data"], arrays[f"{key}_offsets"], arrays[f"{key}_nulls"]
+            )
+    return pd.DataFrame(data, columns=[column["name"] for column in columns])
@@ -0,0 +1,205 @@
+import time
+import threading
+
+
+class ModelNotReady(Exception):
+    """Raised when a model is requested before it finished loading"""
+
+
+class ModelSlot:
+    """A model that is loaded and warmed up off the request path
+
+    State moves pending -> loading -> warming -> ready, or ends in "missing"
+    (`load_fn` returned None, e.g. no model file) or "failed". Requests call
+    `get`, which raises ModelNotReady until the model is ready. A slot that is
+    not `required` does not hold back readiness once it has settled.
+
+    `generation` counts the models that have gone live in this slot; `swap`
+    replaces the live model with a single assignment, so a request that
+    already holds the old model finishes on it.
+    """
+
+    def __init__(self, name, load_fn, warm_up_fn=None, required=True):
+        self.name = name
+        self.load_fn = load_fn
+        self.warm_up_fn = warm_up_fn
+        self.required = required
+        self.state = "pending"
+        self.error = None
+        self.value = None
+        self.load_seconds = None
+        self.warm_up_seconds = None
+        self.generation = 0
+        self.loaded_at = None
+        self._ready = threading.Event()
+
+    def load(self):
+        """Load and warm up the model in the calling thread"""
+        try:
+            self.state = "loading"
+            started = time.perf_counter()
+            value = self.load_fn()
+            self.load_seconds = time.perf_counter() - started
+            if value is None:
+                self.state = "missing"
+                return None
+
+            self.state = "warming"
+            started = time.perf_counter()
+            if self.warm_up_fn is not None:
+                self.warm_up_fn(value)
+            self.warm_up_seconds = time.perf_counter() - started
+
+            self.swap(value)
+            return value
+        except Exception as e:
+            print(f"Error loading {self.name} model: {str(e)}")
+            self.error = str(e)
+            self.state = "failed"
+            return None
+        finally:
+            self._ready.set()
+
+    def swap(self, value):
+        """Make `value` the live model"""
+        self.value = value
+        self.error = None
+        self.generation += 1
+        self.loaded_at = time.time()
+        self.state = "ready"
+
+    @property
+    def settled(self):
+        return self.state in ("ready", "missing", "failed")
+
+    @property
+    def is_ready(self):
+        return self.state == "ready"
+
+    def wait(self, timeout=None):
+        """Block until loading finished; returns whether the model is ready"""
+        self._ready.wait(timeout)
+        return self.is_ready
+
+    def get(self):
+        if self.state != "ready":
+            raise ModelNotReady(f"{self.name} model is {self.state}")
+        return self.value
+
+    def status(self):
+        return {
+            "state": self.state,
+            "required": self.required,
+            "generation": self.generation,
+            "loaded_at": self.loaded_at,
+            "load_seconds": self.load_seconds,
+            "warm_up_seconds": self.warm_up_seconds,
+            "error": self.error,
+        }
+
+
+def load_in_background(slots, name="model-loader"):
+    """Load slots one after another on a daemon thread (heavy imports stay serialized)"""
+    def run():
+        for slot in slots:
+            slot.load()
+
+    thread = threading.Thread(target=run, name=name, daemon=True)
+    thread.start()
+    return thread
+
+
+def all_ready(slots):
+    """Readiness: required slots are ready and optional ones have settled"""
+    return all(slot.is_ready if slot.required else slot.settled for slot in slots)
+
+
+class ModelRefresher:
+    """Rebuilds a slot's model in the background and swaps it in once validated
+
+    `build_fn` returns a new model, or None when there is nothing new; keyword
+    arguments of `trigger` are passed on to it.
+    `validate_fn` raises (or returns False) to reject a candidate, and the
+    live model then stays in place. `publish_fn(candidate, **build_kwargs)`
+    runs only for a validated candidate, right before the swap (e.g. to save
+    it where the next start loads it from); if it raises, nothing is swapped.
+    Only one refresh runs at a time. With `interval` seconds,
+    `start_schedule` refreshes periodically.
+    """
+
+    def __init__(self, slot, build_fn, validate_fn=None, interval=None, publish_fn=None):
+        self.slot = slot
+        self.build_fn = build_fn
+        self.validate_fn = validate_fn
+        self.publish_fn = publish_fn
+        self.interval = interval
+        self.running = False
+        self.refreshes = 0
+        self.swaps = 0
+        self.failures = 0
+        self.last_result = None
+        self._lock = threading.Lock()
+
+    def trigger(self, reason="manual", **build_kwargs):
+        """Start a refresh on a background thread; returns False if one is already running"""
+        with self._lock:
+            if self.running:
+                return False
+            self.running = True
+        threading.Thread(
+            target=self._run, args=(reason, build_kwargs), name=f"{self.slot.name}-refresh", daemon=True
+        ).start()
+        return True
+
+    def _run(self, reason, build_kwargs):
+        started = time.perf_counter()
+        result = {"reason": reason, "started_at": time.time(), **build_kwargs}
+        try:
+            candidate = self.build_fn(**build_kwargs)
+            if candidate is None:
+                result["outcome"] = "unchanged"
+            else:
+                if self.validate_fn is not None and self.validate_fn(candidate) is False:
+                    raise ValueError("validation rejected the new model")
+                if self.publish_fn is not None:
+                    self.publish_fn(candidate, **build_kwargs)
+                self.slot.swap(candidate)
+                self.swaps += 1
+                result["outcome"] = "swapped"
+                result["generation"] = self.slot.generation
+        except Exception as e:
+            print(f"Error refreshing {self.slot.name} model: {str(e)}")
+            self.failures += 1
+            result["outcome"] = "failed"
+            result["error"] = str(e)
+        finally:
+            result["seconds"] = time.perf_counter() - started
+            self.refreshes += 1
+            self.last_result = result
+            with self._lock:
+                self.running = False
+
+    def start_schedule(self):
+        """Refresh every `interval` seconds on a daemon thread (no-op without an interval)"""
+        if not self.interval:
+            return None
+
+        def run():
+            while True:
+                time.sleep(self.interval)
+                self.trigger("scheduled")
+
+        thread = threading.Thread(target=run, name=f"{self.slot.name}-refresh-schedule", daemon=True)
+        thread.start()
+        return thread
+
+    def status(self):
+        return {
+            "running": self.running,
+            "interval": self.interval,
+            "refreshes": self.refreshes,
+            "swaps": self.swaps,
+            "failures": self.failures,
+            "generation": self.slot.generation,
+            "last_result": self.last_result,
+        }
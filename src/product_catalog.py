@@ -0,0 +1,76 @@
+import os
+import json
+import time
+import threading
+
+
+class CatalogSnapshot:
+    """Immutable view of one version of the product catalog, indexed by (category, style)"""
+
+    def __init__(self, products, stat_key):
+        self.products = tuple(products)
+        self.stat_key = stat_key
+        self.by_category_style = {}
+        for product in self.products:
+            key = (product.get("category"), product.get("style"))
+            self.by_category_style.setdefault(key, []).append(product)
+
+    def matching(self, category, style):
+        return self.by_category_style.get((category, style), [])
+
+
+class ProductCatalog:
+    """In-memory product catalog loaded from a JSON file and reloaded when it changes
+
+    The file is re-parsed only when its mtime or size changes, checked at most
+    once per `check_interval` seconds. A new snapshot is built off to the side
+    and swapped in with a single assignment, so readers always see a complete
+    version. Records are shared between requests and must not be mutated;
+    `matching_products` returns copies.
+    """
+
+    def __init__(self, path, check_interval=1.0):
+        self.path = path
+        self.check_interval = check_interval
+        self._snapshot = None
+        self._last_check = 0.0
+        self._reload_lock = threading.Lock()
+
+    def _stat_key(self):
+        stat = os.stat(self.path)
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def _load(self, stat_key):
+        with open(self.path, "r") as f:
+            products = json.load(f)
+        return CatalogSnapshot(products, stat_key)
+
+    def snapshot(self):
+        """Return the current snapshot, reloading first if the file changed"""
+        now = time.monotonic()
+        if self._snapshot is not None and now - self._last_check < self.check_interval:
+            return self._snapshot
+
+        with self._reload_lock:
+            current = self._snapshot
+            if current is not None and now - self._last_check < self.check_interval:
+                return current
+
+            try:
+                stat_key = self._stat_key()
+                if current is None or stat_key != current.stat_key:
+                    self._snapshot = self._load(stat_key)
+            except (OSError, ValueError) as e:
+                # A missing or half-written file should not take a loaded catalog down
+                if current is None:
+                    raise
+                print(f"Error reloading product catalog, keeping previous version: {str(e)}")
+            self._last_check = now
+            return self._snapshot
+
+    def matching_products(self, category, style, **extra_fields):
+        """Copies of the products for (category, style), with extra fields set on each copy"""
+        return [
+            {**product, **extra_fields}
+            for product in self.snapshot().matching(category, style)
+        ]
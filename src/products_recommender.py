@@ -4,6 +4,11 @@ import h5py
 import joblib
 import os
 import re
+import sys
+import math
+import uuid
+import threading
+import scipy.sparse as sp
 import tensorflow as tf
 
 def get_direct_image_link(file_id):
@@ -21,6 +26,23 @@ from appwrite.services.storage import Storage
 from appwrite.id import ID
 from appwrite.query import Query
 
+# Add project root to path so sibling modules resolve when run as a script
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.ann_index import build_index, load_index, index_from_arrays
+from src.model_bundle import (
+    write_bundle,
+    read_bundle,
+    is_bundle,
+    encode_strings,
+    decode_strings,
+    frame_to_arrays,
+    frame_from_arrays,
+    resolve_legacy_path,
+)
+from src.catalog_index import CatalogIndex, StyleSimilarity
+from src.query_cache import QueryCache
+
 # Appwrite configuration - using environment variables
 import os
 ENDPOINT = os.getenv('VITE_APPWRITE_ENDPOINT')
@@ -30,18 +52,101 @@ PRODUCTS_COLLECTION_ID = os.getenv('VITE_APPWRITE_PRODUCTS_COLLECTION_ID')
 BUCKET_ID = os.getenv('VITE_APPWRITE_BUCKET_ID')
 API_KEY = os.getenv('VITE_APPWRITE_API_KEY')
 
+# Local copy of the product catalog plus the last-sync marker for incremental syncs
+CATALOG_SNAPSHOT_PATH = 'src/models/attrs/catalog_snapshot.joblib'
+PRODUCT_COLUMNS = ['PRODUCT_NAME', 'CATEGORY', 'STYLE', 'IMAGE_URL', 'file_id']
+
+# Versioned, memory-mappable model bundle (see src/model_bundle.py)
+MODEL_BUNDLE_DIR = 'recommender_bundle'
+# TfidfVectorizer settings recorded in the bundle (the JSON-safe ones)
+VECTORIZER_PARAMS = ['lowercase', 'stop_words', 'ngram_range', 'analyzer', 'token_pattern',
+                     'min_df', 'max_df', 'max_features', 'norm', 'use_idf', 'smooth_idf', 'sublinear_tf']
+
+# Recommendation results memoized per catalog/model version
+RESULT_CACHE_MAX_ENTRIES = 4096
+
+# Incremental catalog updates: share of live rows the fitted vocabulary does not
+# cover before a full retrain is required, and share of retired rows before compaction
+VOCABULARY_DRIFT_THRESHOLD = 0.1
+MAX_TOMBSTONE_RATIO = 0.2
+
+# Inputs up to this many rows are embedded with the NumPy forward pass
+NUMPY_EMBEDDING_MAX_ROWS = 64
+# Rows per call of the compiled encoder when embedding the whole catalog
+EMBEDDING_BATCH_SIZE = 4096
+
+def _l2_normalize(matrix, epsilon=1e-12):
+    """L2-normalize rows of a matrix (zero rows stay zero)"""
+    squared_norms = np.einsum('ij,ij->i', matrix, matrix)[:, None]
+    return matrix / np.sqrt(np.maximum(squared_norms, epsilon))
+
+class SparseFeatureBatches(keras.utils.Sequence):
+    """Autoencoder training batches densified from a sparse feature matrix
+
+    Only one batch is ever dense at a time, so training memory scales with
+    the batch size rather than catalog size times feature width.
+    """
+
+    def __init__(self, features, batch_size=32, shuffle=True, seed=42):
+        super().__init__()
+        self.features = features
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self._rng = np.random.default_rng(seed)
+        self._order = np.arange(features.shape[0])
+        self.on_epoch_end()
+
+    def __len__(self):
+        return int(np.ceil(self.features.shape[0] / self.batch_size))
+
+    def __getitem__(self, batch_index):
+        rows = self._order[batch_index * self.batch_size:(batch_index + 1) * self.batch_size]
+        batch = self.features[np.sort(rows)].toarray().astype(np.float32, copy=False)
+        return batch, batch
+
+    def on_epoch_end(self):
+        if self.shuffle:
+            self._rng.shuffle(self._order)
+
 class FurnitureRecommender:
-    def __init__(self, embedding_dim=64, n_neighbors=10):
+    def __init__(self, embedding_dim=64, n_neighbors=10, jit_compile=False,
+                 result_cache_size=RESULT_CACHE_MAX_ENTRIES, drift_threshold=VOCABULARY_DRIFT_THRESHOLD):
         self.n_neighbors = n_neighbors
+        self.jit_compile = jit_compile
         self.embedding_dim = embedding_dim
-        self.vectorizer = TfidfVectorizer(stop_words='english')
-        self.one_hot_encoder = OneHotEncoder(sparse_output=False, handle_unknown='ignore')
-        self.scaler = StandardScaler()
+        self.vectorizer = TfidfVectorizer(stop_words='english', dtype=np.float32)
+        self.one_hot_encoder = OneHotEncoder(handle_unknown='ignore', dtype=np.float32)
+        # No centering: keeps the TF-IDF and one-hot blocks sparse
+        self.scaler = StandardScaler(with_mean=False)
         self.model = None
         self.encoder_model = None
         self.df = None
         self.features = None
         self.feature_dim = None
+        self.embeddings = None
+        self.index = None
+        # Identifies the trained weights; with the catalog version it keys cached results
+        self.model_version = None
+        # Results are pure functions of the request for a given version, so they never expire
+        self.result_cache = QueryCache(ttl=math.inf, stale_ttl=0, max_entries=result_cache_size, refresh_workers=1)
+        self._result_cache_version = None
+        # Cross-product table saved with the bundle: (version, top_n, {request: (start, end)}, rows, confidences)
+        self.precomputed = None
+        # Incremental updates: retired row positions, file_ids of rows added with
+        # text the fitted transformers do not cover, and growable embedding storage
+        self.drift_threshold = drift_threshold
+        # `$updatedAt` of the newest product in the catalog (Appwrite sync marker)
+        self.catalog_synced_at = None
+        self.dead_rows = set()
+        self.drift_ids = set()
+        self._rows_by_file_id = None
+        self._embedding_buffer = None
+        self._update_lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self.catalog_index = None
+        self.style_similarity = None
+        self._embed_fn = None
+        self._dense_layers = None
         
     def _init_appwrite_client(self):
         """Initialize Appwrite client"""
@@ -51,36 +156,129 @@ class FurnitureRecommender:
         client.set_key(API_KEY)
         return client
 
-    def _fetch_appwrite_data(self):
-        """Fetch data from Appwrite database"""
-        client = self._init_appwrite_client()
-        database = Databases(client)
-        storage = Storage(client)
-        
-        # Fetch products
-        response = database.list_documents(
-            DATABASE_ID,
-            PRODUCTS_COLLECTION_ID,
-            [Query.limit(1000)]
-        )
+    def _iter_appwrite_batches(self, database, updated_since=None, batch_size=500, fields=None):
+        """Page through the products collection with cursors, yielding one batch of documents at a time"""
+        queries = [Query.order_asc('$updatedAt'), Query.limit(batch_size)]
+        if fields:
+            queries.append(Query.select(fields))
+        if updated_since:
+            # Inclusive, so documents sharing the marker's timestamp are not missed
+            queries.append(Query.greater_than_equal('$updatedAt', updated_since))
         
-        # Convert to DataFrame
-        products = []
-        for doc in response['documents']:
-            products.append({
+        cursor = None
+        while True:
+            page_queries = queries + ([Query.cursor_after(cursor)] if cursor else [])
+            response = database.list_documents(
+                DATABASE_ID,
+                PRODUCTS_COLLECTION_ID,
+                page_queries
+            )
+            documents = response['documents']
+            if not documents:
+                return
+            
+            yield documents
+            
+            if len(documents) < batch_size:
+                return
+            cursor = documents[-1]['$id']
+    
+    def _documents_to_frame(self, documents):
+        """Convert a batch of Appwrite documents to catalog rows"""
+        return pd.DataFrame(
+            [{
                 'PRODUCT_NAME': doc['PRODUCT_NAME'],
                 'CATEGORY': doc['CATEGORY'],
                 'STYLE': doc['STYLE'],
                 'IMAGE_URL': doc['IMAGE'],
                 'file_id': doc['$id']
-            })
+            } for doc in documents],
+            columns=PRODUCT_COLUMNS
+        )
+    
+    def _fetch_appwrite_data(self, full_sync=False, snapshot_path=CATALOG_SNAPSHOT_PATH):
+        """Fetch data from Appwrite database, incrementally on top of the local snapshot
+        
+        The first run (or `full_sync=True`) pages through the whole collection.
+        Later runs fetch only documents updated since the last sync and upsert them
+        by `file_id`, then drop products whose id Appwrite no longer lists.
+        """
+        products, _, _ = self._sync_catalog_snapshot(full_sync=full_sync, snapshot_path=snapshot_path)
+        return products
+    
+    def _sync_catalog_snapshot(self, full_sync=False, snapshot_path=CATALOG_SNAPSHOT_PATH):
+        """Sync the local snapshot file from Appwrite; returns (all products, changed rows, deleted file_ids)"""
+        snapshot = None
+        last_synced_at = None
+        if not full_sync and os.path.exists(snapshot_path):
+            saved = joblib.load(snapshot_path)
+            snapshot = saved['df']
+            last_synced_at = saved['last_synced_at']
+        
+        products, changed, deleted_ids, last_synced_at = self._diff_catalog(snapshot, last_synced_at)
+        
+        os.makedirs(os.path.dirname(snapshot_path), exist_ok=True)
+        joblib.dump({'df': products, 'last_synced_at': last_synced_at}, snapshot_path)
+        self.catalog_synced_at = last_synced_at
+        return products.copy(), changed, deleted_ids
+    
+    def _diff_catalog(self, snapshot, last_synced_at):
+        """Diff Appwrite against a catalog snapshot synced up to `last_synced_at`
+        
+        Returns (all products, changed rows, deleted file_ids, new marker).
+        Rows identical to their snapshot version are not reported as changed
+        (the inclusive `$updatedAt` marker fetches the newest documents of the
+        previous sync again). Deletions are found by listing the ids (only)
+        of the whole collection and diffing them against the snapshot.
+        """
+        database = Databases(self._init_appwrite_client())
+        
+        # Build one small frame per page instead of one list of every document
+        frames = []
+        for documents in self._iter_appwrite_batches(database, updated_since=last_synced_at):
+            frames.append(self._documents_to_frame(documents))
+            last_synced_at = max(last_synced_at or '', documents[-1]['$updatedAt'])
+        changed = (pd.concat(frames, ignore_index=True) if frames
+                   else pd.DataFrame(columns=PRODUCT_COLUMNS))
+        changed = changed.drop_duplicates(subset='file_id', keep='last')
+        
+        deleted_ids = []
+        if snapshot is None:
+            products = changed
+        else:
+            products = snapshot.set_index('file_id')
+            changed = changed.set_index('file_id')
+            existing = changed.index.isin(products.index)
+            
+            # Refetched rows that did not actually change are not updates
+            unchanged = np.zeros(len(changed), dtype=bool)
+            previous = products.loc[changed.index[existing], changed.columns]
+            unchanged[existing] = (changed[existing].fillna('') == previous.fillna('')).all(axis=1).to_numpy()
+            changed, existing = changed[~unchanged], existing[~unchanged]
+            
+            # Upsert: replace changed rows in place, append new ones
+            products.loc[changed.index[existing]] = changed[existing]
+            products = pd.concat([products, changed[~existing]]).reset_index()
+            
+            # Deletions: products Appwrite no longer lists
+            current_ids = set()
+            for documents in self._iter_appwrite_batches(database, fields=['$id']):
+                current_ids.update(doc['$id'] for doc in documents)
+            deleted = ~products['file_id'].isin(current_ids)
+            deleted_ids = products.loc[deleted, 'file_id'].tolist()
+            products = products[~deleted]
+        
+        products = products[PRODUCT_COLUMNS].reset_index(drop=True)
+        print(f"Catalog synced: {len(changed)} changed documents, {len(deleted_ids)} deleted, "
+              f"{len(products)} products")
         
-        return pd.DataFrame(products)
+        changed = changed.reset_index() if 'file_id' not in changed.columns else changed
+        return products, changed[PRODUCT_COLUMNS].reset_index(drop=True), deleted_ids, last_synced_at
 
-    def preprocess_data(self):
+    def preprocess_data(self, full_sync=False):
         """Preprocess the dataset"""
-        # Always fetch data from Appwrite
-        self.df = self._fetch_appwrite_data()
+        # Always sync data from Appwrite
+        self.df = self._fetch_appwrite_data(full_sync=full_sync)
         
         # Create document representations combining category, style and product name
         self.df['text_features'] = (
@@ -88,13 +286,29 @@ class FurnitureRecommender:
             self.df['STYLE'] + ' ' + 
             self.df['PRODUCT_NAME']
         )
+        self.catalog_index = CatalogIndex(self.df)
         
         return self.df
     
+    def _combine_features(self, text_features, cat_features):
+        """Stack the TF-IDF and one-hot blocks into one sparse float32 CSR matrix"""
+        return sp.hstack([
+            sp.csr_matrix(text_features),
+            sp.csr_matrix(cat_features)
+        ], format='csr', dtype=np.float32)
+    
+    def _scale_features(self, features):
+        """Scale with the fitted scaler, staying sparse unless it centers"""
+        if getattr(self.scaler, 'with_mean', False):
+            # Scalers saved before the sparse pipeline were fitted with centering
+            return self.scaler.transform(features.toarray()).astype(np.float32)
+        return self.scaler.transform(features).astype(np.float32, copy=False)
+    
     def build_features(self, df):
-        """Build feature matrix from dataframe"""
+        """Build the sparse feature matrix from dataframe"""
         # Text features using TF-IDF
         text_features = self.vectorizer.fit_transform(df['text_features'])
+        self.style_similarity = None
         
         # Categorical features using OneHotEncoder
         cat_features = self.one_hot_encoder.fit_transform(
@@ -102,16 +316,15 @@ class FurnitureRecommender:
         )
         
         # Combine features
-        combined_features = np.hstack([
-            text_features.toarray(),
-            cat_features
-        ])
+        combined_features = self._combine_features(text_features, cat_features)
         
-        # Scale features
-        scaled_features = self.scaler.fit_transform(combined_features)
+        # Scale features (variance only, sparsity is preserved)
+        self.scaler.fit(combined_features)
+        scaled_features = self._scale_features(combined_features)
         
         self.features = scaled_features
         self.feature_dim = scaled_features.shape[1]
+        self.drift_ids = set()
         return scaled_features
     
     def _build_encoder_model(self):
@@ -143,10 +356,26 @@ class FurnitureRecommender:
         
         return full_model
         
-    def train(self, epochs=50, batch_size=32, verbose=1):
+    def _fit_autoencoder(self, model, features, epochs, batch_size=32, validation_split=0.0, verbose=1):
+        """Fit the autoencoder on dense float32 batches drawn from the sparse features"""
+        features = sp.csr_matrix(features, dtype=np.float32)
+        # Like Keras' validation_split, hold out the last rows
+        n_train = features.shape[0] - int(features.shape[0] * validation_split)
+        validation_data = None
+        if n_train < features.shape[0]:
+            validation_data = SparseFeatureBatches(features[n_train:], batch_size, shuffle=False)
+        
+        return model.fit(
+            SparseFeatureBatches(features[:n_train], batch_size),
+            validation_data=validation_data,
+            epochs=epochs,
+            verbose=verbose
+        )
+        
+    def train(self, epochs=50, batch_size=32, verbose=1, full_sync=False):
         """Train the recommendation model"""
         # Preprocess data
-        df = self.preprocess_data()
+        df = self.preprocess_data(full_sync=full_sync)
         
         # Build features
         features = self.build_features(df)
@@ -158,8 +387,8 @@ class FurnitureRecommender:
         full_model = self._build_full_model(self.encoder_model)
         
         # Train autoencoder
-        history = full_model.fit(
-            features, features,
+        history = self._fit_autoencoder(
+            full_model, features,
             epochs=epochs,
             batch_size=batch_size,
             validation_split=0.2,
@@ -168,6 +397,11 @@ class FurnitureRecommender:
         
         # Store the model for inference
         self.model = full_model
+        self.model_version = uuid.uuid4().hex
+        self.prepare_inference()
+        
+        # Precompute the catalog embeddings once for similarity search
+        self.build_embedding_store()
         
         print(f"Model trained successfully with {features.shape[1]} features")
         return self
@@ -177,47 +411,335 @@ class FurnitureRecommender:
         if self.df is None:
             raise ValueError("Model not trained. Please train the model first.")
             
-        flooring_products = self.df[self.df['CATEGORY'] == 'Flooring']['PRODUCT_NAME'].unique()
-        return sorted(flooring_products)
+        return list(self._get_catalog_index().flooring_options)
+    
+    def _get_catalog_index(self):
+        """Return the (category, style, name) lookup index, rebuilding it if the catalog changed"""
+        if self.catalog_index is None or self.catalog_index.df is not self.df:
+            self.catalog_index = CatalogIndex(self.df)
+        return self.catalog_index
+    
+    def _get_style_similarity(self):
+        """Return the precomputed style TF-IDF scorer for the current catalog and vectorizer"""
+        lookup = self._get_catalog_index()
+        if (self.style_similarity is None
+                or self.style_similarity.styles is not lookup.styles
+                or self.style_similarity.vectorizer is not self.vectorizer):
+            self.style_similarity = StyleSimilarity(self.vectorizer, lookup.styles)
+        return self.style_similarity
+    
+    def prepare_inference(self):
+        """Compile the encoder once and warm it up so no request pays tracing or setup cost"""
+        # Compiled encoder with a fixed signature: any batch size, no retracing
+        self._embed_fn = tf.function(
+            lambda x: self.encoder_model(x, training=False),
+            input_signature=[tf.TensorSpec(shape=[None, self.feature_dim], dtype=tf.float32)],
+            jit_compile=self.jit_compile
+        )
+        
+        # NumPy copy of the Dense stack (dropout is a no-op at inference)
+        self._dense_layers = []
+        for layer in self.encoder_model.layers:
+            if isinstance(layer, (layers.InputLayer, layers.Dropout)):
+                continue
+            activation = getattr(getattr(layer, 'activation', None), '__name__', None)
+            if not isinstance(layer, layers.Dense) or activation not in ('relu', 'linear'):
+                # Unknown architecture: always use the compiled encoder
+                self._dense_layers = None
+                break
+            kernel, bias = layer.get_weights()
+            self._dense_layers.append((
+                np.ascontiguousarray(kernel, dtype=np.float32),
+                np.ascontiguousarray(bias, dtype=np.float32),
+                activation == 'relu'
+            ))
+        
+        # Warm-up: trace the compiled function and touch the NumPy weights
+        warm_up = np.zeros((1, self.feature_dim), dtype=np.float32)
+        self._embed_fn(warm_up)
+        self._compute_embeddings(warm_up)
+    
+    def _numpy_embeddings(self, features):
+        """Forward pass of the Dense encoder in NumPy (fast for a handful of rows)"""
+        x = features
+        for kernel, bias, relu in self._dense_layers:
+            x = x @ kernel + bias
+            if relu:
+                np.maximum(x, 0, out=x)
+        return x
     
     def _compute_embeddings(self, features):
         """Compute embeddings using the encoder part of the model"""
-        # Get the encoder part of the model
-        if hasattr(self.model, 'get_layer'):
-            encoder_layer = self.model.get_layer('encoder')
-            embedding_layer = encoder_layer.get_layer('embedding')
+        if self._embed_fn is None:
+            self.prepare_inference()
+        
+        if sp.issparse(features):
+            features = sp.csr_matrix(features, dtype=np.float32)
+        else:
+            features = np.asarray(features, dtype=np.float32)
+        if self._dense_layers is not None and features.shape[0] <= NUMPY_EMBEDDING_MAX_ROWS:
+            # A sparse first layer costs O(non-zeros), not O(feature width)
+            return np.asarray(self._numpy_embeddings(features))
+        
+        batches = []
+        for start in range(0, features.shape[0], EMBEDDING_BATCH_SIZE):
+            batch = features[start:start + EMBEDDING_BATCH_SIZE]
+            if sp.issparse(batch):
+                batch = batch.toarray()
+            batches.append(self._embed_fn(batch).numpy())
+        return np.concatenate(batches) if batches else np.empty((0, self.embedding_dim), dtype=np.float32)
+    
+    def transform_features(self, df):
+        """Build the sparse feature matrix for rows using the already fitted transformers"""
+        text_features = self.vectorizer.transform(df['text_features'])
+        cat_features = self.one_hot_encoder.transform(df[['CATEGORY', 'STYLE']])
+        
+        return self._scale_features(self._combine_features(text_features, cat_features))
+    
+    def build_embedding_store(self):
+        """Compute L2-normalized catalog embeddings as a contiguous float32 matrix"""
+        if self.features is None:
+            self.features = self.transform_features(self.df)
+        
+        embeddings = np.asarray(self._compute_embeddings(self.features), dtype=np.float32)
+        self.embeddings = np.ascontiguousarray(_l2_normalize(embeddings))
+        self._embedding_buffer = None
+        self.dead_rows = set()
+        self._rows_by_file_id = None
+        self.index = build_index(self.embeddings, self.n_neighbors)
+        return self.embeddings
+    
+    def _top_k_similar(self, query_embedding, k):
+        """Top-k search over the embedding store (indices, cosine similarities), skipping retired rows"""
+        query = _l2_normalize(np.asarray(query_embedding, dtype=np.float32).reshape(1, -1))[0]
+        if self.index is None:
+            self.index = build_index(self.embeddings, self.n_neighbors)
+        dead_rows = self.dead_rows
+        if not dead_rows:
+            return self.index.search(query, k)
+        
+        # Over-fetch until k live rows are found (or the whole index was searched)
+        fetch = 2 * k
+        while True:
+            indices, similarities = self.index.search(query, fetch)
+            live = np.fromiter((i not in dead_rows for i in indices.tolist()), dtype=bool, count=len(indices))
+            if live.sum() >= k or fetch >= len(self.index):
+                return indices[live][:k], similarities[live][:k]
+            fetch *= 2
+    
+    def _append_embeddings(self, new_embeddings):
+        """Append rows to the embedding store in amortized O(rows) using a growable buffer"""
+        n_rows, n_new = self.embeddings.shape[0], new_embeddings.shape[0]
+        buffer = self._embedding_buffer
+        if buffer is None or self.embeddings.base is not buffer or buffer.shape[0] < n_rows + n_new:
+            capacity = max(2 * n_rows, n_rows + n_new, 1024)
+            buffer = np.empty((capacity, self.embeddings.shape[1]), dtype=np.float32)
+            buffer[:n_rows] = self.embeddings
+            self._embedding_buffer = buffer
+        buffer[n_rows:n_rows + n_new] = new_embeddings
+        return buffer[:n_rows + n_new]
+    
+    def _uncovered_ids(self, rows):
+        """file_ids of rows whose text or category/style the fitted transformers have never seen"""
+        analyzer = self.vectorizer.build_analyzer()
+        vocabulary = self.vectorizer.vocabulary_
+        known_categories, known_styles = (set(categories) for categories in self.one_hot_encoder.categories_)
+        return {
+            file_id
+            for file_id, text, category, style in zip(rows['file_id'], rows['text_features'], rows['CATEGORY'], rows['STYLE'])
+            if category not in known_categories or style not in known_styles
+            or any(token not in vocabulary for token in analyzer(text))
+        }
+    
+    def apply_catalog_changes(self, changed=None, deleted_ids=()):
+        """Add, update or retire catalog rows without retraining
+        
+        `changed` holds new or updated products (PRODUCT_COLUMNS, keyed by
+        file_id); `deleted_ids` lists file_ids to drop. Changed rows go
+        through the fitted vectorizer, one-hot encoder, scaler and encoder and
+        are appended to the catalog, embedding store and index; the previous
+        version of an updated row is retired (tombstoned). Embedding, the
+        embedding store (amortized) and the index groups cost time
+        proportional to the changed rows, but appending to the catalog frame,
+        the feature matrix and the per-row style codes copies each of them, so
+        a call is still O(catalog) overall; batch changes rather than applying
+        them one by one. Requests are never blocked: one racing an update sees
+        either version of each changed row.
+        
+        Returns a summary whose `retrain_required` is set once rows the
+        fitted vocabulary does not cover exceed `drift_threshold` of the catalog.
+        """
+        with self._update_lock:
+            if self.embeddings is None:
+                self.build_embedding_store()
+            if self._rows_by_file_id is None:
+                self._rows_by_file_id = {
+                    file_id: row for row, file_id in enumerate(self.df['file_id'])
+                    if row not in self.dead_rows
+                }
             
-            # Define a function to get embeddings
-            embedding_function = tf.keras.backend.function(
-                [encoder_layer.input], 
-                [embedding_layer.output]
-            )
+            changed = (changed if changed is not None else pd.DataFrame(columns=PRODUCT_COLUMNS))
+            changed = changed[PRODUCT_COLUMNS].drop_duplicates(subset='file_id', keep='last').reset_index(drop=True)
+            changed['text_features'] = changed['CATEGORY'] + ' ' + changed['STYLE'] + ' ' + changed['PRODUCT_NAME']
             
-            # Get embeddings
-            embeddings = embedding_function([features])[0]
-            return embeddings
-        else:
-            # If we loaded the encoder model directly
-            return self.encoder_model.predict(features)
+            updated_ids = [file_id for file_id in changed['file_id'] if file_id in self._rows_by_file_id]
+            deleted_ids = [file_id for file_id in deleted_ids if file_id in self._rows_by_file_id]
+            retired_rows = [self._rows_by_file_id[file_id] for file_id in [*updated_ids, *deleted_ids]]
+            
+            # Embed the changed rows with the already fitted pipeline
+            n_rows = len(self.df)
+            added_rows = np.arange(n_rows, n_rows + len(changed))
+            if len(changed):
+                features = self.transform_features(changed)
+                new_embeddings = np.ascontiguousarray(
+                    _l2_normalize(np.asarray(self._compute_embeddings(features), dtype=np.float32))
+                )
+                df = pd.concat([self.df, changed[self.df.columns.intersection(changed.columns)]], ignore_index=True)
+                embeddings = self._append_embeddings(new_embeddings)
+                if self.features is not None:
+                    self.features = sp.vstack([sp.csr_matrix(self.features), features], format='csr')
+            else:
+                df, embeddings = self.df, self.embeddings
+            
+            # Publish the grown catalog and store before anything can point into them
+            lookup = self._get_catalog_index()
+            self.df = df
+            self.embeddings = embeddings
+            if len(changed):
+                self.index.add(added_rows, new_embeddings, embeddings)
+            self.dead_rows = self.dead_rows | set(retired_rows)
+            lookup.apply_changes(df, added_rows, retired_rows)
+            # A request racing the update may have rebuilt the index from the grown frame
+            self.catalog_index = lookup
+            
+            for file_id in deleted_ids:
+                del self._rows_by_file_id[file_id]
+                self.drift_ids.discard(file_id)
+            self._rows_by_file_id.update(zip(changed['file_id'], added_rows.tolist()))
+            self.drift_ids -= set(updated_ids)
+            self.drift_ids |= self._uncovered_ids(changed)
+            
+            n_live = len(self._rows_by_file_id)
+            drift = len(self.drift_ids) / max(n_live, 1)
+            compacted = len(self.dead_rows) > MAX_TOMBSTONE_RATIO * len(self.df)
+            if compacted:
+                self._compact()
+            
+            return {
+                'added': len(changed) - len(updated_ids),
+                'updated': len(updated_ids),
+                'deleted': len(deleted_ids),
+                'products': n_live,
+                'drift': drift,
+                'retrain_required': drift > self.drift_threshold,
+                'compacted': compacted,
+            }
     
-    def _cosine_similarity(self, a, b):
-        """Calculate cosine similarity between two vectors or a vector and a matrix"""
-        # Normalize vectors
-        a_norm = tf.nn.l2_normalize(a, axis=1)
-        b_norm = tf.nn.l2_normalize(b, axis=1)
+    def _compact(self):
+        """Physically drop retired rows and rebuild the lookup structures (O(catalog))"""
+        live = np.setdiff1d(np.arange(len(self.df)), np.fromiter(self.dead_rows, dtype=np.intp))
+        df = self.df.iloc[live].reset_index(drop=True)
+        embeddings = np.ascontiguousarray(self.embeddings[live])
+        if self.features is not None:
+            self.features = sp.csr_matrix(self.features)[live]
+        index = build_index(embeddings, self.n_neighbors)
+        catalog_index = CatalogIndex(df)
         
-        # Calculate similarity
-        similarity = tf.matmul(a_norm, b_norm, transpose_b=True)
-        return similarity.numpy()
+        self.df, self.embeddings, self.index, self.catalog_index = df, embeddings, index, catalog_index
+        self._embedding_buffer = None
+        self.dead_rows = set()
+        self._rows_by_file_id = None
+    
+    def sync_incremental(self):
+        """Pull products changed or deleted in Appwrite since this model's last sync and apply them without retraining
+        
+        The snapshot is this model's own live catalog and `catalog_synced_at`
+        (restored from the bundle), not the shared snapshot file: every worker
+        and restarted server diffs against what it actually serves, and the
+        marker only moves once the changes are applied.
+        """
+        with self._sync_lock:
+            with self._update_lock:
+                live = np.setdiff1d(np.arange(len(self.df)), np.fromiter(self.dead_rows, dtype=np.intp))
+                snapshot = self.df.iloc[live][PRODUCT_COLUMNS].reset_index(drop=True)
+            _, changed, deleted_ids, synced_at = self._diff_catalog(snapshot, self.catalog_synced_at)
+            summary = self.apply_catalog_changes(changed, deleted_ids)
+            self.catalog_synced_at = synced_at
+            return summary
+    
+    @property
+    def version(self):
+        """(catalog version, model version): results are pure functions of the request within one"""
+        return (self._get_catalog_index().version, self.model_version)
     
     def get_recommendations(self, category, style, flooring=None, top_n=10):
-        """Get recommendations based on category, style, and optional flooring"""
+        """Get recommendations based on category, style, and optional flooring
+        
+        Names are matched case- and whitespace-insensitively (see
+        `CatalogIndex.canonical_request`). Results are memoized per
+        catalog/model version (and served from the precomputed table when the
+        bundle has one); a catalog reload or a new model changes the version,
+        which drops the cached results.
+        """
+        category, style, flooring = self._get_catalog_index().canonical_request(category, style, flooring)
+        request = (category, style, flooring, int(top_n))
+        version = self.version
+        if self._result_cache_version != version:
+            self.result_cache.clear()
+            self._result_cache_version = version
+        
+        def compute():
+            if self._has_precomputed(version, request):
+                return self._precomputed_recommendations(request)
+            return self._recommend(*request)
+        
+        result = self.result_cache.get((version, request), compute)
+        # Cached frames are shared; callers get their own copy
+        return result.copy()
+    
+    def _has_precomputed(self, version, request):
+        return (self.precomputed is not None and self.precomputed[0] == version
+                and request[3] == self.precomputed[1] and request[:3] in self.precomputed[2])
+    
+    def _precomputed_recommendations(self, request):
+        _, _, table, rows, confidences = self.precomputed
+        start, end = table[request[:3]]
+        result = self.df.iloc[np.asarray(rows[start:end])].copy()
+        result['confidence'] = np.asarray(confidences[start:end], dtype=np.float64)
+        return result
+    
+    def precompute_recommendations(self, top_n=10):
+        """Compute results for every category x style x (flooring option or none)
+        
+        Returns (keys, offsets, rows, confidences): key i's result is
+        `df.iloc[rows[offsets[i]:offsets[i + 1]]]` with those confidences.
+        """
+        lookup = self._get_catalog_index()
+        keys, offsets, rows, confidences = [], [0], [], []
+        for category in sorted(lookup.category_index, key=str):
+            for style in sorted(lookup.styles, key=str):
+                for flooring in [None, *lookup.flooring_options]:
+                    result = self._recommend(category, style, flooring, top_n)
+                    keys.append((category, style, flooring))
+                    rows.append(self.df.index.get_indexer(result.index))
+                    confidences.append(result['confidence'].to_numpy(dtype=np.float64))
+                    offsets.append(offsets[-1] + len(result))
+        return (
+            keys,
+            np.asarray(offsets, dtype=np.int64),
+            np.concatenate(rows).astype(np.int64) if rows else np.empty(0, dtype=np.int64),
+            np.concatenate(confidences) if confidences else np.empty(0, dtype=np.float64)
+        )
+    
+    def _recommend(self, category, style, flooring=None, top_n=10):
+        """Compute recommendations (uncached)"""
         # Create a filtered dataframe that will hold our results
         results = []
+        lookup = self._get_catalog_index()
         
         # Step 1: If flooring is specified, always include it in the results
         if flooring and flooring != "":
-            flooring_items = self.df[self.df['PRODUCT_NAME'] == flooring]
+            flooring_items = self.df.iloc[lookup.product_rows(flooring)]
             if not flooring_items.empty:
                 # Add the flooring item with 100% confidence
                 flooring_df = flooring_items.copy()
@@ -226,21 +748,7 @@ class FurnitureRecommender:
         
         # Step 2: Get products that match the category and style
         # (excluding any flooring products unless they were specifically requested)
-        filtered_df = self.df.copy()
-        
-        # If a specific flooring was requested, we'll exclude other flooring products
-        if flooring and flooring != "":
-            # Filter out flooring products except the requested one
-            filtered_df = filtered_df[
-                (filtered_df['CATEGORY'] != 'Flooring') | 
-                (filtered_df['PRODUCT_NAME'] == flooring)
-            ]
-        
-        # Now filter by category and style
-        category_style_df = filtered_df[
-            (filtered_df['CATEGORY'] == category) & 
-            (filtered_df['STYLE'] == style)
-        ]
+        category_style_df = self.df.iloc[lookup.category_style_rows(category, style, flooring)]
         
         if not category_style_df.empty:
             # Add confidence score of 100% for exact matches
@@ -249,22 +757,14 @@ class FurnitureRecommender:
             results.append(category_style_df)
         else:
             # Fallback: Look for products with matching category
-            category_matches = filtered_df[filtered_df['CATEGORY'] == category].copy()
+            category_rows = lookup.category_rows(category, flooring)
+            category_matches = self.df.iloc[category_rows].copy()
             
             if not category_matches.empty:
-                # Create query features for the style
-                query_text = f"{style}"
-                query_text_features = self.vectorizer.transform([query_text])
-                
-                # Get text features for category matches
-                category_text_features = self.vectorizer.transform(category_matches['STYLE'])
-                
-                # Calculate similarities using dot product (similar to cosine similarity)
-                query_vec = query_text_features.toarray()[0]
-                similarities = np.array([
-                    np.dot(query_vec, cat_vec) / (np.linalg.norm(query_vec) * np.linalg.norm(cat_vec) + 1e-8)
-                    for cat_vec in category_text_features.toarray()
-                ])
+                # Score the query style against each row's precomputed style vector
+                similarities = self._get_style_similarity().similarities(
+                    f"{style}", lookup.style_codes[category_rows]
+                )
                 
                 # Add similarities as confidence scores
                 category_matches['confidence'] = (similarities * 80).round(2)  # Max 80% for category matches
@@ -278,100 +778,240 @@ class FurnitureRecommender:
             # Ultimate fallback: Use neural embeddings approach
             query_text = f"{category} {style}"
             
-            # Transform query using the same transformation as training data
-            query_text_features = self.vectorizer.transform([query_text])
-            
-            # Create categorical features for the query
-            query_cat_features = self.one_hot_encoder.transform(
-                pd.DataFrame([[category, style]], columns=['CATEGORY', 'STYLE'])
-            )
-            
-            # Combine query features
-            combined_query_features = np.hstack([
-                query_text_features.toarray(),
-                query_cat_features
-            ])
+            # Transform query using the same pipeline as training data
+            scaled_query_features = self.transform_features(pd.DataFrame({
+                'text_features': [query_text],
+                'CATEGORY': [category],
+                'STYLE': [style]
+            }))
             
-            # Scale features
-            scaled_query_features = self.scaler.transform(combined_query_features)
-            
-            # Get embeddings for query and all items
+            # Embed the query and search the precomputed catalog embeddings
+            if self.embeddings is None:
+                self.build_embedding_store()
             query_embedding = self._compute_embeddings(scaled_query_features)
-            all_embeddings = self._compute_embeddings(self.features)
-            
-            # Calculate similarity
-            similarities = self._cosine_similarity(query_embedding, all_embeddings)[0]
-            
-            # Get indices of top N similar items
-            top_indices = np.argsort(similarities)[::-1][:top_n]
+            top_indices, top_similarities = self._top_k_similar(query_embedding[0], top_n)
             
             # Prepare results
             result_df = self.df.iloc[top_indices].copy()
             
             # Convert similarities to confidence scores
-            result_df['confidence'] = (similarities[top_indices] * 50).round(2)  # Max 50% for fallback
+            result_df['confidence'] = (top_similarities.astype(np.float64) * 50).round(2)  # Max 50% for fallback
             
             return result_df.sort_values('confidence', ascending=False).head(top_n)
     
-    def save_model(self, path='src/models'):
-        """Save the trained model to disk using h5 format"""
-        # Create directory if it doesn't exist
+    def save_model(self, path='src/models', precompute_top_n=None):
+        """Save the trained model to disk as a model bundle"""
         os.makedirs(path, exist_ok=True)
-        model_path = f"{path}/furniture_recommender.h5"
-        
-        # Create a placeholder attribute directory for non-TF components
-        attrs_dir = os.path.join(path, "attrs")
-        os.makedirs(attrs_dir, exist_ok=True)
-        
-        # Save TF-independent components
-        vectorizer_path = os.path.join(attrs_dir, "vectorizer.joblib")
-        encoder_path = os.path.join(attrs_dir, "encoder.joblib")
-        scaler_path = os.path.join(attrs_dir, "scaler.joblib")
-        df_path = os.path.join(attrs_dir, "dataframe.joblib")
-        
-        joblib.dump(self.vectorizer, vectorizer_path)
-        joblib.dump(self.one_hot_encoder, encoder_path)
-        joblib.dump(self.scaler, scaler_path)
-        joblib.dump(self.df, df_path)
-        
-        # Save the encoder model (containing the embedding layer)
-        self.encoder_model.save(model_path)
-        
-        # Add custom attributes to the h5 file
-        with h5py.File(model_path, 'a') as h5file:
-            # Add metadata as attributes
-            h5file.attrs['vectorizer_path'] = vectorizer_path
-            h5file.attrs['encoder_path'] = encoder_path
-            h5file.attrs['scaler_path'] = scaler_path
-            h5file.attrs['df_path'] = df_path
-            h5file.attrs['n_neighbors'] = self.n_neighbors
-            h5file.attrs['embedding_dim'] = self.embedding_dim
-            h5file.attrs['feature_dim'] = self.feature_dim
-            
-            # Create a metadata group
-            if 'metadata' not in h5file:
-                metadata = h5file.create_group('metadata')
-                metadata.attrs['version'] = np.array([1, 0, 0])
-            
-        print(f"Model saved to {model_path}")
-        return model_path
+        return self.save_bundle(os.path.join(path, MODEL_BUNDLE_DIR), precompute_top_n=precompute_top_n)
+    
+    def save_bundle(self, path, precompute_top_n=None):
+        """Save weights, transformer state, catalog and precomputed arrays as one bundle
+        
+        With `precompute_top_n`, results for the full category x style x
+        flooring cross product are computed now and stored as a lookup table.
+        """
+        if self.model_version is None:
+            self.model_version = uuid.uuid4().hex
+        if self.dead_rows:
+            # Saved bundles never carry retired rows
+            with self._update_lock:
+                self._compact()
+        if self.embeddings is None:
+            self.build_embedding_store()
+        if self.features is None:
+            self.features = self.transform_features(self.df)
+        features = sp.csr_matrix(self.features, dtype=np.float32)
+        
+        arrays = {}
+        
+        # Encoder weights, in layer order
+        encoder_weights = self.encoder_model.get_weights()
+        for i, weight in enumerate(encoder_weights):
+            arrays[f'encoder_weight_{i}'] = weight
+        
+        # TF-IDF vocabulary (terms ordered by column) and idf weights
+        vocabulary = sorted(self.vectorizer.vocabulary_, key=self.vectorizer.vocabulary_.get)
+        arrays['vocabulary_data'], arrays['vocabulary_offsets'], _ = encode_strings(vocabulary)
+        arrays['vectorizer_idf'] = self.vectorizer.idf_.astype(np.float32)
+        vectorizer_params = {
+            name: value for name, value in self.vectorizer.get_params().items() if name in VECTORIZER_PARAMS
+        }
+        
+        # One-hot categories per input column
+        for i, categories in enumerate(self.one_hot_encoder.categories_):
+            data, offsets, nulls = encode_strings(list(categories))
+            arrays[f'onehot_{i}_data'], arrays[f'onehot_{i}_offsets'], arrays[f'onehot_{i}_nulls'] = data, offsets, nulls
+        
+        # Scaler statistics
+        arrays['scaler_scale'] = self.scaler.scale_
+        arrays['scaler_var'] = self.scaler.var_
+        if self.scaler.mean_ is not None:
+            arrays['scaler_mean'] = self.scaler.mean_
+        
+        # Catalog as a columnar table
+        catalog_arrays, catalog_columns = frame_to_arrays(self.df)
+        arrays.update(catalog_arrays)
+        
+        # Precomputed features (CSR), embeddings and the ANN index
+        arrays['features_data'] = features.data
+        arrays['features_indices'] = features.indices
+        arrays['features_indptr'] = features.indptr
+        arrays['embeddings'] = self.embeddings
+        if self.index is None:
+            self.index = build_index(self.embeddings, self.n_neighbors)
+        for name, array in self.index.to_arrays(include_vectors=True).items():
+            arrays[f'index_{name}'] = array
+        
+        # Optional precomputed results table
+        precomputed = None
+        if precompute_top_n is not None:
+            keys, offsets, rows, confidences = self.precompute_recommendations(precompute_top_n)
+            for i, column in enumerate(zip(*keys)):
+                data, offsets_i, nulls = encode_strings(list(column))
+                arrays[f'precomputed_key_{i}_data'], arrays[f'precomputed_key_{i}_offsets'] = data, offsets_i
+                arrays[f'precomputed_key_{i}_nulls'] = nulls
+            arrays['precomputed_offsets'] = offsets
+            arrays['precomputed_rows'] = rows
+            arrays['precomputed_confidence'] = confidences
+            precomputed = {'top_n': int(precompute_top_n), 'entries': len(keys)}
+        
+        metadata = {
+            'model_version': self.model_version,
+            'catalog_version': self._get_catalog_index().version,
+            'catalog_synced_at': self.catalog_synced_at,
+            'precomputed': precomputed,
+            'embedding_dim': int(self.embedding_dim),
+            'n_neighbors': int(self.n_neighbors),
+            'feature_dim': int(self.feature_dim),
+            'features_shape': list(features.shape),
+            'encoder_weights': len(encoder_weights),
+            'vectorizer': vectorizer_params,
+            'onehot_columns': list(self.one_hot_encoder.feature_names_in_),
+            'scaler': {
+                'with_mean': bool(self.scaler.with_mean),
+                'with_std': bool(self.scaler.with_std),
+                'n_samples_seen': np.asarray(self.scaler.n_samples_seen_).tolist(),
+            },
+            'catalog_columns': catalog_columns,
+        }
+        
+        write_bundle(path, arrays, metadata)
+        print(f"Model saved to {path}")
+        return path
     
     @classmethod
-    def load_model(cls, path='models/furniture_recommender.h5'):
-        """Load a trained model from disk using h5 format"""
+    def load_bundle(cls, path, jit_compile=False, mmap=True):
+        """Load a model bundle; large arrays stay memory-mapped and shared via the page cache"""
+        metadata, arrays = read_bundle(path, mmap=mmap)
+        
+        recommender = cls(
+            embedding_dim=metadata['embedding_dim'],
+            n_neighbors=metadata['n_neighbors'],
+            jit_compile=jit_compile
+        )
+        recommender.feature_dim = metadata['feature_dim']
+        recommender.model_version = metadata['model_version']
+        recommender.catalog_synced_at = metadata.get('catalog_synced_at')
+        
+        # TF-IDF vectorizer from its vocabulary and idf weights
+        vectorizer_params = dict(metadata['vectorizer'])
+        if vectorizer_params.get('ngram_range') is not None:
+            vectorizer_params['ngram_range'] = tuple(vectorizer_params['ngram_range'])
+        vocabulary = decode_strings(arrays['vocabulary_data'], arrays['vocabulary_offsets'])
+        recommender.vectorizer = TfidfVectorizer(
+            vocabulary={term: i for i, term in enumerate(vocabulary)},
+            dtype=np.float32,
+            **vectorizer_params
+        )
+        recommender.vectorizer.idf_ = np.array(arrays['vectorizer_idf'])
+        
+        # One-hot encoder with its fixed categories
+        onehot_columns = metadata['onehot_columns']
+        categories = [
+            decode_strings(arrays[f'onehot_{i}_data'], arrays[f'onehot_{i}_offsets'], arrays[f'onehot_{i}_nulls'])
+            for i in range(len(onehot_columns))
+        ]
+        recommender.one_hot_encoder = OneHotEncoder(
+            categories=categories, handle_unknown='ignore', dtype=np.float32
+        ).fit(pd.DataFrame({column: values[:1] for column, values in zip(onehot_columns, categories)}))
+        
+        # Scaler statistics
+        scaler_state = metadata['scaler']
+        scaler = StandardScaler(with_mean=scaler_state['with_mean'], with_std=scaler_state['with_std'])
+        scaler.scale_ = np.array(arrays['scaler_scale'])
+        scaler.var_ = np.array(arrays['scaler_var'])
+        scaler.mean_ = np.array(arrays['scaler_mean']) if 'scaler_mean' in arrays else None
+        scaler.n_samples_seen_ = np.asarray(scaler_state['n_samples_seen'])
+        scaler.n_features_in_ = recommender.feature_dim
+        recommender.scaler = scaler
+        
+        # Catalog
+        recommender.df = frame_from_arrays(arrays, metadata['catalog_columns'])
+        recommender.catalog_index = CatalogIndex(recommender.df)
+        
+        # Precomputed results, valid for exactly this catalog and model
+        precomputed = metadata.get('precomputed')
+        if precomputed and metadata['catalog_version'] == recommender.catalog_index.version:
+            key_columns = [
+                decode_strings(arrays[f'precomputed_key_{i}_data'], arrays[f'precomputed_key_{i}_offsets'],
+                               arrays[f'precomputed_key_{i}_nulls'])
+                for i in range(3)
+            ]
+            offsets = arrays['precomputed_offsets'].tolist()
+            table = {key: (offsets[i], offsets[i + 1]) for i, key in enumerate(zip(*key_columns))}
+            recommender.precomputed = (
+                recommender.version, precomputed['top_n'], table,
+                arrays['precomputed_rows'], arrays['precomputed_confidence']
+            )
+        
+        # Precomputed arrays, used in place
+        recommender.features = sp.csr_matrix(
+            (arrays['features_data'], arrays['features_indices'], arrays['features_indptr']),
+            shape=tuple(metadata['features_shape'])
+        )
+        recommender.embeddings = arrays['embeddings']
+        recommender.index = index_from_arrays(
+            {name[len('index_'):]: array for name, array in arrays.items() if name.startswith('index_')},
+            recommender.embeddings
+        )
+        
+        # Encoder
+        recommender.encoder_model = recommender._build_encoder_model()
+        recommender.encoder_model.set_weights([
+            np.array(arrays[f'encoder_weight_{i}']) for i in range(metadata['encoder_weights'])
+        ])
+        recommender.model = recommender.encoder_model
+        recommender.prepare_inference()
+        
+        print(f"Model loaded from {path}")
+        return recommender
+    
+    @classmethod
+    def load_model(cls, path='models/furniture_recommender.h5', jit_compile=False):
+        """Load a trained model from a bundle directory, or from the legacy h5 format"""
+        if is_bundle(path):
+            return cls.load_bundle(path, jit_compile=jit_compile)
+        
         try:
             # Load the keras model first
             encoder_model = load_model(path)
             
             # Extract custom attributes from the h5 file
+            # (artifact paths are stored as written on the training machine)
             with h5py.File(path, 'r') as h5file:
-                vectorizer_path = h5file.attrs['vectorizer_path']
-                encoder_path = h5file.attrs['encoder_path']
-                scaler_path = h5file.attrs['scaler_path']
-                df_path = h5file.attrs['df_path']
+                vectorizer_path = resolve_legacy_path(h5file.attrs['vectorizer_path'], path)
+                encoder_path = resolve_legacy_path(h5file.attrs['encoder_path'], path)
+                scaler_path = resolve_legacy_path(h5file.attrs['scaler_path'], path)
+                df_path = resolve_legacy_path(h5file.attrs['df_path'], path)
                 n_neighbors = h5file.attrs['n_neighbors']
                 embedding_dim = h5file.attrs['embedding_dim']
                 feature_dim = h5file.attrs['feature_dim']
+                embeddings_path = h5file.attrs.get('embeddings_path')
+                index_path = h5file.attrs.get('index_path')
+            if embeddings_path is not None:
+                embeddings_path = resolve_legacy_path(embeddings_path, path)
+            if index_path is not None:
+                index_path = resolve_legacy_path(index_path, path)
             
             # Load components using joblib
             vectorizer = joblib.load(vectorizer_path)
@@ -380,7 +1020,7 @@ class FurnitureRecommender:
             df = joblib.load(df_path)
             
             # Create a new instance
-            recommender = cls(embedding_dim=embedding_dim, n_neighbors=n_neighbors)
+            recommender = cls(embedding_dim=embedding_dim, n_neighbors=n_neighbors, jit_compile=jit_compile)
             
             # Restore the model components
             recommender.vectorizer = vectorizer
@@ -390,6 +1030,21 @@ class FurnitureRecommender:
             recommender.model = encoder_model  # Use the encoder model as the main model
             recommender.df = df
             recommender.feature_dim = feature_dim
+            recommender.catalog_index = CatalogIndex(df)
+            recommender.model_version = f"h5-{os.stat(path).st_mtime_ns}"
+            recommender.prepare_inference()
+            
+            # Restore the catalog embeddings, computing them once if missing
+            if embeddings_path is not None and os.path.exists(embeddings_path):
+                recommender.embeddings = np.ascontiguousarray(
+                    np.load(embeddings_path), dtype=np.float32
+                )
+                if index_path is not None:
+                    recommender.index = load_index(index_path, recommender.embeddings)
+                if recommender.index is None:
+                    recommender.index = build_index(recommender.embeddings, n_neighbors)
+            else:
+                recommender.build_embedding_store()
             
             print(f"Model loaded from {path}")
             return recommender
@@ -423,7 +1078,8 @@ class FurnitureRecommender:
                     recommender.model = full_model
                     
                     # Quick training to initialize weights (not optimal but should work)
-                    recommender.model.fit(features, features, epochs=1, verbose=0)
+                    recommender._fit_autoencoder(recommender.model, features, epochs=1, verbose=0)
+                    recommender.build_embedding_store()
                     
                     # Save the converted model in the new format
                     recommender.save_model(os.path.dirname(path))
@@ -436,14 +1092,22 @@ class FurnitureRecommender:
             raise ValueError(f"Error loading model: {e}")
 
 
+def convert_legacy_model(model_path='src/models/furniture_recommender.h5', bundle_path=None):
+    """Convert the h5 encoder plus joblib artifacts into a model bundle"""
+    recommender = FurnitureRecommender.load_model(model_path)
+    if bundle_path is None:
+        bundle_path = os.path.join(os.path.dirname(model_path), MODEL_BUNDLE_DIR)
+    return recommender.save_bundle(bundle_path)
+
+
 def train_and_save_model():
     """Train model using Appwrite data and save it"""
     # Create and train model
     recommender = FurnitureRecommender(embedding_dim=64, n_neighbors=5)
     recommender.train(epochs=30, batch_size=32)
     
-    # Save the model
-    model_path = recommender.save_model()
+    # Save the model, with results precomputed for the default request size
+    model_path = recommender.save_model(precompute_top_n=10)
     
     return model_path
 
@@ -0,0 +1,155 @@
+import re
+import math
+from collections import OrderedDict, namedtuple
+
+from src.quantity_store import normalize_product_name
+
+
+# size: typical footprint in sqm (length x width); room_sqm_per_piece: room area
+# that warrants one more piece; quantities are clamped to [min_quantity, max_quantity]
+Footprint = namedtuple("Footprint", ["size", "room_sqm_per_piece", "min_quantity", "max_quantity"])
+
+# Product types found in the catalog's PRODUCT_NAMEs. Multi-word types win over
+# the single words they contain ("coffee table" over "table"). The catalog has
+# names and categories but no dimensions, so the footprints are kept by hand;
+# tests check that every non-flooring catalog product classifies by its head noun.
+FOOTPRINTS = {
+    "sofa": Footprint(1.8, 25, 1, 3),
+    "loveseat sofa": Footprint(1.5, 25, 1, 2),
+    "compact sofa": Footprint(1.3, 25, 1, 2),
+    "armchair": Footprint(0.7, 15, 1, 4),
+    "chair": Footprint(0.5, 8, 1, 6),
+    "ergonomic chair": Footprint(0.5, 20, 1, 2),
+    "gaming chair": Footprint(0.6, 20, 1, 2),
+    "office chair": Footprint(0.5, 20, 1, 2),
+    "stool": Footprint(0.2, 6, 1, 6),
+    "bar stool": Footprint(0.2, 6, 1, 6),
+    "table": Footprint(1.2, 30, 1, 2),
+    "coffee table": Footprint(0.8, 30, 1, 2),
+    "glass coffee table": Footprint(0.8, 30, 1, 2),
+    "study table": Footprint(1.0, 20, 1, 2),
+    "desk": Footprint(1.0, 20, 1, 2),
+    "dining set": Footprint(3.0, 30, 1, 2),
+    "bed": Footprint(3.2, 30, 1, 2),
+    "bed frame": Footprint(3.2, 30, 1, 2),
+    "single bed": Footprint(1.9, 15, 1, 2),
+    "closet": Footprint(1.2, 20, 1, 3),
+    "wardrobe": Footprint(1.2, 20, 1, 3),
+    "drawer": Footprint(0.5, 15, 1, 3),
+    "kitchen drawer": Footprint(0.4, 6, 1, 6),
+    "cabinet": Footprint(0.6, 6, 1, 8),
+    "shelves": Footprint(0.3, 12, 1, 4),
+    "shelf": Footprint(0.3, 12, 1, 4),
+    "bookshelf": Footprint(0.6, 20, 1, 3),
+    "storage unit": Footprint(0.8, 20, 1, 3),
+    "lamp": Footprint(0.1, 12, 1, 4),
+    "chandelier": Footprint(0.5, 25, 1, 2),
+    "light": Footprint(0.05, 10, 1, 6),
+    "mirror": Footprint(0.5, 15, 1, 3),
+    "painting": Footprint(0.6, 10, 1, 4),
+    "figure": Footprint(0.1, 15, 1, 3),
+    "plant": Footprint(0.2, 8, 1, 6),
+    "pillows": Footprint(0.2, 5, 2, 8),
+    "rug": Footprint(4.0, 20, 1, 2),
+    "tv": Footprint(0.9, 40, 1, 1),
+    "speaker": Footprint(0.1, 15, 1, 4),
+    "purifier": Footprint(0.1, 30, 1, 2),
+    "refrigerator": Footprint(0.7, 100, 1, 1),
+    "oven": Footprint(0.5, 100, 1, 1),
+    "stovetop": Footprint(0.5, 100, 1, 1),
+}
+MAX_TYPE_WORDS = max(len(product_type.split()) for product_type in FOOTPRINTS)
+
+# Share of the room that is usable for furniture, by floorplan shape
+SHAPE_USABLE_AREA = {"square": 1.0, "rectangle": 0.95, "irregular": 0.8}
+
+# Confidence of each way to classify a product; below MIN_CONFIDENCE the caller asks the LLM.
+# A type that is only a modifier ("chair" in "chair cushion") is not what the product is.
+LEARNED_CONFIDENCE = 1.0
+PHRASE_CONFIDENCE = 0.9
+WORD_CONFIDENCE = 0.8
+MODIFIER_CONFIDENCE = 0.4
+MIN_CONFIDENCE = 0.5
+
+NUMBER_PATTERN = re.compile(r"\d+(?:\.\d+)?")
+
+
+class QuantityEstimator:
+    """Deterministic local quantity/size answers from a product-type footprint table
+
+    A product is classified by the longest product type ending at the head
+    noun (the last word) of its normalized name; a type found only earlier in
+    the name is a modifier and too uncertain to answer locally. Quantity scales
+    with the usable room area, which depends on the floorplan shape. Products
+    that cannot be classified confidently return None so the caller can ask
+    the LLM, whose answers `learn` adds to the table under the product's name.
+    """
+
+    def __init__(self, footprints=FOOTPRINTS, max_classified=4096):
+        self.footprints = dict(footprints)
+        self.learned = {}  # normalized product name -> Footprint
+        # LRU of normalized product name -> (Footprint, confidence), or None; names are client input
+        self.max_classified = max_classified
+        self._classified = OrderedDict()
+        self.local = 0
+        self.unclassified = 0
+
+    def classify(self, product_name):
+        """(Footprint, confidence) of a product, or None if its type is unknown"""
+        product = normalize_product_name(product_name)
+        if product in self.learned:
+            return self.learned[product], LEARNED_CONFIDENCE
+        if product in self._classified:
+            self._classified.move_to_end(product)
+            return self._classified[product]
+        classified = self._classify_words(product.split())
+        self._classified[product] = classified
+        if len(self._classified) > self.max_classified:
+            self._classified.popitem(last=False)
+        return classified
+
+    def _classify_words(self, words):
+        # Singular forms too, except for types listed in the plural
+        candidates = [words, [word[:-1] if word.endswith("s") else word for word in words]]
+        for end in range(len(words), 0, -1):
+            for n_words in range(min(MAX_TYPE_WORDS, end), 0, -1):
+                for candidate in candidates:
+                    footprint = self.footprints.get(" ".join(candidate[end - n_words:end]))
+                    if footprint is None:
+                        continue
+                    if end < len(words):
+                        return footprint, MODIFIER_CONFIDENCE
+                    return footprint, PHRASE_CONFIDENCE if n_words > 1 else WORD_CONFIDENCE
+        return None
+
+    def estimate(self, product_name, room_size, floorplan_shape=None, min_confidence=MIN_CONFIDENCE):
+        """Quantity and size for the room, or None when the LLM should answer instead"""
+        classified = self.classify(product_name)
+        if classified is None or classified[1] < min_confidence:
+            self.unclassified += 1
+            return None
+        footprint = classified[0]
+        usable_area = float(room_size) * SHAPE_USABLE_AREA.get((floorplan_shape or "").lower(), 1.0)
+        quantity = min(max(round(usable_area / footprint.room_sqm_per_piece), footprint.min_quantity),
+                       footprint.max_quantity)
+        self.local += 1
+        return {"quantity": f"{quantity} pcs", "size": f"{footprint.size:g} sqm"}
+
+    def learn(self, product_name, room_size, answer):
+        """Add an LLM answer for a product to the table, so later rooms are answered locally"""
+        quantity = NUMBER_PATTERN.search(answer["quantity"])
+        size = NUMBER_PATTERN.search(answer["size"])
+        if quantity is None or size is None or float(quantity.group(0)) <= 0:
+            return
+        quantity = float(quantity.group(0))
+        self.learned[normalize_product_name(product_name)] = Footprint(
+            float(size.group(0)), float(room_size) / quantity, 1, max(math.ceil(2 * quantity), 1)
+        )
+
+    def stats(self):
+        return {
+            "product_types": len(self.footprints),
+            "learned": len(self.learned),
+            "local": self.local,
+            "unclassified": self.unclassified,
+        }
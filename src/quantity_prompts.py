@@ -0,0 +1,148 @@
+import re
+import json
+import asyncio
+
+
+QUANTITY_PATTERN = re.compile(r"Quantity\W*\s*([\d.]+)\s*(?:pc|pcs|piece|pieces|unit|units)?", re.IGNORECASE)
+SIZE_PATTERN = re.compile(r"Size\W*\s*([\d.]+)\s*(?:sqm|sq m|square meter|square meters)?", re.IGNORECASE)
+SINGLE_QUANTITY_PATTERN = re.compile(r"Quantity:\s*([\d.]+)\s*(?:pc|pcs|piece|pieces|unit|units)", re.IGNORECASE)
+SINGLE_SIZE_PATTERN = re.compile(r"Size:\s*([\d.]+)\s*(?:sqm|sq m|square meter|square meters)", re.IGNORECASE)
+# "3.", "3)", "3:" or "Item 3 -" at the start of a line opens the answer for item 3
+ITEM_PATTERN = re.compile(r"^\s*[-*]?\s*(?:item\s*)?(\d+)\s*[.):\-]", re.IGNORECASE | re.MULTILINE)
+NUMBER_PATTERN = re.compile(r"\d+(?:\.\d+)?")
+
+
+def quantity_prompt(product_name, room_size):
+    return f"Given a room size of {room_size} square meters, and a recommended product named \"{product_name}\", I need two pieces of information:\n\n1. Suggest an appropriate quantity of that product to be placed in the room.\n2. Estimate the approximate size of this product in square meters (calculate as length x width).\n\nProvide your response in this exact format:\nQuantity: [number] pcs\nSize: [number] sqm\n\nEnsure the quantity makes sense for a typical room layout and the size is realistic for this type of product. Don't recommend the same values for every product."
+
+
+def bulk_quantity_prompt(product_names, room_size):
+    """One prompt asking for quantity and size of every product, answered as a JSON array"""
+    items = "\n".join(f"{i}. {name}" for i, name in enumerate(product_names, start=1))
+    return f"Given a room size of {room_size} square meters, and the following recommended products:\n\n{items}\n\nFor each product I need two pieces of information:\n\n1. Suggest an appropriate quantity of that product to be placed in the room.\n2. Estimate the approximate size of this product in square meters (calculate as length x width).\n\nRespond with only a JSON array containing one object per product, in the same order, in this exact format:\n[{{\"item\": 1, \"quantity\": [number], \"size\": [number]}}]\n\nEnsure the quantities make sense for a typical room layout with all of these products together and the sizes are realistic for each type of product."
+
+
+def _format_answer(quantity, size):
+    return {"quantity": f"{quantity} pcs", "size": f"{size} sqm"}
+
+
+def parse_quantity_answer(response_text):
+    """Quantity and size from a single-product answer, or None if either is missing"""
+    quantity_match = SINGLE_QUANTITY_PATTERN.search(response_text)
+    size_match = SINGLE_SIZE_PATTERN.search(response_text)
+    if not quantity_match or not size_match:
+        return None
+    return _format_answer(quantity_match.group(1), size_match.group(1))
+
+
+def _number(value):
+    """First number in a JSON value: 2, 2.5, "2 pcs" and "0.8 sqm" all work"""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return f"{value:g}"
+    match = NUMBER_PATTERN.search(str(value)) if value is not None else None
+    return match.group(0) if match else None
+
+
+def _parse_json_items(response_text, n_items):
+    start, end = response_text.find("["), response_text.rfind("]")
+    if start < 0 or end <= start:
+        return {}
+    try:
+        items = json.loads(response_text[start:end + 1])
+    except ValueError:
+        return {}
+
+    answers = {}
+    for position, item in enumerate(items if isinstance(items, list) else []):
+        if not isinstance(item, dict):
+            continue
+        fields = {str(key).lower(): value for key, value in item.items()}
+        index = _number(fields.get("item"))
+        # Without (or with a nonsensical) item number, trust the array order
+        index = int(float(index)) - 1 if index is not None else position
+        quantity, size = _number(fields.get("quantity")), _number(fields.get("size"))
+        if 0 <= index < n_items and quantity is not None and size is not None:
+            answers.setdefault(index, _format_answer(quantity, size))
+    return answers
+
+
+def _parse_numbered_items(response_text, n_items):
+    answers = {}
+    matches = list(ITEM_PATTERN.finditer(response_text))
+    for match, following in zip(matches, matches[1:] + [None]):
+        index = int(match.group(1)) - 1
+        block = response_text[match.end():following.start() if following else len(response_text)]
+        quantity_match, size_match = QUANTITY_PATTERN.search(block), SIZE_PATTERN.search(block)
+        if 0 <= index < n_items and quantity_match and size_match:
+            answers[index] = _format_answer(quantity_match.group(1), size_match.group(1))
+    return answers
+
+
+def parse_bulk_answer(response_text, n_items):
+    """Per-item answers of a bulk prompt as {item position: answer}; unusable items are left out
+
+    Accepts the requested JSON array (also inside code fences or surrounded by
+    prose) and falls back to numbered "3. ... Quantity: 2 pcs, Size: 1.5 sqm"
+    lines when the model ignored the format.
+    """
+    answers = _parse_json_items(response_text, n_items)
+    if len(answers) < n_items:
+        for index, answer in _parse_numbered_items(response_text, n_items).items():
+            answers.setdefault(index, answer)
+    return answers
+
+
+class QuantityBatch:
+    """Collects the cache misses of one bulk request and answers them with few prompts
+
+    `answer` is called for every product that has to be asked; `settle` for
+    every product whose lookup finished (hit, coalesced or asked). Once all
+    `expected` products are either waiting in the batch or settled, the
+    waiting ones are split into chunks of `max_items` and `ask_fn(products)`
+    runs once per chunk, concurrently. `ask_fn` returns {product: answer};
+    products it leaves out (or whose chunk failed) get `missing_error()`.
+    """
+
+    def __init__(self, expected, ask_fn, max_items, missing_error):
+        self.expected = set(expected)
+        self.ask_fn = ask_fn
+        self.max_items = max_items
+        self.missing_error = missing_error
+        self.prompts = 0
+        self._waiting = {}  # product -> future
+        self._settled = set()
+        self._task = None
+
+    async def answer(self, product):
+        future = asyncio.get_running_loop().create_future()
+        self._waiting[product] = future
+        self._maybe_flush()
+        return await future
+
+    def settle(self, product):
+        self._settled.add(product)
+        self._maybe_flush()
+
+    def _maybe_flush(self):
+        if self._task is None and self.expected <= self._settled | set(self._waiting):
+            self._task = asyncio.ensure_future(self._run())
+
+    async def _run(self):
+        products = list(self._waiting)
+        chunks = [products[i:i + self.max_items] for i in range(0, len(products), self.max_items)]
+        self.prompts = len(chunks)
+        results = await asyncio.gather(*(self.ask_fn(chunk) for chunk in chunks), return_exceptions=True)
+        for chunk, result in zip(chunks, results):
+            for product in chunk:
+                future = self._waiting[product]
+                if future.done():
+                    # The request waiting for it was cancelled
+                    continue
+                if isinstance(result, BaseException):
+                    future.set_exception(self.missing_error(str(result)))
+                elif product in result:
+                    future.set_result(result[product])
+                else:
+                    future.set_exception(self.missing_error("no answer for the product in the bulk response"))
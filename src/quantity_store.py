@@ -0,0 +1,82 @@
+import os
+import re
+import math
+import time
+import sqlite3
+import threading
+
+
+# Room sizes are bucketed so nearby sizes share one answer (and one LLM call)
+ROOM_SIZE_BUCKET_SQM = 5.0
+
+
+def normalize_product_name(name):
+    """Case-, punctuation- and whitespace-insensitive product name used in cache keys"""
+    return " ".join(re.sub(r"[^\w.]+", " ", name.lower()).split())
+
+
+def room_size_bucket(room_size, bucket=ROOM_SIZE_BUCKET_SQM):
+    """Round a room size (sqm, number or string) to the nearest bucket, never below one bucket"""
+    size = float(room_size)
+    if not math.isfinite(size) or size <= 0:
+        raise ValueError(f"Invalid room size: {room_size}")
+    return max(bucket, round(size / bucket) * bucket)
+
+
+class QuantityStore:
+    """On-disk store of quantity answers keyed by (normalized product name, room size bucket)
+
+    A small SQLite table, so answers survive restarts and are shared by every
+    worker process on the host. Calls block and belong on the I/O pool.
+    Entries older than `ttl` seconds are ignored.
+    """
+
+    def __init__(self, path, ttl=30 * 24 * 3600):
+        self.path = path
+        self.ttl = ttl
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS quantities ("
+                " product TEXT NOT NULL, room_bucket REAL NOT NULL,"
+                " quantity TEXT NOT NULL, size TEXT NOT NULL, stored_at REAL NOT NULL,"
+                " PRIMARY KEY (product, room_bucket))"
+            )
+
+    def _connect(self):
+        # One connection per thread; SQLite connections must not be shared across threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, product, room_bucket):
+        row = self._connect().execute(
+            "SELECT quantity, size, stored_at FROM quantities WHERE product = ? AND room_bucket = ?",
+            (product, room_bucket),
+        ).fetchone()
+        if row is None or time.time() - row[2] > self.ttl:
+            return None
+        return {"quantity": row[0], "size": row[1]}
+
+    def put(self, product, room_bucket, answer):
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO quantities VALUES (?, ?, ?, ?, ?)",
+                (product, room_bucket, answer["quantity"], answer["size"], time.time()),
+            )
+
+    def answers(self):
+        """Every unexpired (product, room_bucket, answer), oldest first"""
+        rows = self._connect().execute(
+            "SELECT product, room_bucket, quantity, size FROM quantities WHERE stored_at >= ? ORDER BY stored_at",
+            (time.time() - self.ttl,),
+        ).fetchall()
+        return [(product, room_bucket, {"quantity": quantity, "size": size})
+                for product, room_bucket, quantity, size in rows]
+
+    def __len__(self):
+        return self._connect().execute("SELECT COUNT(*) FROM quantities").fetchone()[0]
@@ -0,0 +1,160 @@
+import time
+import asyncio
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+
+
+class QueryCache:
+    """Size-bounded LRU cache of query results with TTL and stale-while-revalidate
+
+    - Entries younger than `ttl` are served directly.
+    - Entries older than `ttl` but younger than `ttl + stale_ttl` are served
+      stale while a single background refresh fetches a new value.
+    - Concurrent misses for the same key share one fetch (single-flight).
+    - Failed fetches are never cached; the error goes to every waiting caller.
+
+    `get` takes a plain fetch function; `get_async` takes a coroutine function
+    and runs fetches on the event loop. Cached values are shared between
+    callers and must be treated as read-only.
+    """
+
+    def __init__(self, ttl=300.0, stale_ttl=600.0, max_entries=512, refresh_workers=2):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (value, stored_at)
+        self._in_flight = {}  # key -> Future of the running fetch
+        self._lock = threading.Lock()
+        self._refresh_pool = ThreadPoolExecutor(
+            max_workers=refresh_workers, thread_name_prefix="query-cache-refresh"
+        )
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.refresh_errors = 0
+        self._background_tasks = set()
+
+    @staticmethod
+    def _new_future():
+        # Shared by every waiter: mark it running so one cancelled awaiter
+        # (asyncio.wrap_future propagates cancellation) cannot cancel it for all
+        future = Future()
+        future.set_running_or_notify_cancel()
+        return future
+
+    def _fail(self, key, future, error, background):
+        with self._lock:
+            if self._in_flight.get(key) is future:
+                del self._in_flight[key]
+            if background:
+                self.refresh_errors += 1
+        if background:
+            print(f"Error refreshing cached query {key}: {str(error)}")
+        future.set_exception(error)
+
+    def _store(self, key, future, value):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+            if self._in_flight.get(key) is future:
+                del self._in_flight[key]
+        future.set_result(value)
+
+    def _run_fetch(self, key, fetch, future, background=False):
+        try:
+            value = fetch()
+        except BaseException as e:
+            self._fail(key, future, e, background)
+            return
+        self._store(key, future, value)
+
+    async def _run_fetch_async(self, key, fetch, future, background=False):
+        try:
+            value = await fetch()
+        except BaseException as e:
+            self._fail(key, future, e, background)
+            return
+        self._store(key, future, value)
+
+    def _claim(self, key, force_refresh):
+        """Look key up under the lock
+
+        Returns (state, payload, refresh). state is "hit" with the cached value
+        as payload, "wait" with the in-flight fetch's future, or "fetch" with a
+        new future the caller must fulfil. refresh is a new future for a
+        background refresh the caller must start, or None.
+        """
+        with self._lock:
+            entry = None if force_refresh else self._entries.get(key)
+            if entry is not None:
+                value, stored_at = entry
+                age = time.monotonic() - stored_at
+                if age < self.ttl:
+                    self.hits += 1
+                    self._entries.move_to_end(key)
+                    return "hit", value, None
+                if age < self.ttl + self.stale_ttl:
+                    self.stale_hits += 1
+                    self._entries.move_to_end(key)
+                    refresh = None
+                    if key not in self._in_flight:
+                        refresh = self._new_future()
+                        self._in_flight[key] = refresh
+                    return "hit", value, refresh
+
+            future = None if force_refresh else self._in_flight.get(key)
+            if future is not None:
+                self.coalesced += 1
+                return "wait", future, None
+
+            self.misses += 1
+            future = self._new_future()
+            self._in_flight[key] = future
+            return "fetch", future, None
+
+    def get(self, key, fetch, force_refresh=False):
+        """Return the cached value for key, calling `fetch()` to (re)load it when needed"""
+        state, payload, refresh = self._claim(key, force_refresh)
+        if refresh is not None:
+            self._refresh_pool.submit(self._run_fetch, key, fetch, refresh, True)
+        if state == "hit":
+            return payload
+        if state == "fetch":
+            self._run_fetch(key, fetch, payload)
+        return payload.result()
+
+    async def get_async(self, key, fetch, force_refresh=False):
+        """Async variant of `get`; `fetch` is a coroutine function awaited on the event loop"""
+        state, payload, refresh = self._claim(key, force_refresh)
+        if refresh is not None:
+            task = asyncio.ensure_future(self._run_fetch_async(key, fetch, refresh, True))
+            self._background_tasks.add(task)
+            task.add_done_callback(self._background_tasks.discard)
+        if state == "hit":
+            return payload
+        if state == "fetch":
+            await self._run_fetch_async(key, fetch, payload)
+        return await asyncio.wrap_future(payload)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "in_flight": len(self._in_flight),
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "evictions": self.evictions,
+                "refresh_errors": self.refresh_errors,
+            }
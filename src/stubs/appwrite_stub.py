@@ -0,0 +1,101 @@
+"""Local stand-in for the Appwrite documents API
+
+Serves `GET /v1/databases/{database_id}/collections/{collection_id}/documents`
+from an in-memory document list so the data access layer can be exercised
+without a real Appwrite project. Supports the query methods the backend
+uses (equal, limit, offset, cursorAfter, greaterThan, greaterThanEqual,
+orderAsc).
+
+Run with:
+    APPWRITE_STUB_LATENCY=0.05 uvicorn src.stubs.appwrite_stub:app --port 8090
+and point VITE_APPWRITE_ENDPOINT at http://localhost:8090/v1
+"""
+import os
+import json
+import asyncio
+from typing import List, Optional
+from fastapi import FastAPI, Query as QueryParam
+
+app = FastAPI()
+
+# Simulated round-trip latency in seconds
+LATENCY = float(os.getenv("APPWRITE_STUB_LATENCY", "0"))
+
+SAMPLE_DOCUMENTS = [
+    {"name": "Loveseat Sofa", "category": "Living Room", "style": "Minimalist"},
+    {"name": "Coffee Table", "category": "Living Room", "style": "Minimalist"},
+    {"name": "Bed Frame", "category": "Bedroom", "style": "Modern"},
+    {"name": "Bar Stool", "category": "Kitchen", "style": "Modern"},
+    {"name": "Matte Porcelain Tiles", "category": "Flooring", "style": "Modern"},
+]
+
+
+def _make_document(i, product):
+    # Expose both the backend field names and the recommender's column names
+    return {
+        "$id": f"doc{i:06d}",
+        "$updatedAt": f"2024-01-01T00:00:{i % 60:02d}.000+00:00",
+        "name": product["name"],
+        "category": product["category"],
+        "style": product["style"],
+        "image_url": "",
+        "PRODUCT_NAME": product["name"],
+        "CATEGORY": product["category"],
+        "STYLE": product["style"],
+        "IMAGE": f"file{i:06d}",
+    }
+
+
+def load_documents():
+    path = os.getenv("APPWRITE_STUB_DATA")
+    products = SAMPLE_DOCUMENTS
+    if path:
+        with open(path, "r") as f:
+            products = json.load(f)
+    return [_make_document(i, product) for i, product in enumerate(products)]
+
+
+documents = load_documents()
+request_count = 0
+
+
+def apply_queries(docs, queries):
+    limit = 25
+    offset = 0
+    for raw in queries:
+        query = json.loads(raw)
+        method = query["method"]
+        attribute = query.get("attribute")
+        values = query.get("values", [])
+        if method == "equal":
+            docs = [d for d in docs if d.get(attribute) in values]
+        elif method == "greaterThan":
+            docs = [d for d in docs if d.get(attribute, "") > values[0]]
+        elif method == "greaterThanEqual":
+            docs = [d for d in docs if d.get(attribute, "") >= values[0]]
+        elif method == "orderAsc":
+            docs = sorted(docs, key=lambda d: d.get(attribute, ""))
+        elif method == "cursorAfter":
+            ids = [d["$id"] for d in docs]
+            docs = docs[ids.index(values[0]) + 1:] if values[0] in ids else []
+        elif method == "limit":
+            limit = values[0]
+        elif method == "offset":
+            offset = values[0]
+    return docs, docs[offset:offset + limit]
+
+
+@app.get("/v1/databases/{database_id}/collections/{collection_id}/documents")
+async def list_documents(database_id: str, collection_id: str,
+                         queries: Optional[List[str]] = QueryParam(None, alias="queries[]")):
+    global request_count
+    request_count += 1
+    if LATENCY:
+        await asyncio.sleep(LATENCY)
+    matched, page = apply_queries(documents, queries or [])
+    return {"total": len(matched), "documents": page}
+
+
+@app.get("/stub/stats")
+async def stats():
+    return {"requests": request_count, "documents": len(documents)}
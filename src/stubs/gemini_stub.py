@@ -0,0 +1,67 @@
+"""Local stand-in for the Gemini `generateContent` API
+
+Answers the single-product quantity prompt with deterministic "Quantity: N pcs /
+Size: X sqm" text and the bulk prompt with the same values as a JSON array,
+so the quantity endpoints, their caches and the circuit breaker can be
+exercised without a Gemini key or network access.
+
+Run with:
+    GEMINI_STUB_LATENCY=0.8 GEMINI_STUB_FAILURE_RATE=0.1 uvicorn src.stubs.gemini_stub:app --port 8091
+and set GEMINI_API_URL=http://localhost:8091/v1 and GEMINI_API_KEY=stub
+"""
+import os
+import re
+import json
+import random
+import asyncio
+import hashlib
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+app = FastAPI()
+
+# Simulated model latency in seconds, and share of calls answered with HTTP 503
+LATENCY = float(os.getenv("GEMINI_STUB_LATENCY", "0"))
+FAILURE_RATE = float(os.getenv("GEMINI_STUB_FAILURE_RATE", "0"))
+
+request_count = 0
+
+
+def answer_for(product, room_size):
+    digest = int(hashlib.sha1(f"{product}|{room_size}".encode("utf-8")).hexdigest(), 16)
+    quantity = 1 + digest % 4
+    size = 0.2 + (digest >> 8) % 30 / 10
+    return quantity, round(size, 1)
+
+
+def respond(prompt):
+    """Single-product prompts get "Quantity/Size" lines, bulk prompts a JSON array"""
+    room_size = re.search(r"room size of ([\d.]+)", prompt).group(1)
+    single = re.search(r'product named "(.*)"', prompt)
+    if single:
+        quantity, size = answer_for(single.group(1), room_size)
+        return f"Quantity: {quantity} pcs\nSize: {size} sqm"
+    products = re.findall(r"^\d+\. (.+)$", prompt.split("For each product")[0], re.MULTILINE)
+    items = [
+        {"item": i, "quantity": quantity, "size": size}
+        for i, (quantity, size) in enumerate((answer_for(p, room_size) for p in products), start=1)
+    ]
+    return f"```json\n{json.dumps(items)}\n```"
+
+
+@app.post("/v1/models/{model_action}")
+async def generate_content(model_action: str, request: Request):
+    global request_count
+    request_count += 1
+    if LATENCY:
+        await asyncio.sleep(LATENCY)
+    if random.random() < FAILURE_RATE:
+        return JSONResponse(status_code=503, content={"error": {"message": "stub overloaded"}})
+    body = await request.json()
+    prompt = body["contents"][0]["parts"][0]["text"]
+    return {"candidates": [{"content": {"parts": [{"text": respond(prompt)}], "role": "model"}}]}
+
+
+@app.get("/stub/stats")
+async def stats():
+    return {"requests": request_count}
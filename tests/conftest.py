@@ -0,0 +1,11 @@
+import os
+import sys
+import tempfile
+
+# Add project root to path so `src` resolves, as the scripts under src/ do
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(PROJECT_ROOT)
+os.chdir(PROJECT_ROOT)
+
+# Keep the server's on-disk caches out of the source tree
+os.environ.setdefault("QUANTITY_CACHE_PATH", os.path.join(tempfile.mkdtemp(prefix="quantity-cache-"), "quantity.sqlite"))
@@ -0,0 +1,96 @@
+import time
+import asyncio
+
+import httpx
+import pytest
+
+from src import main
+from src.appwrite_data import AsyncAppwriteDatabase
+from src.query_cache import QueryCache
+from src.stubs import appwrite_stub
+
+STUB_URL = "http://appwrite-stub/v1"
+
+
+@pytest.fixture
+def stub_db(monkeypatch):
+    """Point get_matching_products at the in-process Appwrite stub, with an empty query cache"""
+    monkeypatch.setattr(main, "PRODUCTS_COLLECTION_ID", "products")
+    monkeypatch.setattr(main, "appwrite_query_cache", QueryCache(ttl=300, stale_ttl=600, max_entries=512))
+    monkeypatch.setattr(appwrite_stub, "request_count", 0)
+
+    def use(timeout=1.0, transport=None):
+        db = AsyncAppwriteDatabase(
+            STUB_URL, "project", "key", "db", timeout=timeout,
+            transport=transport or httpx.ASGITransport(app=appwrite_stub.app),
+        )
+        monkeypatch.setattr(main, "appwrite_db", db)
+        return db
+
+    return use
+
+
+def matching_products(db, *args, **kwargs):
+    async def run():
+        try:
+            return await main.get_matching_products(*args, **kwargs)
+        finally:
+            await db.aclose()
+
+    return asyncio.run(run())
+
+
+def test_room_style_and_flooring_queries_run_concurrently(stub_db, monkeypatch):
+    monkeypatch.setattr(appwrite_stub, "LATENCY", 0.2)
+    db = stub_db()
+
+    start = time.perf_counter()
+    products = matching_products(db, "Living Room", "Minimalist", "Matte Porcelain Tiles")
+    elapsed = time.perf_counter() - start
+
+    assert [product["name"] for product in products] == ["Loveseat Sofa", "Coffee Table", "Matte Porcelain Tiles"]
+    assert appwrite_stub.request_count == 2
+    # Two sequential round trips would take at least 0.4 s
+    assert elapsed < 0.35
+
+
+def test_repeated_queries_are_served_from_the_cache(stub_db):
+    db = stub_db()
+    first = matching_products(db, "Bedroom", "Modern", None)
+    second = matching_products(db, "Bedroom", "Modern", None)
+
+    assert first == second and [product["name"] for product in first] == ["Bed Frame"]
+    assert appwrite_stub.request_count == 1
+
+
+def test_timeout_yields_no_products(stub_db, monkeypatch):
+    monkeypatch.setattr(appwrite_stub, "LATENCY", 0.5)
+    db = stub_db(timeout=0.05)
+
+    start = time.perf_counter()
+    assert matching_products(db, "Living Room", "Minimalist", "Matte Porcelain Tiles") == []
+    assert time.perf_counter() - start < 0.4
+
+
+def test_timeout_raises_when_errors_are_not_suppressed(stub_db, monkeypatch):
+    monkeypatch.setattr(appwrite_stub, "LATENCY", 0.5)
+    db = stub_db(timeout=0.05)
+
+    with pytest.raises((asyncio.TimeoutError, httpx.TimeoutException)):
+        matching_products(db, "Living Room", "Minimalist", None, suppress_errors=False)
+
+
+def test_failure_yields_no_products_and_is_not_cached(stub_db, monkeypatch):
+    apply_queries = appwrite_stub.apply_queries
+
+    def fail(docs, queries):
+        raise RuntimeError("database unavailable")
+
+    monkeypatch.setattr(appwrite_stub, "apply_queries", fail)
+    db = stub_db(transport=httpx.ASGITransport(app=appwrite_stub.app, raise_app_exceptions=False))
+    assert matching_products(db, "Kitchen", "Modern", None) == []
+    with pytest.raises(httpx.HTTPStatusError):
+        matching_products(db, "Kitchen", "Modern", None, suppress_errors=False)
+
+    monkeypatch.setattr(appwrite_stub, "apply_queries", apply_queries)
+    assert [product["name"] for product in matching_products(db, "Kitchen", "Modern", None)] == ["Bar Stool"]
@@ -0,0 +1,55 @@
+import pandas as pd
+
+from src.catalog_index import CatalogIndex
+
+
+def make_catalog():
+    return pd.DataFrame({
+        'PRODUCT_NAME': ['Sofa', 'Coffee Table', 'Bed Frame', 'Oak Planks', 'Lamp'],
+        'CATEGORY': ['Living Room', 'Living Room', 'Bedroom', 'Flooring', 'Living Room'],
+        'STYLE': ['Minimalist', 'Minimalist', 'Modern', 'Modern', 'Rustic'],
+    })
+
+
+def apply(index, df, changed, removed_rows):
+    """Append `changed` rows and retire `removed_rows`, as FurnitureRecommender.apply_catalog_changes does"""
+    grown = pd.concat([df, changed], ignore_index=True)
+    index.apply_changes(grown, range(len(df), len(grown)), removed_rows)
+    return grown
+
+
+def test_facets_count_only_live_rows_after_update_and_delete():
+    df = make_catalog()
+    index = CatalogIndex(df)
+
+    # Update the sofa (Minimalist -> Modern) and delete the only Rustic product
+    updated = df.iloc[[0]].assign(STYLE='Modern')
+    apply(index, df, updated, removed_rows=[0, 4])
+
+    styles = {facet['name']: facet['count'] for facet in index.facets.styles}
+    assert styles == {'Minimalist': 1, 'Modern': 3}
+    assert sum(styles.values()) == 4
+    assert index.facets.styles_response.body == b'{"styles":["Minimalist","Modern"]}'
+    assert {facet['name']: facet['count'] for facet in index.facets.categories} == {
+        'Bedroom': 1, 'Flooring': 1, 'Living Room': 2,
+    }
+
+
+def test_lookups_skip_retired_rows_and_find_added_ones():
+    df = make_catalog()
+    index = CatalogIndex(df)
+    added = pd.DataFrame({'PRODUCT_NAME': ['Armchair'], 'CATEGORY': ['Living Room'], 'STYLE': ['Boho']})
+    grown = apply(index, df, added, removed_rows=[1])
+
+    assert list(index.category_rows('Living Room')) == [0, 4, 5]
+    assert list(index.category_style_rows('Living Room', 'Boho')) == [5]
+    assert index.styles[index.style_codes[5]] == 'Boho'
+    assert index.style_codes[1] == -1
+    assert len(index.style_codes) == len(grown)
+
+
+def test_requests_are_matched_to_the_catalog_spelling():
+    index = CatalogIndex(make_catalog())
+
+    assert index.canonical_request(' living ROOM ', 'minimalist', 'oak planks') == ('Living Room', 'Minimalist', 'Oak Planks')
+    assert index.canonical_request('Garage', ' Boho ', '') == ('Garage', 'Boho', None)
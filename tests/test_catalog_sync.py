@@ -0,0 +1,117 @@
+import json
+
+import pandas as pd
+import pytest
+
+pytest.importorskip("tensorflow")
+
+from src import products_recommender
+from src.products_recommender import FurnitureRecommender, PRODUCT_COLUMNS
+
+
+class FakeDatabases:
+    """In-memory products collection answering the cursor-paged queries of the sync"""
+
+    documents = {}
+
+    def __init__(self, client):
+        pass
+
+    def list_documents(self, database_id, collection_id, queries):
+        queries = [json.loads(query) for query in queries]
+        documents = sorted(self.documents.values(), key=lambda doc: (doc['$updatedAt'], doc['$id']))
+        limit = len(documents)
+        for query in queries:
+            if query['method'] == 'greaterThanEqual':
+                documents = [doc for doc in documents if doc['$updatedAt'] >= query['values'][0]]
+            elif query['method'] == 'limit':
+                limit = query['values'][0]
+        for query in queries:
+            if query['method'] == 'cursorAfter':
+                ids = [doc['$id'] for doc in documents]
+                documents = documents[ids.index(query['values'][0]) + 1:]
+        return {'documents': documents[:limit]}
+
+
+def document(file_id, name, style, updated_at):
+    return {'$id': file_id, '$updatedAt': updated_at, 'PRODUCT_NAME': name,
+            'CATEGORY': 'Living Room', 'STYLE': style, 'IMAGE': f'{file_id}.jpg'}
+
+
+@pytest.fixture
+def collection(monkeypatch):
+    monkeypatch.setattr(products_recommender, 'Databases', FakeDatabases)
+    monkeypatch.setattr(FurnitureRecommender, '_init_appwrite_client', lambda self: None)
+    monkeypatch.setattr(FakeDatabases, 'documents', {
+        'a': document('a', 'Sofa', 'Modern', '2026-01-01'),
+        'b': document('b', 'Lamp', 'Rustic', '2026-01-02'),
+        'c': document('c', 'Rug', 'Boho', '2026-01-03'),
+    })
+    return FakeDatabases.documents
+
+
+def test_incremental_sync_reports_changes_and_deletions(collection, tmp_path):
+    snapshot_path = str(tmp_path / 'snapshot.joblib')
+    recommender = FurnitureRecommender()
+    products, changed, deleted_ids = recommender._sync_catalog_snapshot(snapshot_path=snapshot_path)
+    assert len(products) == len(changed) == 3 and deleted_ids == []
+
+    collection['a'] = document('a', 'Sofa', 'Minimalist', '2026-01-04')
+    del collection['b']
+    products, changed, deleted_ids = recommender._sync_catalog_snapshot(snapshot_path=snapshot_path)
+
+    # 'c' is refetched by the inclusive marker but did not change
+    assert changed['file_id'].tolist() == ['a']
+    assert changed['STYLE'].tolist() == ['Minimalist']
+    assert deleted_ids == ['b']
+    assert sorted(products['file_id']) == ['a', 'c']
+    assert recommender.catalog_synced_at == '2026-01-04'
+
+
+def loaded_recommender(collection, synced_at):
+    """A recommender as load_bundle leaves it, applying changes to its catalog only"""
+    recommender = FurnitureRecommender()
+    recommender.df = pd.DataFrame(
+        [[doc['PRODUCT_NAME'], doc['CATEGORY'], doc['STYLE'], doc['IMAGE'], doc['$id']] for doc in collection.values()],
+        columns=PRODUCT_COLUMNS,
+    )
+    recommender.catalog_synced_at = synced_at
+    recommender.applied = []
+
+    def apply_catalog_changes(changed, deleted_ids):
+        recommender.applied.append((changed['file_id'].tolist(), deleted_ids))
+        kept = recommender.df[~recommender.df['file_id'].isin([*changed['file_id'], *deleted_ids])]
+        recommender.df = pd.concat([kept, changed], ignore_index=True)
+        return {}
+
+    recommender.apply_catalog_changes = apply_catalog_changes
+    return recommender
+
+
+def test_first_sync_diffs_against_the_loaded_catalog(collection):
+    recommender = loaded_recommender(collection, '2026-01-03')
+
+    del collection['a']
+    collection['d'] = document('d', 'Chair', 'Modern', '2026-01-05')
+    recommender.sync_incremental()
+
+    assert recommender.applied == [(['d'], ['a'])]
+    assert recommender.catalog_synced_at == '2026-01-05'
+
+
+def test_every_worker_of_a_bundle_receives_the_synced_products(collection, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    workers = [loaded_recommender(collection, '2026-01-03') for _ in range(2)]
+
+    collection['d'] = document('d', 'Chair', 'Modern', '2026-01-05')
+    workers[0].sync_incremental()
+    workers[1].sync_incremental()
+    # A restarted server loads the same bundle again
+    restarted = loaded_recommender({key: doc for key, doc in collection.items() if key != 'd'}, '2026-01-03')
+    restarted.sync_incremental()
+
+    for worker in [*workers, restarted]:
+        assert 'Chair' in set(worker.df['PRODUCT_NAME'])
+        assert worker.applied == [(['d'], [])]
+    # Incremental syncs keep their state in the model, not in a shared snapshot file
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,44 @@
+import io
+
+import pytest
+from PIL import Image, ImageDraw
+
+from src.floorplan_classifier import FloorplanClassifier
+
+
+def make_scan(mode, size=(3000, 2500), outline=(300, 300, 2700, 2200)):
+    """PNG floorplan scan with one rectangular outline, saved in `mode`"""
+    image = Image.new("L", size, 245)
+    ImageDraw.Draw(image).rectangle(outline, outline=0, width=15)
+    if mode == "1":
+        image = image.convert("1", dither=Image.Dither.NONE)
+    elif mode == "I;16":
+        image = image.convert("I").convert("I;16")
+    else:
+        image = image.convert(mode)
+    buffer = io.BytesIO()
+    image.save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+@pytest.mark.parametrize("mode", ["P", "1", "I;16", "L", "RGB", "RGBA"])
+def test_measures_large_scans_in_every_mode(mode):
+    classifier = FloorplanClassifier()
+    model_input, measurement = classifier.decode_and_measure(make_scan(mode), pixels_per_meter=100)
+
+    assert model_input.shape == (224, 224, 3)
+    assert measurement["unit"] == "m"
+    assert measurement["width"] == pytest.approx(24.0, abs=0.1)
+    assert measurement["height"] == pytest.approx(19.0, abs=0.1)
+    assert measurement["area"] == pytest.approx(24.0 * 19.0, rel=0.01)
+
+
+def test_measurement_failure_keeps_the_model_input(monkeypatch):
+    def fail(*args, **kwargs):
+        raise ValueError("image has wrong mode")
+
+    monkeypatch.setattr("src.floorplan_classifier.measure_floorplan", fail)
+    model_input, measurement = FloorplanClassifier().decode_and_measure(make_scan("RGB"))
+
+    assert model_input.shape == (224, 224, 3)
+    assert measurement is None
@@ -0,0 +1,60 @@
+import asyncio
+
+import httpx
+
+from src import main
+
+
+def post_floorplans(files):
+    async def run():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://app") as client:
+            return await client.post("/api/classify-floorplans", files=files)
+
+    return asyncio.run(run())
+
+
+def floorplan_files(count, size):
+    return [("files", (f"plan{i}.png", b"x" * size, "image/png")) for i in range(count)]
+
+
+def test_too_many_files_are_rejected(monkeypatch):
+    monkeypatch.setattr(main, "FLOORPLAN_BATCH_MAX_FILES", 3)
+    response = post_floorplans(floorplan_files(4, 10))
+    assert response.status_code == 413
+    assert "At most 3 floorplans" in response.json()["detail"]
+
+
+def test_total_size_is_capped(monkeypatch):
+    monkeypatch.setattr(main, "FLOORPLAN_BATCH_MAX_BYTES", 250)
+    response = post_floorplans(floorplan_files(3, 100))
+    assert response.status_code == 413
+    assert "250 bytes in total" in response.json()["detail"]
+
+
+def test_single_file_limit_still_applies(monkeypatch):
+    monkeypatch.setattr(main.floorplan_classifier, "max_upload_bytes", 50)
+    response = post_floorplans(floorplan_files(1, 100))
+    assert response.status_code == 413
+    assert response.json()["detail"] == "Floorplan image exceeds 50 bytes"
+
+
+def test_files_within_the_caps_are_read(monkeypatch):
+    read = []
+    monkeypatch.setattr(main, "FLOORPLAN_BATCH_MAX_BYTES", 300)
+
+    def stop(*args):
+        # The model is not loaded here; stop once the uploads were accepted
+        raise main.HTTPException(status_code=503, detail="stopped")
+
+    original = main._read_floorplan_upload
+
+    async def record(file, budget=None):
+        read.append(budget)
+        return await original(file, budget)
+
+    monkeypatch.setattr(main, "_read_floorplan_upload", record)
+    monkeypatch.setattr(main, "_ensure_floorplan_model", stop)
+    response = post_floorplans(floorplan_files(3, 100))
+    assert response.status_code == 503
+    assert read == [300, 200, 100]
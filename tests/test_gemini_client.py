@@ -0,0 +1,106 @@
+import asyncio
+
+import httpx
+import pytest
+
+from src.gemini_client import AsyncGeminiClient, CircuitBreaker, CircuitOpen, GeminiError
+from src.stubs import gemini_stub
+
+STUB_URL = "http://gemini-stub/v1"
+PROMPT = 'Given a room size of 20 square meters, and a recommended product named "sofa", ...'
+
+
+def make_client(transport=None, timeout=1.0, reset_timeout=0.05):
+    return AsyncGeminiClient(
+        "stub", base_url=STUB_URL, timeout=timeout,
+        breaker=CircuitBreaker(failure_threshold=1, reset_timeout=reset_timeout),
+        transport=transport or httpx.ASGITransport(app=gemini_stub.app),
+    )
+
+
+async def open_breaker(client):
+    """Fail once so the threshold-1 breaker opens, then wait until it lets a trial through"""
+    client.breaker.record_failure()
+    assert client.breaker.state == "open"
+    await asyncio.sleep(client.breaker.reset_timeout)
+
+
+def test_answers_from_the_stub():
+    async def run():
+        client = make_client()
+        text = await client.generate(PROMPT)
+        await client.aclose()
+        return text
+
+    assert asyncio.run(run()).startswith("Quantity: ")
+
+
+def test_open_breaker_rejects_without_calling():
+    async def run():
+        client = make_client(reset_timeout=60)
+        client.breaker.record_failure()
+        with pytest.raises(CircuitOpen):
+            await client.generate(PROMPT)
+        return client.breaker.status()
+
+    assert asyncio.run(run())["rejected"] == 1
+
+
+@pytest.mark.parametrize("body", [
+    {"candidates": [{"content": None}]},
+    {"candidates": "none"},
+    {"candidates": [{"content": {"parts": [{"text": 3}]}}]},
+    ["not", "an", "object"],
+])
+def test_malformed_body_in_half_open_trial_reopens_the_breaker(body):
+    transport = httpx.MockTransport(lambda request: httpx.Response(200, json=body))
+
+    async def run():
+        client = make_client(transport=transport)
+        await open_breaker(client)
+        with pytest.raises(GeminiError):
+            await client.generate(PROMPT)
+        return client.breaker
+
+    breaker = asyncio.run(run())
+    assert breaker.state == "open"
+
+
+def test_cancelled_half_open_trial_does_not_wedge_the_breaker(monkeypatch):
+    monkeypatch.setattr(gemini_stub, "LATENCY", 0.5)
+
+    async def run():
+        client = make_client()
+        await open_breaker(client)
+        trial = asyncio.ensure_future(client.generate(PROMPT))
+        await asyncio.sleep(0.05)
+        assert client.breaker.state == "half_open"
+        trial.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await trial
+        assert client.breaker.state == "open"
+
+        # After the reset timeout the next trial goes through and closes the breaker
+        monkeypatch.setattr(gemini_stub, "LATENCY", 0)
+        await asyncio.sleep(client.breaker.reset_timeout)
+        text = await client.generate(PROMPT)
+        await client.aclose()
+        return client.breaker, text
+
+    breaker, text = asyncio.run(run())
+    assert breaker.state == "closed"
+    assert text.startswith("Quantity: ")
+
+
+def test_deadline_counts_as_failure(monkeypatch):
+    monkeypatch.setattr(gemini_stub, "LATENCY", 1.0)
+
+    async def run():
+        client = make_client(timeout=0.1, reset_timeout=60)
+        with pytest.raises(asyncio.TimeoutError):
+            await client.generate(PROMPT)
+        with pytest.raises(CircuitOpen):
+            await client.generate(PROMPT)
+        return client.breaker
+
+    assert asyncio.run(run()).state == "open"
@@ -0,0 +1,45 @@
+import os
+
+import h5py
+import joblib
+
+from src.model_bundle import resolve_legacy_path
+
+SHIPPED_MODEL = "src/models/furniture_recommender.h5"
+ARTIFACT_ATTRS = ["vectorizer_path", "encoder_path", "scaler_path", "df_path"]
+
+
+def test_windows_paths_resolve_next_to_the_model(tmp_path, monkeypatch):
+    model_dir = tmp_path / "models"
+    (model_dir / "attrs").mkdir(parents=True)
+    (model_dir / "attrs" / "vectorizer.joblib").write_bytes(b"")
+    model_path = str(model_dir / "furniture_recommender.h5")
+    with h5py.File(model_path, "w") as h5file:
+        h5file.attrs["vectorizer_path"] = "C:\\training\\src\\models\\attrs\\vectorizer.joblib"
+
+    # Another working directory: the stored path means nothing here
+    monkeypatch.chdir(tmp_path)
+    with h5py.File(model_path, "r") as h5file:
+        resolved = resolve_legacy_path(h5file.attrs["vectorizer_path"], model_path)
+    assert resolved == os.path.join(str(model_dir), "attrs", "vectorizer.joblib")
+
+
+def test_backslash_separators_are_normalized(tmp_path, monkeypatch):
+    (tmp_path / "src" / "models" / "attrs").mkdir(parents=True)
+    (tmp_path / "src" / "models" / "attrs" / "scaler.joblib").write_bytes(b"")
+    monkeypatch.chdir(tmp_path)
+    assert resolve_legacy_path(b"src/models\\attrs\\scaler.joblib", "elsewhere/model.h5") == \
+        "src/models/attrs/scaler.joblib"
+
+
+def test_missing_artifact_keeps_the_stored_path_for_the_error(tmp_path):
+    assert resolve_legacy_path("src\\gone.joblib", str(tmp_path / "model.h5")) == "src/gone.joblib"
+
+
+def test_shipped_artifacts_load():
+    with h5py.File(SHIPPED_MODEL, "r") as h5file:
+        paths = [resolve_legacy_path(h5file.attrs[name], SHIPPED_MODEL) for name in ARTIFACT_ATTRS]
+    for path in paths:
+        assert os.path.exists(path)
+    df = joblib.load(paths[-1])
+    assert {"PRODUCT_NAME", "CATEGORY", "STYLE"} <= set(df.columns)
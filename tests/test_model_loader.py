@@ -0,0 +1,61 @@
+import time
+
+from src.model_loader import ModelSlot, ModelRefresher
+
+
+def wait_for(refresher, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while refresher.running and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return refresher.last_result
+
+
+def make_refresher(published):
+    slot = ModelSlot("test", lambda: "live")
+    slot.load()
+    refresher = ModelRefresher(
+        slot,
+        build_fn=lambda mode="reload": f"{mode}-candidate",
+        validate_fn=lambda candidate: not candidate.startswith("bad"),
+        publish_fn=lambda candidate, mode="reload": published.append((candidate, mode)),
+    )
+    return slot, refresher
+
+
+def test_rejected_candidate_is_never_published():
+    published = []
+    slot, refresher = make_refresher(published)
+
+    assert refresher.trigger("test", mode="bad")
+    result = wait_for(refresher)
+
+    assert result["outcome"] == "failed"
+    assert published == []
+    assert slot.get() == "live"
+
+
+def test_validated_candidate_is_published_then_swapped():
+    published = []
+    slot, refresher = make_refresher(published)
+
+    refresher.trigger("test", mode="retrain")
+    result = wait_for(refresher)
+
+    assert result["outcome"] == "swapped"
+    assert published == [("retrain-candidate", "retrain")]
+    assert slot.get() == "retrain-candidate"
+    assert slot.generation == 2
+
+
+def test_failed_publish_keeps_the_live_model():
+    slot = ModelSlot("test", lambda: "live")
+    slot.load()
+
+    def fail(candidate, **kwargs):
+        raise OSError("disk full")
+
+    refresher = ModelRefresher(slot, build_fn=lambda: "candidate", publish_fn=fail)
+    refresher.trigger("test")
+
+    assert wait_for(refresher)["outcome"] == "failed"
+    assert slot.get() == "live"
@@ -0,0 +1,94 @@
+import time
+import asyncio
+
+import httpx
+import pytest
+
+from src import main
+from src.gemini_client import AsyncGeminiClient, CircuitBreaker
+from src.query_cache import QueryCache
+from src.quantity_estimator import QuantityEstimator
+from src.quantity_store import QuantityStore
+from src.stubs import gemini_stub
+
+# Not a product type of the footprint table, so every answer comes from Gemini
+UNKNOWN_PRODUCT = "Zorblax Widget"
+
+
+@pytest.fixture
+def quantities(monkeypatch, tmp_path):
+    """Serve the quantity endpoints from the in-process Gemini stub, with empty caches"""
+    monkeypatch.setattr(gemini_stub, "request_count", 0)
+    monkeypatch.setattr(main, "gemini_client", AsyncGeminiClient(
+        "stub", base_url="http://gemini-stub/v1", timeout=0.5,
+        breaker=CircuitBreaker(failure_threshold=1, reset_timeout=60),
+        transport=httpx.ASGITransport(app=gemini_stub.app),
+    ))
+    monkeypatch.setattr(main, "quantity_store", QuantityStore(str(tmp_path / "quantity.sqlite")))
+    monkeypatch.setattr(main, "quantity_cache", QueryCache(ttl=3600, stale_ttl=0, max_entries=64))
+    monkeypatch.setattr(main, "quantity_estimator", QuantityEstimator())
+
+    def post_all(*bodies, path="/api/generate-quantity/"):
+        async def run():
+            transport = httpx.ASGITransport(app=main.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://app") as client:
+                responses = await asyncio.gather(*(client.post(path, json=body) for body in bodies))
+            await main.gemini_client.aclose()
+            return [response.json() for response in responses]
+
+        return asyncio.run(run())
+
+    return post_all
+
+
+def quantity_request(product=UNKNOWN_PRODUCT, room_size="20"):
+    return {"product_name": product, "room_size": room_size}
+
+
+def test_answers_are_cached_and_survive_a_restart(quantities, monkeypatch):
+    [first] = quantities(quantity_request())
+    [second] = quantities(quantity_request(room_size="21"))
+    assert first == second and first != main.FALLBACK_QUANTITY
+    assert gemini_stub.request_count == 1
+
+    # A new process: empty memory cache and estimator, same disk store
+    monkeypatch.setattr(main, "quantity_cache", QueryCache(ttl=3600, stale_ttl=0, max_entries=64))
+    monkeypatch.setattr(main, "quantity_estimator", QuantityEstimator())
+    assert quantities(quantity_request(" zorblax  WIDGET ")) == [first]
+    assert gemini_stub.request_count == 1
+
+
+def test_concurrent_identical_requests_share_one_call(quantities, monkeypatch):
+    monkeypatch.setattr(gemini_stub, "LATENCY", 0.1)
+    answers = quantities(*[quantity_request()] * 8)
+
+    assert all(answer == answers[0] for answer in answers)
+    assert gemini_stub.request_count == 1
+
+
+def test_deadline_returns_the_fallback_without_caching_it(quantities, monkeypatch):
+    monkeypatch.setattr(gemini_stub, "LATENCY", 2.0)
+    start = time.perf_counter()
+    assert quantities(quantity_request()) == [main.FALLBACK_QUANTITY]
+    assert time.perf_counter() - start < 1.5
+    assert len(main.quantity_store) == 0
+
+    # The missed deadline opened the breaker: the next call falls back without calling Gemini
+    monkeypatch.setattr(gemini_stub, "LATENCY", 0)
+    assert quantities(quantity_request()) == [main.FALLBACK_QUANTITY]
+    assert gemini_stub.request_count == 1
+    assert main.gemini_client.breaker.status()["rejected"] == 1
+
+
+def test_bulk_request_falls_back_while_the_breaker_is_open(quantities):
+    main.gemini_client.breaker.record_failure()
+    [response] = quantities(
+        {"room_size": "20", "product_names": [UNKNOWN_PRODUCT, "Coffee Table"]},
+        path="/api/generate-quantity/bulk",
+    )
+
+    unknown, coffee_table = response["results"]
+    assert {"quantity": unknown["quantity"], "size": unknown["size"]} == main.FALLBACK_QUANTITY
+    # Known product types never need Gemini
+    assert coffee_table["quantity"] == "1 pcs"
+    assert gemini_stub.request_count == 0
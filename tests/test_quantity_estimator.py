@@ -0,0 +1,50 @@
+import pytest
+
+from src import main
+from src.catalog_index import FLOORING_CATEGORY
+from src.quantity_estimator import QuantityEstimator, MIN_CONFIDENCE, FOOTPRINTS
+
+
+@pytest.mark.parametrize("product, product_type", [
+    ("Glass Coffee Table", "glass coffee table"),
+    ("Coffee Table Lamp", "lamp"),
+    ("Oven Stovetop", "stovetop"),
+    ("Wall Mounted Shelves", "shelves"),
+    ("Throw Pillows", "pillows"),
+    ("Modern Refrigerator", "refrigerator"),
+])
+def test_classifies_by_head_noun(product, product_type):
+    footprint, confidence = QuantityEstimator().classify(product)
+    assert footprint == FOOTPRINTS[product_type]
+    assert confidence >= MIN_CONFIDENCE
+
+
+@pytest.mark.parametrize("product", ["Chair Cushion", "Sofa Cover", "Coffee Table Book", "Lamp Shade"])
+def test_modifier_matches_go_to_the_llm(product):
+    estimator = QuantityEstimator()
+    assert estimator.classify(product)[1] < MIN_CONFIDENCE
+    assert estimator.estimate(product, 20) is None
+
+
+def test_every_catalog_product_is_answered_locally():
+    df = main.startup_catalog.df
+    names = df.loc[df['CATEGORY'] != FLOORING_CATEGORY, 'PRODUCT_NAME'].unique()
+    estimator = QuantityEstimator()
+    assert [name for name in names if estimator.estimate(name, 20) is None] == []
+
+
+def test_learned_answers_win_over_the_table():
+    estimator = QuantityEstimator()
+    estimator.learn("Chair Cushion", 20, {"quantity": "4 pcs", "size": "0.2 sqm"})
+    assert estimator.estimate("chair cushion", 20) == {"quantity": "4 pcs", "size": "0.2 sqm"}
+
+
+def test_classification_memo_is_a_bounded_lru():
+    estimator = QuantityEstimator(max_classified=2)
+    estimator.classify("Sofa")
+    estimator.classify("Lamp")
+    estimator.classify("sofa")  # most recently used again
+    estimator.classify("Rug")
+
+    assert list(estimator._classified) == ["sofa", "rug"]
+    assert estimator.classify("Lamp")[0] == FOOTPRINTS["lamp"]
@@ -0,0 +1,31 @@
+import asyncio
+
+import httpx
+
+from src import main
+from src.query_cache import QueryCache
+
+
+def test_case_and_whitespace_variants_share_one_cache_entry(monkeypatch):
+    built = []
+
+    async def build(room, style, flooring, refresh=False):
+        built.append((room, style, flooring))
+        return []
+
+    monkeypatch.setattr(main, "recommendation_cache", QueryCache(ttl=300, stale_ttl=0, max_entries=16))
+    monkeypatch.setattr(main, "_build_recommendations", build)
+    lookup = main._catalog_index()
+    room, style = lookup.facets.categories[0]["name"], lookup.facets.styles[0]["name"]
+
+    async def run():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://app") as client:
+            for variant in (room, f" {room.upper()} ", room.lower()):
+                response = await client.post("/api/recommendations", json={
+                    "room": variant, "style": f"{style.lower()} ", "flooring": "",
+                })
+                assert response.status_code == 200
+
+    asyncio.run(run())
+    assert built == [(room, style, None)]